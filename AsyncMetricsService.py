@@ -0,0 +1,205 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from BatchCalculator import METRICS
+from MetricsService import ServiceError, MAX_REQUEST_SIZE, remove_socket
+
+'''
+Asyncio front end of the metrics service (see MetricsService.py) for many concurrent small requests.
+Requests are the JSON objects of MetricsService, one per line (newline-delimited JSON), with an optional "id" which is
+copied to the response. Responses are written one per line as their batches finish, so not necessarily in the order
+of the requests.
+'''
+
+# Default number of seconds a request waits for others to join its batch
+DEFAULT_MAX_DELAY = 0.005
+# Default number of words in a batch above which it is computed without waiting any longer
+DEFAULT_MAX_BATCH_SIZE = 2000
+
+class Batch:
+    '''
+    Requests for the same corpus, metrics and kinds of words, which are computed together.
+    '''
+    def __init__(self, corpus, job):
+        self.corpus = corpus
+        self.job = job
+        self.requests = []
+        self.num_words = 0
+        self.timer = None
+
+    def add_request(self, input_words, future):
+        self.requests.append((input_words, future))
+        self.num_words += len(input_words)
+
+class RequestBatcher:
+    '''
+    Gathers the requests for the same corpus and selection of metrics which arrive within max_delay seconds of the
+    first into one batch, computes each distinct word of the batch once, and gives each request the rows of its own
+    words. Batches are computed one at a time by a single thread, holding the lock of the service.
+    '''
+    def __init__(self, service, max_delay=DEFAULT_MAX_DELAY, max_batch_size=DEFAULT_MAX_BATCH_SIZE, num_processes=1):
+        '''
+        :param service: MetricsService with the corpora.
+        :param max_delay: largest number of seconds a request waits for others to join its batch.
+        :param max_batch_size: number of words in a batch above which it is computed without waiting any longer.
+        :param num_processes: number of worker processes used for batches with enough words.
+        '''
+        self.service = service
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.num_processes = num_processes
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = {}
+
+    async def submit(self, request):
+        '''
+        Returns the response to a metrics request once its batch has been computed.
+        Raises ServiceError if the request is not valid or one of its words cannot be tokenised.
+        '''
+        corpus, words, metrics = self.service.parse_request(request)
+        job, input_words = corpus.prepare_request(words, metrics)
+        selection = tuple(getattr(job.selected_buttons, metric) for metric in METRICS)
+        batch_key = (corpus.name, selection, job.read_phon_words)
+        loop = asyncio.get_running_loop()
+        batch = self.batches.get(batch_key)
+        if batch is None:
+            batch = Batch(corpus, job)
+            batch.timer = loop.call_later(self.max_delay, self.flush, batch_key)
+            self.batches[batch_key] = batch
+        future = loop.create_future()
+        batch.add_request(input_words, future)
+        if batch.num_words >= self.max_batch_size:
+            self.flush(batch_key)
+        header, rows = await future
+        return {"header": header, "rows": rows}
+
+    def flush(self, batch_key):
+        '''
+        Starts computing a batch in the executor, after which the futures of its requests are given their results.
+        '''
+        batch = self.batches.pop(batch_key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        loop = asyncio.get_running_loop()
+        computation = loop.run_in_executor(self.executor, self.compute_batch, batch)
+        computation.add_done_callback(lambda done: self.set_results(batch, done))
+
+    def compute_batch(self, batch):
+        '''
+        Returns, for each request of a batch, its header and rows, or the ServiceError raised for it.
+        '''
+        word_ids = {}
+        words = []
+        for input_words, future in batch.requests:
+            for word in input_words:
+                if (word.orth, word.phon) not in word_ids:
+                    word_ids[(word.orth, word.phon)] = len(words)
+                    words.append(word)
+        with self.service.lock:
+            try:
+                header, rows = batch.corpus.compute_words(batch.job, words, self.num_processes)
+            except ServiceError:
+                # a word cannot be tokenised, so the requests are computed separately for only theirs to fail
+                return [self.compute_request(batch, input_words) for input_words, future in batch.requests]
+        results = []
+        for input_words, future in batch.requests:
+            results.append((header, [rows[word_ids[(word.orth, word.phon)]] for word in input_words]))
+        return results
+
+    def compute_request(self, batch, input_words):
+        try:
+            return batch.corpus.compute_words(batch.job, input_words)
+        except ServiceError as e:
+            return e
+
+    def set_results(self, batch, computation):
+        if computation.exception() is not None:
+            results = [computation.exception()] * len(batch.requests)
+        else:
+            results = computation.result()
+        for (input_words, future), result in zip(batch.requests, results):
+            if future.cancelled():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def handle_connection(self, reader, writer):
+        '''
+        Answers the requests of a connection, one JSON object per line, until it is closed.
+        '''
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self.write_response(writer, write_lock, {"error": "The request is too large."})
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(self.handle_line(line, writer, write_lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def handle_line(self, line, writer, write_lock):
+        request_id = None
+        try:
+            try:
+                request = json.loads(line.decode("utf-8"))
+            except ValueError:
+                raise ServiceError("The request is not valid JSON.")
+            if isinstance(request, dict):
+                request_id = request.get("id")
+            response = await self.submit(request)
+        except ServiceError as e:
+            response = {"error": e.msg}
+        except Exception:
+            response = {"error": "Unable to compute the metrics of the request."}
+        if request_id is not None:
+            response["id"] = request_id
+        await self.write_response(writer, write_lock, response)
+
+    async def write_response(self, writer, write_lock, response):
+        async with write_lock:
+            writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+async def start_server(batcher, host="127.0.0.1", port=8765, socket_path=None):
+    '''
+    Returns a started asyncio server for the requests of batcher, listening on a Unix socket if socket_path is given,
+    else on host and port.
+    '''
+    if socket_path:
+        remove_socket(socket_path)
+        return await asyncio.start_unix_server(batcher.handle_connection, socket_path, limit=MAX_REQUEST_SIZE)
+    return await asyncio.start_server(batcher.handle_connection, host, port, limit=MAX_REQUEST_SIZE)
@@ -0,0 +1,104 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import argparse
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+from AsyncMetricsService import RequestBatcher
+from BatchCalculator import add_corpus_arguments
+from MetricsService import MetricsService, ServiceError, WarmCorpus
+from ParallelTest import make_words, write_csv
+
+'''
+Tests that the requests batched by RequestBatcher get the same responses as requests computed one at a time.
+'''
+
+METRICS = ["orth_n_dens", "OLD20", "phon_n_dens", "PLD20", "pg_n_dens", "stress_typ"]
+
+def make_warm_corpus(directory, corpus):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus")
+    add_corpus_arguments(parser)
+    args = parser.parse_args([write_csv(directory, "corpus.csv", corpus), "--language", "uk", "--no-cache"])
+    return WarmCorpus("english", args)
+
+class RequestBatcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        corpus, input_words = make_words(1, 500, 60)
+        with tempfile.TemporaryDirectory() as directory:
+            cls.corpus = make_warm_corpus(directory, corpus)
+        cls.service = MetricsService()
+        cls.service.add_corpus(cls.corpus)
+        cls.words = input_words
+
+    def make_request(self, words):
+        return {"metrics": METRICS, "words": words}
+
+    def get_single_response(self, words):
+        header, rows = self.corpus.compute(words, METRICS)
+        return {"header": header, "rows": rows}
+
+    def submit_all(self, batcher, requests):
+        async def submit_all():
+            return await asyncio.gather(*[batcher.submit(request) for request in requests],
+                                        return_exceptions=True)
+        return asyncio.run(submit_all())
+
+    def test_batch_computes_each_word_once(self):
+        word_lists = [self.words[0:20], self.words[10:30], self.words[0:5] + self.words[0:5]]
+        batcher = RequestBatcher(self.service, max_delay=0.05)
+        with mock.patch.object(self.corpus, "compute_words", wraps=self.corpus.compute_words) as compute_words:
+            responses = self.submit_all(batcher, [self.make_request(words) for words in word_lists])
+        self.assertEqual(compute_words.call_count, 1)
+        computed_words = compute_words.call_args[0][1]
+        self.assertEqual(len(computed_words), len({tuple(word) for word in self.words[0:30]}))
+        for words, response in zip(word_lists, responses):
+            self.assertEqual(response, self.get_single_response(words))
+
+    def test_failed_word_fails_only_its_request(self):
+        word_lists = [self.words[0:10], [["cat", "qqq"]] + self.words[10:12], self.words[5:15]]
+        batcher = RequestBatcher(self.service, max_delay=0.05)
+        responses = self.submit_all(batcher, [self.make_request(words) for words in word_lists])
+        self.assertIsInstance(responses[1], ServiceError)
+        self.assertIn("qqq", responses[1].msg)
+        self.assertEqual(responses[0], self.get_single_response(word_lists[0]))
+        self.assertEqual(responses[2], self.get_single_response(word_lists[2]))
+
+    def test_batch_waits_for_max_delay(self):
+        batcher = RequestBatcher(self.service, max_delay=0.2)
+        start = time.monotonic()
+        responses = self.submit_all(batcher, [self.make_request(self.words[0:2])])
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(responses[0], self.get_single_response(self.words[0:2]))
+
+    def test_full_batch_is_computed_at_once(self):
+        batcher = RequestBatcher(self.service, max_delay=60, max_batch_size=10)
+        with mock.patch.object(self.corpus, "compute_words", wraps=self.corpus.compute_words) as compute_words:
+            responses = self.submit_all(batcher, [self.make_request(self.words[0:6]),
+                                                  self.make_request(self.words[6:12])])
+        # the batch reached max_batch_size with the second request and did not wait for max_delay
+        self.assertEqual(compute_words.call_count, 1)
+        self.assertEqual(responses[0], self.get_single_response(self.words[0:6]))
+        self.assertEqual(responses[1], self.get_single_response(self.words[6:12]))
+
+if __name__ == '__main__':
+    unittest.main()
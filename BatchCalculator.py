@@ -0,0 +1,384 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import multiprocessing
+import os
+import sys
+import time
+from MetricsEngine import MetricsEngine, iter_input_stream
+from SelectedButtons import SelectedButtons
+from FileReader import FileReader
+from CorpusCache import CorpusCache, CACHE_DIR_NAME
+from ResultCache import ResultCache, DEFAULT_MAX_SIZE
+from SharedCorpus import PackedCorpus
+from Phonemes import Phonemes
+from Tokeniser import token_cache
+from ReadWrite import CsvWriter, DEFAULT_ENCODING, read_csv
+from Exceptions import *
+
+# Metrics which can be selected, named as the attributes of SelectedButtons.
+# A metric ending in _sub selects the metric without it, counting substitution neighbours only.
+METRICS = [name for name in vars(SelectedButtons()) if name not in ("key", "ps_stress_code")]
+# Transcription systems and languages, in the order of the keys of Phonemes
+SYSTEMS = {"ipa": 0, "sampa": 6, "klattese": Phonemes.KLATTESE_KEY}
+LANGUAGES = ["us", "uk", "fr", "es", "nl", "de"]
+# Smallest number of seconds between progress reports
+PROGRESS_INTERVAL = 0.5
+
+class BatchError(Exception):
+    pass
+
+class Job:
+    '''
+    A single run over one input file: the input file, the output file and the selected metrics, and the kinds of
+    words found in the input file.
+    '''
+    def __init__(self, input_file, output_file, selected_buttons):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.selected_buttons = selected_buttons
+        self.num_words = 0
+        self.input_has_phon_column = False
+        self.read_phon_words = False
+        self.has_orth_words = False
+        self.has_phon_words = False
+        self.has_pg_words = False
+        self.num_duplicates = 0
+        self.num_cached = 0
+
+class BatchCalculator:
+    '''
+    Runs the same steps as CalculatorWindow without the user interface, for options parsed by a parser with the
+    arguments of add_corpus_arguments and add_run_arguments (and a corpus argument): checks the input files, loads
+    the corpus, checks the selected metrics, and computes the metrics with a MetricsEngine, writing the output rows
+    to the output files as they are computed. Errors are raised as BatchError with the message shown by
+    the user interface.
+    The corpus is loaded once for all jobs, and the metric classes are prepared once for all the metrics selected
+    by any job, so every job after the first uses the corpus structures already built.
+    '''
+    def __init__(self, args):
+        self.args = args
+        self.corpus_file = args.corpus
+        self.input_is_both_phon_and_orth = not args.orth_only
+        self.key = self.get_transcription_system()
+        self.file_reader = FileReader()
+        self.corpus_cache = None
+        self.result_cache = None
+        self.corpus_items = None
+
+    def run(self, jobs):
+        '''
+        Checks all jobs before running any of them, then runs them in order. A job which fails while running is
+        reported and the remaining jobs are still run. Returns the number of failed jobs.
+        '''
+        start = time.monotonic()
+        self.load_phonetic_system()
+        self.load_corpus_file()
+        for job in jobs:
+            self.load_input_file(job)
+            self.run_prechecks(job)
+            self.load_input_words(job)
+        self.init_engine(jobs)
+        if self.args.result_cache:
+            corpus_cache = self.corpus_cache or self.make_corpus_cache()
+            if corpus_cache:
+                self.result_cache = ResultCache.open(corpus_cache, self.key)
+        self.report("Prepared corpus in %.2f s" % (time.monotonic() - start))
+
+        num_failed = 0
+        try:
+            for idx in range(len(jobs)):
+                job = jobs[idx]
+                start = time.monotonic()
+                try:
+                    self.write_output(job)
+                except BatchError as e:
+                    self.report("Job %d of %d (%s) failed: %s" % (idx + 1, len(jobs), job.input_file, e),
+                                always=True)
+                    num_failed += 1
+                    continue
+                self.report("Job %d of %d (%s): %d words (%d duplicates, %d cached) in %.2f s" % (
+                    idx + 1, len(jobs), job.input_file, job.num_words, job.num_duplicates, job.num_cached,
+                    time.monotonic() - start))
+            # worker processes of parallel runs have token caches of their own, which are not counted here
+            self.report("Token cache: %d hits, %d misses, %d strings held" % token_cache.stats())
+        finally:
+            if self.result_cache:
+                self.result_cache.close()
+                self.result_cache = None
+        return num_failed
+
+    def get_transcription_system(self):
+        if self.args.orth_only:
+            return -1
+        if self.args.phonetic_system:
+            return Phonemes.CUSTOM_KEY
+        if self.args.system == "klattese":
+            if self.args.language != "us":
+                raise BatchError("Klattese is only available for English (US).")
+            return Phonemes.KLATTESE_KEY
+        return SYSTEMS[self.args.system] + LANGUAGES.index(self.args.language)
+
+    def get_selected_buttons(self, metrics):
+        '''
+        Returns the SelectedButtons for a list of metric names, or for all metrics if metrics is ["all"].
+        '''
+        buttons = SelectedButtons()
+        buttons.set_transcription_system(self.key)
+        if metrics == ["all"]:
+            metrics = [metric for metric in METRICS if not metric.endswith("_sub")]
+        for metric in metrics:
+            if metric not in METRICS:
+                raise BatchError("Unknown metric " + metric + ".")
+            setattr(buttons, metric, True)
+            if metric.endswith("_sub"):
+                setattr(buttons, metric[:-4], True)
+        return buttons
+
+    def read_manifest(self, manifest_file):
+        '''
+        Returns the jobs of a batch manifest, with the paths of the files relative to the directory of the manifest.
+        '''
+        try:
+            rows = read_csv(manifest_file)
+        except OSError:
+            raise BatchError("The specified manifest file cannot be found in the directory.")
+        except UnicodeDecodeError:
+            raise BatchError("Unable to read manifest file. Please check that it is saved in CSV format.")
+        directory = os.path.dirname(manifest_file)
+        jobs = []
+        for row in rows:
+            row = [cell.strip() for cell in row]
+            if not any(row):
+                continue
+            if len(row) != 3 or not all(row):
+                raise BatchError("Each row of the manifest file must have an input file, an output file " +
+                                       "and the metrics.")
+            jobs.append(Job(os.path.join(directory, row[0]), os.path.join(directory, row[1]),
+                            self.get_selected_buttons(row[2].split())))
+        if not jobs:
+            raise BatchError("The manifest file has no jobs.")
+        return jobs
+
+    def load_phonetic_system(self):
+        if not self.args.phonetic_system:
+            return
+        try:
+            if not Phonemes().get_custom_phonemes(self.args.phonetic_system):
+                raise BatchError("The phonetic system file format is incorrect.")
+        except (FileNotFoundError, PermissionError):
+            raise BatchError("The specified phonetic system file was not found in the directory.")
+        except UnicodeDecodeError:
+            raise BatchError("Unable to read phonetic system file. " +
+                                   "Please ensure that the file is saved in CSV format.")
+
+    def load_input_file(self, job):
+        try:
+            job.num_words, job.input_has_phon_column = self.file_reader.scan_input(
+                job.input_file, self.input_is_both_phon_and_orth)
+        except OSError:
+            raise BatchError("The input file " + job.input_file + " cannot be found in the directory.")
+        except UnicodeDecodeError:
+            raise BatchError("Unable to read input file " + job.input_file +
+                                   ". Please check that it is saved in CSV format.")
+        except EmptyCellException:
+            raise BatchError("There are empty cells in the input file " + job.input_file + ".")
+
+    def load_corpus_file(self):
+        try:
+            self.corpus_cache = self.get_corpus_cache()
+            self.corpus = self.corpus_cache.load() if self.corpus_cache else None
+            if self.corpus is None:
+                self.corpus = self.file_reader.read_corpus_file(self.corpus_file, self.input_is_both_phon_and_orth)
+        except OSError:
+            raise BatchError("The specified corpus file was not found in the directory.")
+        except UnicodeDecodeError:
+            raise BatchError("Unable to read corpus file. Please check that it is saved in CSV format.")
+        except WrongCorpusInputException:
+            raise BatchError("The corpus file format is incorrect. " +
+                                   "Please ensure that the number of columns is correct.")
+        except EmptyCellException:
+            raise BatchError("There are empty cells in the corpus. Please check the corpus file.")
+        except CorpusFreqNotFloatException:
+            raise BatchError("Please ensure that only numbers are in the frequency column of the corpus file.")
+
+    def get_corpus_cache(self):
+        if self.args.no_cache:
+            return None
+        return self.make_corpus_cache()
+
+    def make_corpus_cache(self):
+        try:
+            return CorpusCache(self.corpus_file, self.input_is_both_phon_and_orth, self.key,
+                               self.args.phonetic_system)
+        except OSError:
+            return None
+
+    def save_corpus_cache(self):
+        if not self.corpus_cache:
+            return
+        phon_tokens_dic = self.engine.get_phon_tokens_dic()
+        if isinstance(self.corpus, PackedCorpus) and (self.corpus.has_phon_tokens() or phon_tokens_dic is None):
+            return
+        self.corpus_cache.save(self.corpus, phon_tokens_dic)
+
+    def get_num_corpus_items(self, column):
+        '''
+        Returns the number of unique orthographic (column 0) or phonological (column 1) words in the corpus.
+        '''
+        if self.corpus_items is None:
+            self.corpus_items = [len(set(map(lambda x: x[col], self.corpus))) for col in range(2)]
+        return self.corpus_items[column]
+
+    def run_prechecks(self, job):
+        buttons = job.selected_buttons
+        if not buttons.is_any_checked():
+            raise BatchError("No metrics have been selected.")
+        if buttons.is_any_stress_metric_checked():
+            if self.key == Phonemes.CUSTOM_KEY and Phonemes.custom_primary_stress is None:
+                raise BatchError("Please specify a stress mark in the phonetic system.")
+            elif self.key not in Phonemes.SAMPA_KEYS + Phonemes.IPA_KEYS + [Phonemes.CUSTOM_KEY]:
+                raise BatchError("The phonetic system does not support stress marking for surface metrics.")
+        if (buttons.OLD20 and self.get_num_corpus_items(0) < 20) \
+                or (buttons.PLD20 and self.get_num_corpus_items(1) < 20):
+            raise BatchError("The corpus needs at least 20 unique items if OLD20/PLD20 is selected.")
+
+    def load_input_words(self, job):
+        job.read_phon_words = self.input_is_both_phon_and_orth and job.input_has_phon_column
+        job.has_orth_words = job.num_words > 0
+        job.has_phon_words = job.read_phon_words and job.num_words > 0
+        job.has_pg_words = job.has_orth_words and job.has_phon_words
+
+        buttons = job.selected_buttons
+        if not job.has_phon_words and buttons.is_any_phon_metric_checked():
+            raise BatchError("Words (phonological) must not be empty for phonological metrics.")
+        if not job.has_orth_words and buttons.is_any_orth_metric_checked():
+            raise BatchError("Words (orthographic) must not be empty for orthographic metrics.")
+        if not job.has_pg_words and buttons.is_any_pg_metric_checked():
+            raise BatchError("Words (phonological) and Words (orthographic) must not be empty " +
+                                   "for phonographic metrics.")
+        if not job.has_phon_words and buttons.is_any_stress_metric_checked():
+            raise BatchError("Words (phonological) must not be empty for surface metrics.")
+
+    def init_engine(self, jobs):
+        '''
+        Prepares the metric classes for all the metrics selected by any job and the kinds of words of any job.
+        '''
+        buttons = SelectedButtons()
+        buttons.set_transcription_system(self.key)
+        for job in jobs:
+            for metric in METRICS:
+                if getattr(job.selected_buttons, metric):
+                    setattr(buttons, metric, True)
+        self.prepare_engine(buttons, sum(job.num_words for job in jobs), any(job.has_orth_words for job in jobs),
+                            any(job.has_phon_words for job in jobs), any(job.has_pg_words for job in jobs))
+
+    def prepare_engine(self, selected_buttons, num_words, has_orth_words, has_phon_words, has_pg_words):
+        '''
+        Prepares the metric classes of self.engine for selected_buttons and the kinds of words given, after which
+        get_job_engine of self.engine gives an engine for any selection covered by selected_buttons.
+        '''
+        self.engine = MetricsEngine(self.corpus, selected_buttons, [], [], [], num_words)
+        try:
+            self.engine.init_stream(has_orth_words, has_phon_words, has_pg_words)
+        except TokeniseException as e:
+            raise BatchError("Unable to tokenise the string '" + e.word + "'.")
+        self.save_corpus_cache()
+
+    def write_output(self, job):
+        '''
+        Computes the word entries of a job and writes them to its output file as they are computed, reporting
+        progress. The output file is removed if the job fails, as its rows are incomplete.
+        '''
+        engine = self.engine.get_job_engine(job.selected_buttons, job.num_words, job.has_orth_words,
+                                            job.has_phon_words, job.has_pg_words)
+        engine.result_cache = self.result_cache
+        engine.start_method = self.args.start_method
+        try:
+            writer = CsvWriter(job.output_file, self.args.encoding)
+        except OSError:
+            raise BatchError("Unable to write to the output file " + job.output_file + ".")
+        words = iter_input_stream(self.file_reader.read_input_words(job.input_file, job.read_phon_words))
+        word_entries = engine.iter_word_entries(words, job.num_words, self.args.processes, self.args.chunk_size)
+        is_complete = False
+        try:
+            writer.write_row(engine.generate_header())
+            count = 0
+            last_report = time.monotonic()
+            for chunk_entries in word_entries:
+                writer.write_rows([word_entry.print() for word_entry in chunk_entries])
+                writer.flush()
+                count += len(chunk_entries)
+                if not self.args.quiet and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    self.report_progress(count, job.num_words)
+                    last_report = time.monotonic()
+            if not self.args.quiet:
+                self.report_progress(count, job.num_words)
+                sys.stderr.write("\n")
+            is_complete = True
+        except TokeniseException as e:
+            raise BatchError("Unable to tokenise the string '" + e.word + "'.")
+        except EmptyCellException:
+            raise BatchError("Unable to read input file. Please check that it has not been changed.")
+        except OSError:
+            raise BatchError("Unable to read the input file or write the output file.")
+        finally:
+            word_entries.close()
+            if is_complete:
+                writer.close()
+            else:
+                writer.discard()
+            job.num_duplicates = engine.num_duplicates
+            job.num_cached = engine.num_cached
+
+    def report_progress(self, count, num_words):
+        sys.stderr.write("\rProcessed %d of %d words" % (count, num_words))
+        sys.stderr.flush()
+
+    def report(self, msg, always=False):
+        if always or not self.args.quiet:
+            sys.stderr.write(msg + "\n")
+
+def add_corpus_arguments(parser):
+    '''
+    Adds the arguments for the corpus file and the transcription system to an argparse parser.
+    '''
+    parser.add_argument("--orth-only", action="store_true",
+                        help="the input and corpus have orthographic words only")
+    parser.add_argument("--system", choices=sorted(SYSTEMS), default="ipa", help="transcription system (default ipa)")
+    parser.add_argument("--language", choices=LANGUAGES, default="us", help="language of the transcription "
+                                                                             "system (default us)")
+    parser.add_argument("--phonetic-system", metavar="FILE",
+                        help="csv file of a custom phonetic system, used instead of --system and --language")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the compiled corpus")
+
+def add_run_arguments(parser):
+    '''
+    Adds the arguments for how the metrics are computed and written to an argparse parser.
+    '''
+    parser.add_argument("-p", "--processes", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("--chunk-size", type=int, help="number of words given to a worker process at a time")
+    parser.add_argument("--start-method", choices=multiprocessing.get_all_start_methods(),
+                        help="how worker processes are started (default: that of the platform)")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="keep the results of each run, up to %d MB, in the %s directory next to the corpus file "
+                             "and reuse them in later runs" % (DEFAULT_MAX_SIZE // (1024 * 1024), CACHE_DIR_NAME))
+    parser.add_argument("--encoding", default=DEFAULT_ENCODING,
+                        help="encoding of the output file (default %s)" % DEFAULT_ENCODING)
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
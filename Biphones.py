@@ -17,7 +17,8 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
 '''
-Only first three functions are used in LexiCAL, the last two are from an older version.
+Only get_biphones is used in LexiCAL, by the positional bigram tables of NGrams.py. The last two functions
+are from an older version.
 The words passed into these functions should be tokenised.
 The term "biphone" is used but the same functions are also used for computing bigram metrics.
 '''
@@ -32,50 +33,6 @@ def get_biphones(word):
         lst.append(new)
     return lst
 
-def get_bpprob_base(corpus):
-    '''
-    Takes in a dictionary mapping tokenised words to their frequency.
-    Returns a nested dictionary of dictionaries, where each dictionary is for a
-    different biphone position and maps biphone to their probability.
-    '''
-    dic = {}
-    for word in corpus:
-        biphones = get_biphones(word)
-        for idx in range(len(biphones)):
-            bp = biphones[idx]
-            if idx not in dic:
-                dic[idx] = {}
-            if bp not in dic[idx]:
-                dic[idx][bp] = 0
-            dic[idx][bp] += corpus[word]
-
-    base = {}
-    for idx in dic:
-        base[idx] = {}
-        for bp in dic[idx]:
-            if sum(list(dic[idx].values())) == 0:
-                continue
-            base[idx][bp] = dic[idx][bp] / sum(list(dic[idx].values()))
-    return base
-
-def get_biphone_prob(word, base):
-    '''
-    Takes in a tokenised word and the base computed by get_bpprob_base,
-    returns the sum of the biphone probabilities at each position.
-    '''
-    biphones = get_biphones(word)
-    if not biphones:
-        return "NULL"
-    result = []
-    for idx in range(len(biphones)):
-        bp = biphones[idx]
-        if bp in base[idx]:
-            result.append(base[idx][bp])
-        else:
-            result.append(0.0)
-    biphone_prob_sum = sum(result)
-    return biphone_prob_sum
-
 def get_bpprob_base_simple(tokenised_words):
     dic = {}
     for word in tokenised_words:
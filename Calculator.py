@@ -16,19 +16,40 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
+import os
 from PyQt5 import QtWidgets
 from PyQt5 import QtCore
 from PyQt5.QtCore import pyqtSlot, QThreadPool
-from PyQt5.QtWidgets import QFileDialog, QTableWidgetItem, QMessageBox
+from PyQt5.QtWidgets import QFileDialog, QTableWidgetItem, QMessageBox, QActionGroup
 from UI_Calculator import Ui_LexiCAL
 from ReadWrite import *
 from ExecCalculator import ExecCalculator
+from MetricsEngine import get_default_num_processes, PARALLEL_MIN_WORDS
 from SelectedButtons import SelectedButtons
 from Exceptions import *
 from Phonemes import Phonemes
 from FileReader import FileReader
+from CorpusCache import CorpusCache, CACHE_DIR_NAME
+from ResultCache import ResultCache, DEFAULT_MAX_SIZE
+from SharedCorpus import PackedCorpus
 from Messages import FinishMessage, AbortMessage, ErrorMessage
 
+# Encodings of the output file offered in the settings menu, with the names shown for them
+OUTPUT_ENCODINGS = [("UTF-32", "utf-32"), ("UTF-16", "utf-16"), ("UTF-8", "utf-8"),
+                    ("UTF-8 with byte order mark", "utf-8-sig")]
+
+def get_num_processes_choices(num_cpus):
+    '''
+    Returns the numbers of worker processes offered in the settings menu: the powers of two below the number of CPUs,
+    and the number of CPUs.
+    '''
+    choices = []
+    num_processes = 1
+    while num_processes < num_cpus:
+        choices.append(num_processes)
+        num_processes *= 2
+    return choices + [num_cpus]
+
 class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
     def __init__(self):
         super().__init__()
@@ -45,9 +66,13 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
                             self.pg_n_dens_sad, self.pg_n_freq_sad]
 
         self.tabWidget.setCurrentIndex(0)
+        self.num_processes = get_default_num_processes()
+        self.output_encoding = DEFAULT_ENCODING
         self.configure_buttons()
-        self.max_input = 50000
-        self.file_reader = FileReader(self.max_input)
+        self.output_writer = None
+        self.corpus_cache = None
+        self.result_cache = None
+        self.file_reader = FileReader()
         self.startup_settings()
         self.show()
 
@@ -105,6 +130,51 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
 
         self.orth_only_button.clicked.connect(self.set_orth_only)
         self.both_phon_and_orth_button.clicked.connect(self.set_both_phon_and_orth)
+        self.configure_settings_menu()
+
+    def configure_settings_menu(self):
+        '''
+        Add the settings menu, whose options are kept for every run until they are changed.
+        '''
+        self.settings_menu = self.menuBar.addMenu("Settings")
+        self.corpus_cache_action = self.settings_menu.addAction("Cache compiled corpus")
+        self.corpus_cache_action.setCheckable(True)
+        self.corpus_cache_action.setChecked(True)
+        self.corpus_cache_action.setStatusTip("Keep the cleaned and tokenised corpus in the " + CACHE_DIR_NAME +
+                                              " folder next to the corpus file, so that later runs load it faster")
+        self.result_cache_action = self.settings_menu.addAction("Cache results")
+        self.result_cache_action.setCheckable(True)
+        self.result_cache_action.setChecked(False)
+        self.result_cache_action.setStatusTip("Keep the results of each run, up to %d MB, in the " % (
+            DEFAULT_MAX_SIZE // (1024 * 1024)) + CACHE_DIR_NAME + " folder next to the corpus file, so that words "
+                                              "computed before against the corpus are not computed again")
+        self.processes_menu = self.settings_menu.addMenu("Worker processes")
+        self.processes_action_group = QActionGroup(self)
+        for num_processes in get_num_processes_choices(os.cpu_count() or 1):
+            action = self.processes_menu.addAction(str(num_processes))
+            action.setCheckable(True)
+            action.setChecked(num_processes == self.num_processes)
+            action.setData(num_processes)
+            action.setStatusTip("Compute the metrics of inputs of %d words or more in %d processes" % (
+                PARALLEL_MIN_WORDS, num_processes) if num_processes > 1 else "Compute the metrics in one process")
+            self.processes_action_group.addAction(action)
+        self.processes_action_group.triggered.connect(self.set_num_processes)
+        self.encoding_menu = self.settings_menu.addMenu("Output encoding")
+        self.encoding_action_group = QActionGroup(self)
+        for name, encoding in OUTPUT_ENCODINGS:
+            action = self.encoding_menu.addAction(name)
+            action.setCheckable(True)
+            action.setChecked(encoding == self.output_encoding)
+            action.setData(encoding)
+            action.setStatusTip("Write the output file in " + name)
+            self.encoding_action_group.addAction(action)
+        self.encoding_action_group.triggered.connect(self.set_output_encoding)
+
+    def set_num_processes(self, action):
+        self.num_processes = action.data()
+
+    def set_output_encoding(self, action):
+        self.output_encoding = action.data()
 
     def run(self):
         '''
@@ -131,10 +201,12 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
 
     def load_input_file(self):
         '''
-        Read input file using the FileReader. Return False if unsuccessful.
+        Check the input file using the FileReader, without keeping it in memory. Return False if unsuccessful.
         '''
         try:
-            self.input_data = self.file_reader.read_input(self.input_filename)
+            self.input_file = self.file_reader.get_input_file(self.input_filename)
+            self.num_words, self.input_has_phon_column = self.file_reader.scan_input(
+                self.input_file, self.input_is_both_phon_and_orth)
             return True
         except (FileNotFoundError, OSError):
             self.return_error("The specified input file cannot be found in the directory.")
@@ -157,7 +229,10 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
         Read corpus file using FileReader. Return False if unsuccessful.
         '''
         try:
-            self.corpus = self.file_reader.read_corpus(self.corpus_filename, self.input_is_both_phon_and_orth)
+            self.corpus_cache = self.get_corpus_cache()
+            self.corpus = self.corpus_cache.load() if self.corpus_cache else None
+            if self.corpus is None:
+                self.corpus = self.file_reader.read_corpus(self.corpus_filename, self.input_is_both_phon_and_orth)
             return True
         except (FileNotFoundError, OSError):
             self.return_error("The specified corpus file was not found in the directory.")
@@ -181,40 +256,70 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
             self.return_error("Please ensure that only numbers are in the frequency column of the corpus file.")
             return False
 
+    def get_corpus_cache(self):
+        '''
+        Returns the CorpusCache of the selected corpus file, or None if a compiled corpus cannot be used.
+        '''
+        if not self.corpus_cache_action.isChecked():
+            return None
+        return self.make_corpus_cache()
+
+    def make_corpus_cache(self):
+        '''
+        Returns the CorpusCache of the selected corpus file whatever the settings, or None if it cannot be made.
+        '''
+        if self.corpus_filename.text() == "":
+            return None
+        key = self.get_transcription_system()
+        phonetic_system_file = None
+        if key == Phonemes.CUSTOM_KEY:
+            phonetic_system_file = self.other_phon_system.text() + ".csv"
+            if not os.path.isfile(phonetic_system_file):
+                return None
+        try:
+            return CorpusCache(self.corpus_filename.text() + ".csv", self.input_is_both_phon_and_orth, key,
+                               phonetic_system_file)
+        except OSError:
+            return None
+
+    def save_corpus_cache(self):
+        '''
+        Writes the compiled corpus if the corpus was read from the CSV file, or if it was read from a compiled corpus
+        without tokenised phonological words and has been tokenised since.
+        '''
+        if not self.corpus_cache:
+            return
+        phon_tokens_dic = self.worker.engine.get_phon_tokens_dic()
+        if isinstance(self.corpus, PackedCorpus) and (self.corpus.has_phon_tokens() or phon_tokens_dic is None):
+            return
+        self.corpus_cache.save(self.corpus, phon_tokens_dic)
+
     def load_input_words(self):
         '''
-        Load words into lists of orthographic words, phonological words, and phonographic words. Only orthographic
-        words are read if the input is orthography only.
+        Determine which kinds of words the input has: orthographic words, phonological words, and phonographic words.
+        Only orthographic words are read if the input is orthography only. The words themselves are streamed from the
+        input file during the run.
         Perform checks to ensure selected metrics apply to the type of words. Return False if unsuccessful.
         '''
-        self.orth_words = []
-        self.phon_words = []
-        self.pg_words = []
-        self.num_words = 0
-
-        if self.input_is_orth_only:
-            self.orth_words = self.file_reader.get_orth_words()
-            self.num_words = len(self.orth_words)
-        elif self.input_is_both_phon_and_orth:
-            self.orth_words = self.file_reader.get_orth_words()
-            self.phon_words = self.file_reader.get_phon_words()
-            self.num_words = max(len(self.orth_words), len(self.phon_words))
-            self.pg_words = self.file_reader.get_pg_words(self.num_words, self.orth_words, self.phon_words)
+        self.read_phon_words = self.input_is_both_phon_and_orth and self.input_has_phon_column
+        self.has_orth_words = self.num_words > 0
+        self.has_phon_words = self.read_phon_words and self.num_words > 0
+        self.has_pg_words = self.has_orth_words and self.has_phon_words
 
         if not self.input_is_orth_only and self.no_phonetic_system_is_checked():
             self.return_error("No phonetic system is selected. Please select a phonetic system.")
             return False
-        if not self.phon_words and self.selected_buttons.is_any_phon_metric_checked():
+        if not self.has_phon_words and self.selected_buttons.is_any_phon_metric_checked():
             self.return_error("Words (phonological) must not be empty for phonological metrics.")
             return False
-        if not self.orth_words and self.selected_buttons.is_any_orth_metric_checked():
+        if not self.has_orth_words and self.selected_buttons.is_any_orth_metric_checked():
             self.return_error("Words (orthographic) must not be empty for orthographic metrics.")
             return False
-        if not self.pg_words and self.selected_buttons.is_any_pg_metric_checked():
+        if not self.has_pg_words and self.selected_buttons.is_any_pg_metric_checked():
             self.return_error("Words (phonological) and Words (orthographic) must not be empty " +
                               "for phonographic metrics.")
             return False
-        if not self.phon_words and self.selected_buttons.is_any_stress_metric_checked():
+        if not self.has_phon_words and self.selected_buttons.is_any_stress_metric_checked():
             self.return_error("Words (phonological) must not be empty for surface metrics.")
             return False
 
@@ -259,13 +364,30 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
         Initialise a worker (ExecCalculator) with the corpus and input words. Return False if word cannot be
         tokenised, else connect signals to UI and return True.
         '''
-        self.worker = ExecCalculator(self.corpus, self.selected_buttons, self.orth_words,
-                                     self.phon_words, self.pg_words, self.num_words)
+        self.worker = ExecCalculator(self.corpus, self.selected_buttons, [], [], [], self.num_words, self.num_processes)
+        # the run is executed on a thread of a QThreadPool, and forking a process which has Qt threads running
+        # may leave its workers deadlocked on locks held by those threads, so worker processes are spawned
+        self.worker.set_start_method("spawn")
+        input_stream = self.file_reader.read_input_words(self.input_file, self.read_phon_words)
+        self.worker.set_input_stream(input_stream, self.has_orth_words, self.has_phon_words, self.has_pg_words)
         try:
             self.worker.init()
         except TokeniseException as e:
             self.return_error("Unable to tokenise the string '" + e.word + "'.")
             return False
+        self.save_corpus_cache()
+        try:
+            self.output_writer = CsvWriter(self.filename, self.output_encoding)
+        except OSError:
+            self.return_error("The file " + self.filename + " is open. Please close it.")
+            return False
+        self.worker.set_output_writer(self.output_writer)
+        # opened last, as it is closed by finished, which is only called once the run has started
+        if self.result_cache_action.isChecked():
+            corpus_cache = self.corpus_cache or self.make_corpus_cache()
+            if corpus_cache:
+                self.result_cache = ResultCache.open(corpus_cache, self.get_transcription_system())
+                self.worker.set_result_cache(self.result_cache)
 
         self.worker.signals.num_words_processed.connect(self.get_slider_value)
         self.worker.signals.total_num_words.connect(self.set_max_value)
@@ -290,17 +412,23 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
     @pyqtSlot()
     def finished(self):
         '''
-        If execution is not successful, return an error message. Else, save the execution output
-        and return a finished message.
+        If execution is not successful, return an error message. Else, return a finished message.
+        The output file has been written during the execution, and is closed here, or removed if the run failed or was
+        aborted, as its rows are incomplete. The result cache is closed either way.
         '''
+        if self.worker.exec_is_success:
+            self.output_writer.close()
+        else:
+            self.output_writer.discard()
+        if self.result_cache:
+            self.result_cache.close()
+            self.result_cache = None
         if not self.worker.exec_is_success:
             self.return_error(self.worker.error_msg)
             self.progress_bar.setValue(0)
         else:
-            self.final_output = self.worker.output
-            self.save_output()
             self.progress_bar.setValue(self.worker.get_number_of_words())
-            self.message_box = FinishMessage()
+            self.message_box = FinishMessage(self.worker.num_duplicates, self.worker.num_cached)
             self.message_box.show()
             self.message_box.buttonClicked.connect(self.startup_settings)
         self.submit_button.setEnabled(True)
@@ -371,22 +499,11 @@ class CalculatorWindow(QtWidgets.QMainWindow, Ui_LexiCAL):
         else:
             self.filename = filename
         try:
-            write([], self.filename)
+            write([], self.filename, self.output_encoding)
             return True
         except PermissionError:
             self.return_error("The file " + self.filename + " is open. Please close it.")
 
-    def save_output(self):
-        try:
-            write(self.final_output, self.filename)
-        except PermissionError:
-            self.return_error("The file " + self.filename + " is open. Please close it.")
-            self.retry_save_output()
-
-    def retry_save_output(self):
-        self.specify_output_file()
-        self.save_output()
-
     def closeEvent(self, event):
         quit_msg = "Are you sure you want to exit the program?"
         reply = QMessageBox.question(self, 'Exit', quit_msg, QMessageBox.Yes, QMessageBox.No)
@@ -0,0 +1,68 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import unittest
+from Ccoeff import get_ccoeff
+from Neighbours import Neighbours
+from NeighbourIndexTest import levenshtein, make_corpus, make_input_words
+
+'''
+Tests the C coefficients counted from the neighbour graph against a count of every pair of neighbours.
+'''
+
+def count_edges_pairwise(words, corpus):
+    '''
+    Returns the number of pairs of words at an edit distance of 1, comparing every pair.
+    :param words: list of words as strings.
+    :param corpus: dictionary mapping words as strings to encoded words.
+    '''
+    num_edges = 0
+    for idx1 in range(len(words)):
+        for idx2 in range(idx1 + 1, len(words)):
+            if levenshtein(corpus[words[idx1]], corpus[words[idx2]]) == 1:
+                num_edges += 1
+    return num_edges
+
+class CcoeffTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, symbol_table = make_corpus(3, 400)
+        self.words = make_input_words(4, self.corpus, symbol_table)
+
+    def check_ccoeffs(self, neighbour_calc):
+        for word in self.words:
+            neighbours = neighbour_calc.find_neighbours(word, self.corpus, False)
+            expected = get_ccoeff(count_edges_pairwise(neighbours, self.corpus), len(neighbours))
+            num_edges = neighbour_calc.count_edges(neighbours, self.corpus)
+            self.assertEqual(get_ccoeff(num_edges, len(neighbours)), expected)
+
+    def test_neighbour_graph(self):
+        neighbour_calc = Neighbours(dict.fromkeys(self.corpus, 1.0))
+        neighbour_calc.build_neighbour_graph(self.corpus)
+        self.check_ccoeffs(neighbour_calc)
+
+    def test_without_neighbour_graph(self):
+        self.check_ccoeffs(Neighbours(dict.fromkeys(self.corpus, 1.0)))
+
+    def test_small_neighbourhoods(self):
+        self.assertEqual(get_ccoeff(0, 0), "NULL")
+        self.assertEqual(get_ccoeff(0, 1), "NULL")
+        self.assertEqual(get_ccoeff(1, 2), 1)
+        self.assertEqual(get_ccoeff(1, 3), 1 / 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import cli
+from ExecCalculator import ExecCalculator
+from Lexicon import Lexicon
+from ParallelTest import make_words, write_csv, get_all_buttons, UK_IPA_KEY
+from ReadWrite import write
+from SelectedButtons import SelectedButtons
+
+'''
+Tests for runs of the command line calculator (cli.py).
+'''
+
+def run_cli(*args):
+    '''
+    Returns the exit status of cli.py for args, and its error output.
+    '''
+    stderr = io.StringIO()
+    with contextlib.redirect_stderr(stderr):
+        status = cli.main(list(args) + ["--language", "uk", "--no-cache", "-q"])
+    return status, stderr.getvalue()
+
+def run_calculator(corpus, input_words, selected_buttons):
+    '''
+    Returns the output rows of a run of the calculator of the user interface, with its header.
+    '''
+    orth_words = [word[0] for word in input_words]
+    phon_words = [word[1] for word in input_words]
+    calculator = ExecCalculator(corpus, selected_buttons, orth_words, phon_words, list(zip(orth_words, phon_words)),
+                                len(input_words), 1)
+    calculator.init()
+    calculator.run()
+    return calculator.output
+
+def read_bytes(filename):
+    with open(filename, "rb") as file:
+        return file.read()
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, self.input_words = make_words(1, 500, 300)
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus_file = write_csv(self.directory.name, "corpus.csv", self.corpus)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def get_expected_output(self, selected_buttons):
+        '''
+        Returns the bytes of the output file written by the calculator of the user interface for the input words.
+        '''
+        expected_file = os.path.join(self.directory.name, "expected.csv")
+        write(run_calculator(self.corpus, self.input_words, selected_buttons), expected_file)
+        return read_bytes(expected_file)
+
+    def test_all_metrics(self):
+        input_file = write_csv(self.directory.name, "input.csv", self.input_words)
+        output_file = os.path.join(self.directory.name, "output.csv")
+        status, errors = run_cli(input_file, self.corpus_file, "-o", output_file, "--all", "-p", "1")
+        self.assertEqual((status, errors), (0, ""))
+        self.assertEqual(read_bytes(output_file), self.get_expected_output(get_all_buttons()))
+
+    def test_selected_metrics(self):
+        buttons = SelectedButtons()
+        buttons.set_transcription_system(UK_IPA_KEY)
+        for name in ["orth_n_dens", "PLD20", "phon_n_freq", "phon_n_freq_sub", "pg_n_dens", "stress_typ"]:
+            setattr(buttons, name, True)
+        input_file = write_csv(self.directory.name, "input.csv", self.input_words)
+        output_file = os.path.join(self.directory.name, "output.csv")
+        status, errors = run_cli(input_file, self.corpus_file, "-o", output_file, "-p", "1",
+                                 "-m", "orth_n_dens", "PLD20", "phon_n_freq_sub", "pg_n_dens", "stress_typ")
+        self.assertEqual((status, errors), (0, ""))
+        self.assertEqual(read_bytes(output_file), self.get_expected_output(buttons))
+
+    def test_progress(self):
+        input_file = write_csv(self.directory.name, "input.csv", self.input_words)
+        output_file = os.path.join(self.directory.name, "output.csv")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = cli.main([input_file, self.corpus_file, "-o", output_file, "-m", "OLD20", "-p", "1",
+                               "--language", "uk", "--no-cache"])
+        self.assertEqual(status, 0)
+        self.assertIn("Processed %d of %d words\n" % (len(self.input_words), len(self.input_words)),
+                      stderr.getvalue())
+
+    def write_manifest(self, jobs):
+        '''
+        Writes the input files of jobs, which are (input words, metrics) pairs, and a manifest of them, and returns
+        the manifest file and the output files of the jobs.
+        '''
+        rows = []
+        for idx in range(len(jobs)):
+            write_csv(self.directory.name, "input_%d.csv" % idx, jobs[idx][0])
+            rows.append(["input_%d.csv" % idx, "output_%d.csv" % idx, jobs[idx][1]])
+        manifest_file = write_csv(self.directory.name, "manifest.csv", rows)
+        return manifest_file, [os.path.join(self.directory.name, row[1]) for row in rows]
+
+    def run_single_job(self, input_words, metrics):
+        input_file = write_csv(self.directory.name, "single_input.csv", input_words)
+        output_file = os.path.join(self.directory.name, "single_output.csv")
+        options = ["--all"] if metrics == "all" else ["-m"] + metrics.split()
+        status, errors = run_cli(input_file, self.corpus_file, "-o", output_file, "-p", "1", *options)
+        self.assertEqual((status, errors), (0, ""))
+        return read_bytes(output_file)
+
+    def test_manifest(self):
+        jobs = [(self.input_words[:150], "all"), (self.input_words[150:], "orth_n_dens PLD20 stress_typ"),
+                (self.input_words[100:200], "phon_n_dens_sub pg_n_freq")]
+        manifest_file, output_files = self.write_manifest(jobs)
+        # the corpus is indexed once for all the jobs
+        with mock.patch.object(Lexicon, "__init__", autospec=True, side_effect=Lexicon.__init__) as init:
+            status, errors = run_cli(self.corpus_file, "-b", manifest_file, "-p", "1")
+        self.assertEqual((status, errors), (0, ""))
+        self.assertEqual(init.call_count, 1)
+        for idx in range(len(jobs)):
+            self.assertEqual(read_bytes(output_files[idx]), self.run_single_job(*jobs[idx]), jobs[idx][1])
+
+    def test_manifest_with_failed_job(self):
+        jobs = [(self.input_words[:50] + [["cat", "qqq"]], "phon_n_dens"), (self.input_words[50:100], "OLD20")]
+        manifest_file, output_files = self.write_manifest(jobs)
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = cli.main([self.corpus_file, "-b", manifest_file, "-p", "1", "--language", "uk", "--no-cache"])
+        # the failed job is reported and the job after it is still run, with the times of each job
+        self.assertEqual(status, 1)
+        self.assertIn("Job 1 of 2 (%s) failed: Unable to tokenise the string 'qqq'." %
+                      os.path.join(self.directory.name, "input_0.csv"), stderr.getvalue())
+        self.assertRegex(stderr.getvalue(), r"Job 2 of 2 \(.*input_1\.csv\): 50 words .* in [0-9.]+ s")
+        self.assertFalse(os.path.exists(output_files[0]))
+        self.assertEqual(read_bytes(output_files[1]), self.run_single_job(*jobs[1]))
+
+    def test_manifest_errors(self):
+        manifest_file = write_csv(self.directory.name, "manifest.csv", [["input.csv", "output.csv"]])
+        status, errors = run_cli(self.corpus_file, "-b", manifest_file)
+        self.assertEqual(status, 1)
+        self.assertIn("Each row of the manifest file must have an input file", errors)
+        manifest_file = write_csv(self.directory.name, "manifest.csv", [["missing.csv", "output.csv", "OLD20"]])
+        status, errors = run_cli(self.corpus_file, "-b", manifest_file)
+        self.assertEqual(status, 1)
+        self.assertIn("cannot be found", errors)
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, "output.csv")))
+
+    def test_no_user_interface_imports(self):
+        code = "import sys, cli; print(sorted(name for name in sys.modules if name.startswith('PyQt5')))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(cli.__file__)),
+                                stdout=subprocess.PIPE, check=True, universal_newlines=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_failed_run_leaves_no_output(self):
+        # the word which cannot be tokenised is after the first chunks, which are written before it is reached
+        input_words = self.input_words[:250] + [["cat", "qqq"]] + self.input_words[250:]
+        input_file = write_csv(self.directory.name, "input.csv", input_words)
+        output_file = os.path.join(self.directory.name, "output.csv")
+        status, errors = run_cli(input_file, self.corpus_file, "-o", output_file, "-m", "phon_n_dens", "-p", "1")
+        self.assertEqual(status, 1)
+        self.assertIn("Unable to tokenise the string 'qqq'.", errors)
+        self.assertFalse(os.path.exists(output_file))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import mmap
+import hashlib
+from Phonemes import Phonemes
+from SharedCorpus import PackedCorpus, pack_corpus
+
+'''
+Compiled corpus files, which hold a cleaned corpus and its tokenised phonological words so that later runs on the
+same corpus skip reading the CSV file and tokenising it. They are written to a cache directory next to the corpus
+file and are named after a hash of the contents of the corpus file followed by a hash of the options it was compiled
+with, so that the files of one corpus compiled with different options are kept side by side.
+'''
+
+CACHE_DIR_NAME = "__lexical_cache__"
+CACHE_EXTENSION = ".lexcorp"
+# Changed whenever the format of the compiled corpus or its preprocessing changes
+CACHE_VERSION = b"1"
+
+def hash_file(filename, digest):
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+# Number of hexadecimal digits of each of the two hashes naming a compiled corpus file
+HASH_LENGTH = 16
+
+class CorpusCache:
+    '''
+    Compiled corpus file of one corpus CSV file. It is keyed by the contents of the CSV file, whether it has a
+    phonological column, the transcription key and, for the custom key, the contents of the phonetic system file.
+    Only the files compiled from other contents of the CSV file are stale.
+    '''
+    def __init__(self, corpus_file, has_phon_column, key, phonetic_system_file=None):
+        '''
+        :param corpus_file: corpus filename with csv extension.
+        :param phonetic_system_file: phonetic system filename with csv extension, used for the custom key only.
+        '''
+        digest = hashlib.sha256(CACHE_VERSION)
+        hash_file(corpus_file, digest)
+        self.contents_hash = digest.hexdigest()[:HASH_LENGTH]
+        digest = hashlib.sha256(repr((has_phon_column, key)).encode("utf-8"))
+        if key == Phonemes.CUSTOM_KEY and phonetic_system_file:
+            hash_file(phonetic_system_file, digest)
+        options_hash = digest.hexdigest()[:HASH_LENGTH]
+        # also identifies the results computed against this corpus, see ResultCache
+        self.fingerprint = self.contents_hash + options_hash
+        directory, name = os.path.split(os.path.abspath(corpus_file))
+        self.directory = os.path.join(directory, CACHE_DIR_NAME)
+        self.prefix = os.path.splitext(name)[0] + "."
+        self.filename = os.path.join(self.directory, self.prefix + self.contents_hash + "-" + options_hash +
+                                     CACHE_EXTENSION)
+
+    def load(self):
+        '''
+        Returns the compiled corpus as a PackedCorpus backed by a memory map of the file, or None if there is no
+        usable compiled corpus.
+        '''
+        try:
+            with open(self.filename, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return PackedCorpus(buffer)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, corpus, phon_tokens_dic=None):
+        '''
+        Writes the compiled corpus. Failing to write it, e.g. to a read-only directory, is not an error.
+        :param corpus: list of [orthographic word, phonological word, frequency] rows.
+        :param phon_tokens_dic: dictionary mapping phonological words to tokenised words, if they are known.
+        '''
+        data = pack_corpus(corpus, phon_tokens_dic)
+        temp_filename = self.filename + ".tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_filename, "wb") as f:
+                f.write(data)
+            os.replace(temp_filename, self.filename)
+        except OSError:
+            return
+        self.remove_stale_files()
+
+    def remove_stale_files(self):
+        '''
+        Removes compiled corpora of earlier versions of the same corpus file, whatever the options they were
+        compiled with. Those compiled from the current contents with other options are kept.
+        '''
+        try:
+            for name in os.listdir(self.directory):
+                if len(name) == len(os.path.basename(self.filename)) and name.startswith(self.prefix) \
+                        and name.endswith(CACHE_EXTENSION) \
+                        and name[len(self.prefix):len(self.prefix) + HASH_LENGTH] != self.contents_hash:
+                    os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
@@ -0,0 +1,89 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import tempfile
+import unittest
+from CorpusCache import CorpusCache
+
+'''
+Tests for the compiled corpus files of CorpusCache.
+'''
+
+CORPUS = [["cat", "kat", 10.0], ["bat", "bat", 2.0], ["cast", "kast", 0.5]]
+US_IPA_KEY = 0
+UK_IPA_KEY = 1
+
+class CorpusCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus_file = os.path.join(self.directory.name, "corpus.csv")
+        self.write_corpus_file("cat,kat,10\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_corpus_file(self, contents):
+        with open(self.corpus_file, "w", encoding="utf-8") as file:
+            file.write(contents)
+
+    def get_cache_files(self, cache):
+        return sorted(os.listdir(cache.directory))
+
+    def test_save_and_load(self):
+        cache = CorpusCache(self.corpus_file, True, US_IPA_KEY)
+        self.assertIsNone(cache.load())
+        cache.save(CORPUS, {"kat": ["k", "a", "t"]})
+        corpus = CorpusCache(self.corpus_file, True, US_IPA_KEY).load()
+        self.assertEqual(list(corpus), CORPUS)
+        self.assertEqual(corpus.get_phon_tokens_dic(), {"kat": ["k", "a", "t"]})
+
+    def test_other_options_are_kept(self):
+        us_cache = CorpusCache(self.corpus_file, True, US_IPA_KEY)
+        us_cache.save(CORPUS)
+        uk_cache = CorpusCache(self.corpus_file, True, UK_IPA_KEY)
+        uk_cache.save(CORPUS)
+        orth_cache = CorpusCache(self.corpus_file, False, US_IPA_KEY)
+        orth_cache.save(CORPUS)
+        self.assertEqual(len({us_cache.filename, uk_cache.filename, orth_cache.filename}), 3)
+        self.assertEqual(len(self.get_cache_files(us_cache)), 3)
+        us_cache.save(CORPUS)
+        self.assertIsNotNone(uk_cache.load())
+        self.assertIsNotNone(orth_cache.load())
+
+    def test_other_contents_are_removed(self):
+        old_us_cache = CorpusCache(self.corpus_file, True, US_IPA_KEY)
+        old_us_cache.save(CORPUS)
+        old_uk_cache = CorpusCache(self.corpus_file, True, UK_IPA_KEY)
+        old_uk_cache.save(CORPUS)
+        other_file = os.path.join(self.directory.name, "corpus.b.csv")
+        with open(other_file, "w", encoding="utf-8") as file:
+            file.write("bat,bat,2\n")
+        other_cache = CorpusCache(other_file, True, US_IPA_KEY)
+        other_cache.save(CORPUS)
+
+        self.write_corpus_file("cat,kat,10\nbat,bat,2\n")
+        cache = CorpusCache(self.corpus_file, True, US_IPA_KEY)
+        self.assertNotEqual(cache.filename, old_us_cache.filename)
+        self.assertIsNone(cache.load())
+        cache.save(CORPUS)
+        self.assertEqual(self.get_cache_files(cache),
+                         sorted([os.path.basename(cache.filename), os.path.basename(other_cache.filename)]))
+
+if __name__ == '__main__':
+    unittest.main()
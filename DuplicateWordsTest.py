@@ -0,0 +1,94 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import random
+import unittest
+from unittest import mock
+from MetricsEngine import DuplicateWords, InputWord
+
+'''
+Tests that DuplicateWords gives every input word the entry of its pair, in input order.
+'''
+
+class Entry:
+    '''
+    Stands for the WordEntry computed for a word.
+    '''
+    def __init__(self, word):
+        self.row = [word.orth, word.phon]
+
+    def print(self):
+        return self.row
+
+def make_words(seed, num_words, num_pairs):
+    rnd = random.Random(seed)
+    pairs = [("w%d" % idx, "p%d" % (idx % 7) if idx % 3 else None) for idx in range(num_pairs)]
+    return [InputWord(*rnd.choice(pairs)) for _ in range(num_words)]
+
+def iter_chunks(words, chunk_size):
+    for start in range(0, len(words), chunk_size):
+        yield words[start:start + chunk_size]
+
+class DuplicateWordsTest(unittest.TestCase):
+    def run_chunks(self, duplicates, words, chunk_size):
+        '''
+        Splits words into chunks and fans out an entry computed for each word to be computed, as the engine does,
+        and returns the rows of the entries given to the words and the number of words computed.
+        '''
+        rows = []
+        num_computed = 0
+        for chunk in iter_chunks(words, chunk_size):
+            chunk_words, positions = duplicates.split_chunk(chunk)
+            num_computed += len(chunk_words)
+            rows += [entry.print() for entry in duplicates.fan_out(positions, [Entry(word) for word in chunk_words])]
+        return rows, num_computed
+
+    def check_words(self, words, is_streamed, chunk_size):
+        duplicates = DuplicateWords(iter(words) if is_streamed else words)
+        rows, num_computed = self.run_chunks(duplicates, words, chunk_size)
+        self.assertEqual(rows, [[word.orth, word.phon] for word in words])
+        self.assertEqual(duplicates.num_duplicates, len(words) - num_computed)
+        return num_computed
+
+    def test_list(self):
+        words = make_words(1, 500, 60)
+        for chunk_size in (1, 7, 100, 500):
+            num_computed = self.check_words(words, False, chunk_size)
+            self.assertEqual(num_computed, len({(word.orth, word.phon) for word in words}))
+
+    def test_stream(self):
+        words = make_words(2, 500, 60)
+        for chunk_size in (1, 7, 100, 500):
+            num_computed = self.check_words(words, True, chunk_size)
+            self.assertEqual(num_computed, len({(word.orth, word.phon) for word in words}))
+
+    def test_stream_with_pairs_dropped(self):
+        words = make_words(3, 500, 60)
+        with mock.patch("MetricsEngine.MAX_DUPLICATE_PAIRS", 5):
+            for chunk_size in (1, 7, 100):
+                num_computed = self.check_words(words, True, chunk_size)
+                self.assertGreater(num_computed, len({(word.orth, word.phon) for word in words}))
+
+    def test_list_entries_released(self):
+        words = make_words(4, 200, 20)
+        duplicates = DuplicateWords(words)
+        self.run_chunks(duplicates, words, 10)
+        self.assertEqual(duplicates.positions, {})
+
+if __name__ == '__main__':
+    unittest.main()
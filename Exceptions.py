@@ -30,8 +30,11 @@ class CorpusFreqNotFloatException(Exception):
 
 class TokeniseException(Exception):
     def __init__(self, word):
-        super().__init__()
+        super().__init__(word)
         self.word = word
 
 class NoStressException(Exception):
     pass
+
+class OutputWriteException(Exception):
+    pass
@@ -16,10 +16,9 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
-from Output import Output
-from PhonMetrics import PhonMetrics
-from OrthMetrics import OrthMetrics
-from PGMetrics import PGMetrics
+from ResultStore import ResultStore
+from MetricsEngine import MetricsEngine, iter_input_stream
+from Exceptions import TokeniseException, EmptyCellException, OutputWriteException
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QRunnable
 
 class WorkerSignals(QObject):
@@ -27,16 +26,16 @@ class WorkerSignals(QObject):
     total_num_words = pyqtSignal(int)
     completed_signal = pyqtSignal()
 
-class InputWord:
-    def __init__(self, orth, phon):
-        self.orth = orth
-        self.phon = phon
-
 class ExecCalculator(QRunnable):
     '''
     QRunnable class which executes a single run of processing.
+    If num_processes is more than 1, the input words are split into chunks which are processed by a pool of
+    worker processes, each holding a copy of the prepared metric classes (see MetricsEngine.iter_word_entries).
+    Input words are either given as lists, or streamed in chunks with set_input_stream so that the input file is
+    never held in memory as a whole. Likewise the output rows are either kept in a ResultStore until self.output is
+    made at the end of the run, or written as they are produced to the writer given to set_output_writer.
     '''
-    def __init__(self, corpus, selected_buttons, orth_words, phon_words, pg_words, num_words):
+    def __init__(self, corpus, selected_buttons, orth_words, phon_words, pg_words, num_words, num_processes=1):
         super().__init__()
         self.init_is_success = False
         self.corpus = corpus
@@ -45,89 +44,152 @@ class ExecCalculator(QRunnable):
         self.phon_words = phon_words
         self.pg_words = pg_words
         self.num_words = num_words
+        self.num_processes = num_processes
         self.exec_is_success = False
         self.error_msg = ""
         self.isAbort = False
         self.key = self.calculator.get_transcription_system()
         self.signals = WorkerSignals()
+        self.engine = MetricsEngine(corpus, selected_buttons, orth_words, phon_words, pg_words, num_words)
+        self.input_words = []
+        self.input_stream = None
+        self.output_writer = None
+        self.output = []
+        self.num_duplicates = 0
+        self.num_cached = 0
+
+    def set_input_stream(self, input_stream, has_orth_words, has_phon_words, has_pg_words):
+        '''
+        Makes the run read its input words from input_stream instead of the word lists. Must be called before init.
+        :param input_stream: iterable of chunks of (orthographic word, phonological word) pairs, either of which may
+        be None, e.g. from FileReader.read_input_words. num_words must be the total number of pairs.
+        '''
+        self.input_stream = input_stream
+        self.has_words = (has_orth_words, has_phon_words, has_pg_words)
+
+    def set_output_writer(self, output_writer):
+        '''
+        Makes the run write the header and output rows to output_writer as they are produced instead of keeping
+        them in self.output. The writer is flushed after each chunk and is not closed by the run.
+        :param output_writer: ReadWrite.CsvWriter of the output file.
+        '''
+        self.output_writer = output_writer
+
+    def set_result_cache(self, result_cache):
+        '''
+        Makes the run take the results of words computed by earlier runs from result_cache, computing only the words
+        missing from it, and store the results it computes there. The cache is not closed by the run.
+        :param result_cache: ResultCache of the corpus, or None.
+        '''
+        self.engine.result_cache = result_cache
+
+    def set_start_method(self, start_method):
+        '''
+        Sets how the worker processes of a parallel run are started.
+        :param start_method: 'fork', 'spawn' or 'forkserver' (see multiprocessing.get_context), or None for the
+        default of the platform.
+        '''
+        self.engine.start_method = start_method
 
     def init(self):
         '''
         Initialise the words and classes OrthMetrics, PhonMetrics and PGMetrics depending
         on the metrics selected.
         '''
-        output = Output(self.num_words)
-        self.input_words = self.make_input_words()
-        self.phon_metrics = None
-        self.orth_metrics = None
-        self.pg_metrics = None
+        if self.input_stream is None:
+            self.engine.init()
+            self.input_words = self.engine.input_words
+        else:
+            self.engine.init_stream(*self.has_words)
 
-        if self.orth_words and self.calculator.is_any_orth_metric_checked():
-            self.orth_metrics = OrthMetrics(self.orth_words, self.corpus, output)
-        if self.phon_words and (self.calculator.is_any_phon_metric_checked()
-                                or self.calculator.is_any_stress_metric_checked()):
-            self.phon_metrics = PhonMetrics(self.key, self.phon_words, self.corpus, output)
-        if self.pg_words and self.calculator.is_any_pg_metric_checked():
-            self.pg_metrics = PGMetrics(self.key, self.pg_words, self.corpus, output)
+    def iter_input_words(self):
+        '''
+        Yields the InputWord of each input word in order.
+        '''
+        if self.input_stream is None:
+            return iter(self.input_words)
+        return iter_input_stream(self.input_stream)
 
     @pyqtSlot()
     def run(self):
         '''
         Each word in input is processed one at a time, after which a signal is sent to the progress bar.
+        If num_processes is more than 1, chunks of words are processed by a pool of worker processes instead and
+        progress is reported after each chunk.
         When all words have been processed, the header for the final output is generated and the
         final output is printed. A successful complete signal is sent.
+        If there is an output writer, the header is written first and the rows as each word or chunk is processed.
         '''
-        output = Output(0)
-        count = 0
-        num_words = len(self.input_words)
+        results = ResultStore()
+        num_words = self.get_number_of_words()
         if num_words == 0:
             self.signals.completed_signal.emit()
         self.signals.total_num_words.emit(num_words)
 
-        for word in self.input_words:
-            if self.isAbort:
-                self.throw_error("Process was aborted.")
-                return
-            word_output = Output(1)
-            self.generate_word_entry(word, word_output)
-            output.add_word_entry(word_output.word_entries[0])
-            self.signals.num_words_processed.emit(count)
-            count += 1
-
-        output.header = self.generate_header()
-        self.output = output.print()
+        word_entries = self.engine.iter_word_entries(self.iter_input_words(), num_words, self.num_processes)
+        try:
+            if self.output_writer:
+                self.write_rows([self.generate_header()])
+            is_complete = self.process_words(results, word_entries)
+        except TokeniseException as e:
+            self.throw_error("Unable to tokenise the string '" + e.word + "'.")
+            return
+        except OutputWriteException:
+            self.throw_error("Unable to write to the output file.")
+            return
+        except (OSError, EmptyCellException):
+            # the input file was checked before the run, so it has been changed or removed since
+            self.throw_error("Unable to read input file. Please check that it has not been changed.")
+            return
+        finally:
+            word_entries.close()
+            self.num_duplicates = self.engine.num_duplicates
+            self.num_cached = self.engine.num_cached
+        if not is_complete:
+            self.throw_error("Process was aborted.")
+            return
+
+        if not self.output_writer:
+            self.output = [self.generate_header()] + results.get_rows()
 
         self.exec_is_success = True
         self.signals.completed_signal.emit()
 
-    def make_input_words(self):
-        input_words = []
-        if not self.orth_words:
-            for word in self.phon_words:
-                input_words.append(InputWord(None, word))
-        elif not self.phon_words:
-            for word in self.orth_words:
-                input_words.append(InputWord(word, None))
-        elif self.pg_words:
-            for word in self.pg_words:
-                input_words.append(InputWord(word[0], word[1]))
-        return input_words
+    def process_words(self, results, word_entries):
+        '''
+        Adds the word entries to results as they are generated. Returns False if the process was aborted.
+        '''
+        count = 0
+        for chunk_entries in word_entries:
+            self.add_word_entries(results, chunk_entries)
+            count += len(chunk_entries)
+            self.signals.num_words_processed.emit(count - 1)
+            if self.isAbort:
+                return False
+        return True
+
+    def add_word_entries(self, results, word_entries):
+        '''
+        Writes the rows of word_entries to the output writer if there is one, else adds them to results.
+        '''
+        if self.output_writer:
+            self.write_rows([word_entry.print() for word_entry in word_entries])
+        else:
+            results.add_word_entries(word_entries)
 
-    def generate_word_entry(self, word, output):
-        output.init_word_at_index(0, word.orth, list(word.orth), isOrth=True, print_init=True)
-        if self.orth_metrics and self.calculator.is_any_orth_metric_checked():
-            self.orth_metrics.set_word(word.orth, output)
-            output = self.generate_orth_metrics(self.orth_metrics)
-        if self.phon_metrics and self.calculator.is_any_phon_metric_checked():
-            self.phon_metrics.set_word(word.phon, output)
-            output = self.generate_phon_metrics(self.phon_metrics)
-        if self.pg_metrics and self.calculator.is_any_pg_metric_checked():
-            self.pg_metrics.set_word(word, output)
-            output = self.generate_pg_metrics(self.pg_metrics)
-        if self.phon_metrics and self.calculator.is_any_stress_metric_checked():
-            self.phon_metrics.set_word(word.phon, output)
-            output = self.generate_stress_metrics(self.phon_metrics)
-        return output
+    def write_rows(self, rows):
+        '''
+        Writes rows to the output writer and flushes it, raising OutputWriteException if the output file
+        cannot be written.
+        '''
+        try:
+            self.output_writer.write_rows(rows)
+            self.output_writer.flush()
+        except OSError:
+            raise OutputWriteException()
+
+    def make_input_words(self):
+        return self.engine.make_input_words()
 
     @pyqtSlot()
     def abort(self):
@@ -139,163 +201,10 @@ class ExecCalculator(QRunnable):
         self.exec_is_success = False
         self.signals.completed_signal.emit()
 
-    def generate_phon_metrics(self, phon_metrics):
-        if self.calculator.n_phon:
-            phon_metrics.n_phon()
-        if self.calculator.num_syl:
-            phon_metrics.num_syllables()
-
-        if self.calculator.phon_n_dens:
-            sub_only = self.calculator.phon_n_dens_sub
-            phon_metrics.find_neighbours(sub_only)
-            phon_metrics.n_density(sub_only)
-        if self.calculator.phon_n_freq:
-            sub_only = self.calculator.phon_n_freq_sub
-            phon_metrics.find_neighbours(sub_only)
-            phon_metrics.n_freq(sub_only)
-
-        if self.calculator.PLD20:
-            phon_metrics.PLD20()
-        if self.calculator.phon_spread:
-            phon_metrics.phon_spread()
-        if self.calculator.phon_uniq_pt:
-            phon_metrics.unique_point()
-        if self.calculator.phon_c_coeff:
-            phon_metrics.ccoeff()
-        if self.calculator.phon_bfreq:
-            phon_metrics.biphone_prob()
-        return phon_metrics.get_output()
-
-    def generate_orth_metrics(self, orth_metrics):
-        if self.calculator.num_letters:
-            orth_metrics.num_letters()
-        if self.calculator.orth_n_dens:
-            sub_only = self.calculator.orth_n_dens_sub
-            orth_metrics.find_neighbours(sub_only)
-            orth_metrics.n_density(sub_only)
-        if self.calculator.orth_n_freq:
-            sub_only = self.calculator.orth_n_freq_sub
-            orth_metrics.find_neighbours(sub_only)
-            orth_metrics.n_freq(sub_only)
-        if self.calculator.OLD20:
-            orth_metrics.OLD20()
-        if self.calculator.orth_spread:
-            orth_metrics.orth_spread()
-        if self.calculator.orth_uniq_pt:
-            orth_metrics.unique_point()
-        if self.calculator.orth_c_coeff:
-            orth_metrics.ccoeff()
-        if self.calculator.orth_bfreq:
-            orth_metrics.bigram_prob()
-        return orth_metrics.get_output()
-
-    def generate_pg_metrics(self, pg_metrics):
-        if self.calculator.pg_n_dens:
-            sub_only = self.calculator.pg_n_dens_sub
-            pg_metrics.find_pg_neighbours(sub_only)
-            pg_metrics.n_density(sub_only)
-        if self.calculator.pg_n_freq:
-            sub_only = self.calculator.pg_n_freq_sub
-            pg_metrics.find_pg_neighbours(sub_only)
-            pg_metrics.n_freq(sub_only)
-        if self.calculator.pg_c_coeff:
-            pg_metrics.ccoeff()
-        return pg_metrics.get_output()
-
-    def generate_stress_metrics(self, phon_metrics):
-        if self.calculator.p_stress_code:
-            phon_metrics.primary_stress_code()
-        if self.calculator.stress_typ:
-            phon_metrics.stress_typicality()
-        return phon_metrics.get_output()
-
     def generate_header(self):
-        header = []
-        orth_is_printed = True
-        phon_is_printed = False
-        header.append("Item (Orthography)") # orth_is_printed by default
-        if self.calculator.num_letters:
-            header.append("Length")
-        if self.calculator.orth_n_dens:
-            header.append("Orthographic Neighbourhood Density")
-            header.append("Identity of Orthographic Neighbours")
-        if self.calculator.orth_n_freq:
-            header.append("Orthographic Neighbourhood Frequency (M)")
-            header.append("Orthographic Neighbourhood Frequency (SD)")
-        if self.calculator.OLD20:
-            header.append("OLD-20 (M)")
-            header.append("OLD-20 (SD)")
-        if self.calculator.orth_spread:
-            header.append("Orthographic Spread")
-        if self.calculator.orth_uniq_pt:
-            header.append("Orthographic Uniqueness Point")
-        if self.calculator.orth_c_coeff:
-            header.append("Orthographic C Coefficient")
-        if self.calculator.orth_bfreq:
-            header.append("Sum Bigram Frequency")
-
-        if self.calculator.is_any_phon_metric_checked():
-            header.append("Item (Phonology)")
-            phon_is_printed = True
-        if self.calculator.n_phon:
-            header.append("No. of Phonemes")
-        if self.calculator.num_syl:
-            header.append("No. of Syllables")
-        if self.calculator.phon_n_dens:
-            header.append("Phonological Neighbourhood Density")
-            header.append("Identity of Phonological Neighbours (O)")
-            header.append("Identity of Phonological Neighbours (P)")
-        if self.calculator.phon_n_freq:
-            header.append("Phonological Neighbourhood Frequency (M)")
-            header.append("Phonological Neighbourhood Frequency (SD)")
-        if self.calculator.PLD20:
-            header.append("PLD-20 (M)")
-            header.append("PLD-20 (SD)")
-        if self.calculator.phon_spread:
-            header.append("Phonological Spread")
-        if self.calculator.phon_uniq_pt:
-            header.append("Phonological Uniqueness Point")
-        if self.calculator.phon_c_coeff:
-            header.append("Phonological C Coefficient")
-        if self.calculator.phon_bfreq:
-            header.append("Sum Biphone Frequency")
-
-        if self.calculator.is_any_pg_metric_checked():
-            if not orth_is_printed:
-                header.append("Item (Orthography)")
-            if not phon_is_printed:
-                header.append("Item (Phonology)")
-        if self.calculator.pg_n_dens:
-            header.append("Phonographic Neighbourhood Density")
-            header.append("Identity of Phonographic Neighbours (O)")
-            header.append("Identity of Phonographic Neighbours (P)")
-        if self.calculator.pg_n_freq:
-            header.append("Phonographic Neighbourhood Frequency (M)")
-            header.append("Phonographic Neighbourhood Frequency (SD)")
-        if self.calculator.pg_c_coeff:
-            header.append("Phonographic C Coefficient")
-
-        if self.calculator.is_any_stress_metric_checked():
-            if not phon_is_printed:
-                header.append("Item (Phonology)")
-        if self.calculator.p_stress_code:
-            header.append("Stress Code")
-        if self.calculator.stress_typ:
-            header.append("Stress Typicality")
-        return header
-
-    def format_result(self, result):
-        new_result = []
-        for row in result:
-            string = ""
-            for n in row:
-                if type(n) is not str:
-                    string += str(n)
-                else:
-                    string += n
-                string += ", "
-            new_result.append([string[:-2]])
-        return new_result
+        return self.engine.generate_header()
 
     def get_number_of_words(self):
-        return len(self.input_words)
+        if self.input_stream is None:
+            return len(self.input_words)
+        return self.num_words
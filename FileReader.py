@@ -16,14 +16,17 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
-from ReadWrite import read_csv
+from ReadWrite import read_csv, iter_csv
 from Exceptions import *
 
+# Number of input words in each chunk yielded by FileReader.read_input_words
+INPUT_CHUNK_SIZE = 1000
+
 class FileReader:
     '''
     Class for reading csv file input into lists.
     '''
-    def __init__(self, max_input):
+    def __init__(self, max_input=None):
         self.max_input = max_input
 
     def read_file(self, filename):
@@ -52,6 +55,72 @@ class FileReader:
             raise EmptyCellException
         return self.input_data
 
+    def get_input_file(self, input_filename):
+        '''
+        Returns the input filename with csv extension.
+        '''
+        if input_filename.text() == "" or input_filename.text() is None:
+            raise NoFileSelectedException
+        return input_filename.text() + ".csv"
+
+    def iter_input_rows(self, input_file):
+        '''
+        Yields the rows of the input file one at a time, cleaned as by clean_input. Blank lines are skipped.
+        Raises EmptyCellException when a row with an empty cell is reached.
+        :param input_file: input filename with csv extension.
+        '''
+        is_first_row = True
+        for row in iter_csv(input_file):
+            if is_first_row and row and row[0][:1] == '\ufeff':
+                row[0] = row[0][1:] # deletes '\ufeff' from beginning
+            is_first_row = False
+            if not row:
+                continue
+            self.clean_row(row)
+            yield row
+
+    def read_input_words(self, input_file, read_phon, chunk_size=INPUT_CHUNK_SIZE):
+        '''
+        Yields the input words in chunks of at most chunk_size (orthographic word, phonological word) pairs, reading the
+        input file as the chunks are used. Orthographic words are converted to lowercase. Rows with a blank word are
+        skipped.
+        :param input_file: input filename with csv extension.
+        :param read_phon: if True, read phonological words from the second column, else they are None.
+        '''
+        chunk = []
+        for row in self.iter_input_rows(input_file):
+            orth = row[0].lower()
+            phon = None
+            if read_phon:
+                if len(row) < 2:
+                    raise EmptyCellException
+                phon = row[1]
+                if phon == "":
+                    continue
+            if orth == "":
+                continue
+            chunk.append((orth, phon))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def scan_input(self, input_file, read_phon):
+        '''
+        Reads through the input file once without keeping it, checking every row.
+        Returns (number of input words, True if the first row has a second column).
+        :param read_phon: True if phonological words are to be read if there is a second column.
+        '''
+        has_phon_column = False
+        for row in self.iter_input_rows(input_file):
+            has_phon_column = len(row) >= 2
+            break
+        num_words = 0
+        for chunk in self.read_input_words(input_file, read_phon and has_phon_column):
+            num_words += len(chunk)
+        return num_words, has_phon_column
+
     def read_corpus(self, corpus_filename, has_phon_column):
         '''
         Read in csv corpus file. Expects either 2 columns (orthographic word and frequency) or
@@ -62,7 +131,13 @@ class FileReader:
         '''
         if corpus_filename.text() == "" or corpus_filename.text() is None:
             raise NoFileSelectedException
-        corpus_file = corpus_filename.text() + ".csv"
+        return self.read_corpus_file(corpus_filename.text() + ".csv", has_phon_column)
+
+    def read_corpus_file(self, corpus_file, has_phon_column):
+        '''
+        Read in csv corpus file as read_corpus does.
+        :param corpus_file: corpus filename with csv extension.
+        '''
         self.corpus = self.read_file(corpus_file)
         try:
             if has_phon_column:
@@ -85,7 +160,7 @@ class FileReader:
         if col == 1 and len(self.input_data[0]) < 2:
             return words
         for row in self.input_data:
-            if count > self.max_input:
+            if self.max_input is not None and count > self.max_input:
                 break
             word = row[col].strip()
             if word != "":
@@ -126,10 +201,16 @@ class FileReader:
         if input[0][0][0] == '\ufeff':
             input[0][0] = input[0][0][1:] # deletes '\ufeff' from beginning
         for row in input:
-            for col in range(len(row)):
-                if not row[col]:
-                    raise EmptyCellException
-                row[col] = row[col].strip()
+            self.clean_row(row)
+
+    def clean_row(self, row):
+        '''
+        Strips the cells of a row of input, raises EmptyCellException if a cell is empty.
+        '''
+        for col in range(len(row)):
+            if not row[col]:
+                raise EmptyCellException
+            row[col] = row[col].strip()
 
     def clean_corpus_orth_and_phon(self, corpus):
         '''
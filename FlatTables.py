@@ -0,0 +1,268 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import zlib
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+
+'''
+Read-only tables held in a few flat arrays, so that they can be placed in shared memory and used there by several
+processes without being copied or unpickled (see SharedCorpus.py). A table is made from the Python structures it
+stands for with make, gives its arrays by name with get_arrays, and is made again over the same arrays, e.g.
+memoryviews of shared memory, with from_arrays. Keys are found with an open-addressing hash table of the CRC-32
+of their bytes, which unlike hash() is the same in every process.
+'''
+
+# Type code of the offsets of the items of a RaggedArray
+OFFSET_TYPE = 'Q'
+# Type code of the slots of a HashTable, -1 for an empty slot
+SLOT_TYPE = 'q'
+# Type code of the word ids held by a KeyIndex
+ID_TYPE = 'L'
+
+def get_prefixed_arrays(arrays, prefix):
+    '''
+    Returns the arrays whose names start with prefix and a dot, named without them.
+    '''
+    start = len(prefix) + 1
+    return {name[start:]: arrays[name] for name in arrays if name.startswith(prefix + ".")}
+
+def add_prefixed_arrays(arrays, prefix, new_arrays):
+    '''
+    Adds new_arrays to arrays, with their names prefixed by prefix and a dot.
+    '''
+    for name in new_arrays:
+        arrays[prefix + "." + name] = new_arrays[name]
+
+class RaggedArray:
+    '''
+    Sequence of arrays of varying lengths, held as one array of all their values and the offset of each of them in it:
+    item i is values[offsets[i]:offsets[i+1]]. Items are returned as memoryviews of the values.
+    '''
+    def __init__(self, offsets, values):
+        self.offsets = memoryview(offsets)
+        self.values = memoryview(values)
+
+    @classmethod
+    def make(cls, typecode, items):
+        '''
+        :param items: list of sequences of values of the array type typecode.
+        '''
+        offsets = array(OFFSET_TYPE, [0])
+        offsets.extend(accumulate(map(len, items)))
+        values = array(typecode)
+        for item in items:
+            values.extend(item)
+        return cls(offsets, values)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["offsets"], arrays["values"])
+
+    def get_arrays(self):
+        return {"offsets": self.offsets, "values": self.values}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+class StringArray(RaggedArray):
+    '''
+    Sequence of strings held as the UTF-8 bytes of each of them, see RaggedArray.
+    '''
+    @classmethod
+    def make(cls, strings):
+        '''
+        :param strings: list of strings, or of byte strings which are held as they are.
+        '''
+        data = [string.encode("utf-8") if isinstance(string, str) else string for string in strings]
+        offsets = array(OFFSET_TYPE, [0])
+        offsets.extend(accumulate(map(len, data)))
+        return cls(offsets, b"".join(data))
+
+    def get_bytes(self, index):
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+    def __getitem__(self, index):
+        return str(self.get_bytes(index), "utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+class HashTable:
+    '''
+    Open-addressing hash table of the positions of the byte strings of a StringArray, which must all be different.
+    It has at least twice as many slots as byte strings, each slot holding a position or -1.
+    '''
+    def __init__(self, keys, slots):
+        self.keys = keys
+        self.slots = memoryview(slots)
+        self.mask = len(slots) - 1
+
+    @classmethod
+    def make(cls, keys):
+        size = 1
+        while size < 2 * len(keys):
+            size *= 2
+        slots = array(SLOT_TYPE, [-1]) * size
+        mask = size - 1
+        for position in range(len(keys)):
+            slot = zlib.crc32(keys.get_bytes(position)) & mask
+            while slots[slot] >= 0:
+                slot = (slot + 1) & mask
+            slots[slot] = position
+        return cls(keys, slots)
+
+    @classmethod
+    def from_arrays(cls, keys, arrays):
+        return cls(keys, arrays["slots"])
+
+    def get_arrays(self):
+        return {"slots": self.slots}
+
+    def find(self, key):
+        '''
+        Returns the position of the byte string key, or -1 if it is not held.
+        '''
+        slot = zlib.crc32(key) & self.mask
+        position = self.slots[slot]
+        while position >= 0:
+            if self.keys.get_bytes(position) == key:
+                return position
+            slot = (slot + 1) & self.mask
+            position = self.slots[slot]
+        return -1
+
+class KeyIndex:
+    '''
+    Read-only dictionary mapping byte strings to arrays of ids, looked up like a dictionary of lists of ids.
+    '''
+    def __init__(self, keys, hash_table, ids):
+        self.keys = keys
+        self.hash_table = hash_table
+        self.ids = ids
+
+    @classmethod
+    def make(cls, dic):
+        '''
+        :param dic: dictionary mapping byte strings to lists of ids.
+        '''
+        keys = StringArray.make(list(dic))
+        return cls(keys, HashTable.make(keys), RaggedArray.make(ID_TYPE, list(dic.values())))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        keys = StringArray.from_arrays(get_prefixed_arrays(arrays, "keys"))
+        return cls(keys, HashTable.from_arrays(keys, arrays), RaggedArray.from_arrays(get_prefixed_arrays(arrays, "ids")))
+
+    def get_arrays(self):
+        arrays = self.hash_table.get_arrays()
+        add_prefixed_arrays(arrays, "keys", self.keys.get_arrays())
+        add_prefixed_arrays(arrays, "ids", self.ids.get_arrays())
+        return arrays
+
+    def get(self, key, default=None):
+        position = self.hash_table.find(key)
+        if position < 0:
+            return default
+        return self.ids[position]
+
+    def __getitem__(self, key):
+        position = self.hash_table.find(key)
+        if position < 0:
+            raise KeyError(key)
+        return self.ids[position]
+
+    def __contains__(self, key):
+        return self.hash_table.find(key) >= 0
+
+    def __len__(self):
+        return len(self.keys)
+
+class StringMap(Mapping):
+    '''
+    Read-only dictionary mapping strings to the items of a sequence of values in the order of the strings, e.g. an
+    array of numbers, a StringArray, a RaggedArray or a range for the positions of the strings. Several maps with
+    different values may share the same strings and hash table, see with_values.
+    '''
+    def __init__(self, key_strings, hash_table, value_sequence):
+        self.key_strings = key_strings
+        self.hash_table = hash_table
+        self.value_sequence = value_sequence
+
+    @classmethod
+    def make(cls, strings, value_sequence):
+        '''
+        :param strings: list of different strings.
+        '''
+        key_strings = StringArray.make(strings)
+        return cls(key_strings, HashTable.make(key_strings), value_sequence)
+
+    @classmethod
+    def from_arrays(cls, arrays, value_sequence):
+        '''
+        Returns the map over the strings and hash table in arrays, as given by get_arrays, with value_sequence as values.
+        '''
+        key_strings = StringArray.from_arrays(arrays)
+        return cls(key_strings, HashTable.from_arrays(key_strings, arrays), value_sequence)
+
+    def get_arrays(self):
+        '''
+        Returns the arrays of the strings and of the hash table. The values are not included.
+        '''
+        arrays = self.key_strings.get_arrays()
+        arrays.update(self.hash_table.get_arrays())
+        return arrays
+
+    def with_values(self, value_sequence):
+        '''
+        Returns a map of the same strings to another sequence of values.
+        '''
+        return StringMap(self.key_strings, self.hash_table, value_sequence)
+
+    def get_position(self, key):
+        '''
+        Returns the position of the string key, or -1 if it is not held.
+        '''
+        return self.hash_table.find(key.encode("utf-8"))
+
+    def __getitem__(self, key):
+        position = self.get_position(key)
+        if position < 0:
+            raise KeyError(key)
+        return self.value_sequence[position]
+
+    def __contains__(self, key):
+        return self.get_position(key) >= 0
+
+    def __iter__(self):
+        return iter(self.key_strings)
+
+    def __len__(self):
+        return len(self.key_strings)
+
+    def items(self):
+        '''
+        Yields (string, value) pairs in the order of the strings, without looking up each string.
+        '''
+        for position in range(len(self.key_strings)):
+            yield self.key_strings[position], self.value_sequence[position]
@@ -0,0 +1,259 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from array import array
+from FlatTables import RaggedArray, StringArray, StringMap, get_prefixed_arrays, add_prefixed_arrays
+from NGrams import PositionalBigramTable
+from Neighbours import Neighbours
+from Stress import Stress
+from SymbolTable import CODE_TYPE, DecodedWords, get_symbol_table
+from Tokeniser import Tokeniser
+
+# Key of orthographic words, see Metrics.py
+ORTH_KEY = -1
+# Dictionaries of a Lexicon mapping strings to strings
+STRING_DICS = ("orth_to_phon_dic", "phon_to_orth_dic")
+
+class LexiconColumn:
+    '''
+    The structures built over one column of the corpus, the orthographic or the phonological words.
+    word_freq_dic maps words as strings to their total frequency, word_to_tokens_dic maps them to tokenised words
+    as lists, and word_to_codes_dic maps them to encoded words (see SymbolTable.py). neighbour_calc holds the
+    neighbourhood indexes over the encoded words, and bigram_table the positional bigram probabilities once
+    get_bigram_table has built them.
+    A column made by from_arrays holds the same dictionaries as StringMaps over flat arrays (see FlatTables.py).
+    '''
+    def __init__(self, corpus, column, key, tokenise):
+        '''
+        :param column: 0 for orthographic words, 1 for phonological words.
+        :param tokenise: function returning the tokenised word of a word of the column.
+        '''
+        self.word_freq_dic = self.create_word_to_freq_dic(corpus, column)
+        self.word_to_tokens_dic = self.create_word_to_tokens_dic(self.word_freq_dic, tokenise)
+        self.word_to_codes_dic = get_symbol_table(key).encode_dic(self.word_to_tokens_dic)
+        self.neighbour_calc = Neighbours(self.word_freq_dic)
+        self.bigram_table = None
+
+    @classmethod
+    def from_arrays(cls, arrays, key, bigram_table=None):
+        '''
+        Returns the column given by get_arrays, made over the arrays without copying them.
+        :param key: key of the words of the column, whose symbol table must be that of the process which made arrays.
+        '''
+        column = cls.__new__(cls)
+        words = StringMap.from_arrays(get_prefixed_arrays(arrays, "words"), None)
+        codes = RaggedArray.from_arrays(get_prefixed_arrays(arrays, "codes"))
+        column.word_freq_dic = words.with_values(arrays["freqs"])
+        column.word_to_tokens_dic = words.with_values(DecodedWords(codes, get_symbol_table(key)))
+        column.word_to_codes_dic = words.with_values(codes)
+        column.neighbour_calc = Neighbours.from_arrays(column.word_freq_dic, get_prefixed_arrays(arrays, "neighbours"),
+                                                       column.word_to_codes_dic)
+        column.bigram_table = bigram_table
+        return column
+
+    def get_arrays(self):
+        '''
+        Returns the words of the column with their frequencies and encoded words, and the indexes built so far, as
+        flat arrays by name. The position of a word in word_freq_dic is its id in the indexes.
+        '''
+        words = list(self.word_freq_dic)
+        arrays = {"freqs": array('d', [self.word_freq_dic[word] for word in words])}
+        add_prefixed_arrays(arrays, "words", StringMap.make(words, None).get_arrays())
+        codes = RaggedArray.make(CODE_TYPE, [self.word_to_codes_dic[word] for word in words])
+        add_prefixed_arrays(arrays, "codes", codes.get_arrays())
+        add_prefixed_arrays(arrays, "neighbours", self.neighbour_calc.get_arrays())
+        return arrays
+
+    def get_bigram_table(self):
+        '''
+        Returns the positional bigram probabilities of the words of the column, building them the first time.
+        '''
+        if self.bigram_table is None:
+            freq_dic = self.create_tokens_to_freq_dic(self.word_to_tokens_dic, self.word_freq_dic)
+            self.bigram_table = PositionalBigramTable(freq_dic)
+        return self.bigram_table
+
+    def create_word_to_freq_dic(self, data, column):
+        '''
+        Returns a dictionary mapping the words of column as strings to frequency, summed over rows with the same word.
+        '''
+        freq_dic = {}
+        for row in data:
+            word = row[column]
+            if word not in freq_dic:
+                freq_dic[word] = 0
+            freq_dic[word] += float(row[2])
+        return freq_dic
+
+    def create_word_to_tokens_dic(self, corpus, tokenise):
+        '''
+        Returns a dictionary mapping words as strings to tokenised words as a list.
+        '''
+        new_corpus = {}
+        for word in corpus:
+            new_corpus[word] = tokenise(word)
+        return new_corpus
+
+    def create_tokens_to_freq_dic(self, words_to_tokens_dic, freq_dic):
+        '''
+        Returns a dictionary mapping tokenised words (tuple) to frequency.
+        '''
+        dic = {}
+        for word in freq_dic:
+            tokens = words_to_tokens_dic[word]
+            dic[tuple(tokens)] = freq_dic[word]
+        return dic
+
+class Lexicon:
+    '''
+    The corpus structures of a run, shared by its OrthMetrics, PhonMetrics and PGMetrics (including the OrthMetrics
+    and PhonMetrics held by PGMetrics) so that each is built once. Each structure is built the first time one of the
+    metric classes needs it.
+    The structures built can be shared with another process, see share and from_shared.
+    '''
+    def __init__(self, corpus, key=None):
+        '''
+        :param key: key of the phonological words, see Metrics.py. Not needed for orthographic structures only.
+        '''
+        self.corpus = corpus
+        self.key = key
+        self.orth_column = None
+        self.phon_column = None
+        self.orth_to_phon_dic = None
+        self.phon_to_orth_dic = None
+        self.pg_freq_dic = None
+        self.phon_words = None
+        self.stress_typicality_dic = None
+
+    @classmethod
+    def from_shared(cls, corpus, key, arrays, tables):
+        '''
+        Returns a Lexicon holding the structures given by share, made over the arrays without copying them, for
+        another process. Structures which were not shared are built from corpus if they are needed.
+        '''
+        lexicon = cls(corpus, key)
+        lexicon.stress_typicality_dic = tables["stress_typicality_dic"]
+        for name, column_key in (("orth", ORTH_KEY), ("phon", key)):
+            column_arrays = get_prefixed_arrays(arrays, name)
+            if column_arrays:
+                setattr(lexicon, name + "_column",
+                        LexiconColumn.from_arrays(column_arrays, column_key, tables[name + "_bigram_table"]))
+        for name in STRING_DICS:
+            keys = get_prefixed_arrays(arrays, name + ".keys")
+            if keys:
+                values = StringArray.from_arrays(get_prefixed_arrays(arrays, name + ".values"))
+                setattr(lexicon, name, StringMap.from_arrays(keys, values))
+        keys = get_prefixed_arrays(arrays, "pg_freq_dic.keys")
+        if keys:
+            lexicon.pg_freq_dic = StringMap.from_arrays(keys, arrays["pg_freq_dic.values"])
+        return lexicon
+
+    def share(self):
+        '''
+        Returns the structures built so far for another process, see from_shared: a dictionary of flat arrays by name,
+        to be placed in shared memory, and a dictionary of the tables whose size does not grow with the number of
+        corpus words (the positional bigram probabilities and the stress typicality), to be pickled.
+        '''
+        arrays = {}
+        tables = {"stress_typicality_dic": self.stress_typicality_dic}
+        for name in ("orth", "phon"):
+            column = getattr(self, name + "_column")
+            if column is not None:
+                add_prefixed_arrays(arrays, name, column.get_arrays())
+                tables[name + "_bigram_table"] = column.bigram_table
+        for name in STRING_DICS:
+            dic = getattr(self, name)
+            if dic is not None:
+                words = list(dic)
+                add_prefixed_arrays(arrays, name + ".keys", StringMap.make(words, None).get_arrays())
+                add_prefixed_arrays(arrays, name + ".values", StringArray.make([dic[word] for word in words]).get_arrays())
+        if self.pg_freq_dic is not None:
+            words = list(self.pg_freq_dic)
+            add_prefixed_arrays(arrays, "pg_freq_dic.keys", StringMap.make(words, None).get_arrays())
+            arrays["pg_freq_dic.values"] = array('d', [self.pg_freq_dic[word] for word in words])
+        return arrays, tables
+
+    def get_orth_column(self):
+        if self.orth_column is None:
+            self.orth_column = LexiconColumn(self.corpus, 0, ORTH_KEY, list)
+        return self.orth_column
+
+    def get_phon_column(self):
+        if self.phon_column is None:
+            self.phon_column = LexiconColumn(self.corpus, 1, self.key, Tokeniser(self.key).tokenise)
+        return self.phon_column
+
+    def get_phon_tokens_dic(self):
+        '''
+        Returns the tokenised phonological words of the corpus if they have been prepared, otherwise None.
+        '''
+        if self.phon_column is None:
+            return None
+        return self.phon_column.word_to_tokens_dic
+
+    def get_orth_to_phon_dic(self):
+        '''
+        Returns a dictionary of orthographic word as key, phonological word as value.
+        '''
+        if self.orth_to_phon_dic is None:
+            self.orth_to_phon_dic = {}
+            for row in self.corpus:
+                self.orth_to_phon_dic[row[0]] = row[1]
+        return self.orth_to_phon_dic
+
+    def get_phon_to_orth_dic(self):
+        '''
+        Returns a dictionary mapping phonological words to orthographic words (untokenised), the orthographic words
+        of a phonological word being joined with "/".
+        '''
+        if self.phon_to_orth_dic is None:
+            dic = {}
+            for row in self.corpus:
+                if row[1] in dic:
+                    dic[row[1]] += "/" + row[0]
+                else:
+                    dic[row[1]] = row[0]
+            self.phon_to_orth_dic = dic
+        return self.phon_to_orth_dic
+
+    def get_pg_freq_dic(self):
+        '''
+        Returns a dictionary mapping orthographic words as string to frequency, as used for phonographic neighbours:
+        the frequency of the last row of a word, not the total.
+        '''
+        if self.pg_freq_dic is None:
+            self.pg_freq_dic = {}
+            for row in self.corpus:
+                self.pg_freq_dic[row[0]] = row[2]
+        return self.pg_freq_dic
+
+    def get_phon_words(self):
+        '''
+        Returns the phonological words of the corpus rows as a list, in corpus order.
+        '''
+        if self.phon_words is None:
+            self.phon_words = list(map(lambda w: w[1], self.corpus))
+        return self.phon_words
+
+    def get_stress_typicality_dic(self):
+        '''
+        Returns the stress typicality of the phonological words of the corpus, see Stress.make_stress_typicality_dic.
+        '''
+        if self.stress_typicality_dic is None:
+            self.stress_typicality_dic = Stress(self.key).make_stress_typicality_dic(self.get_phon_words())
+        return self.stress_typicality_dic
@@ -0,0 +1,112 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import unittest
+from unittest import mock
+from Lexicon import Lexicon, LexiconColumn
+from MetricsEngine import MetricsEngine
+from OrthMetrics import OrthMetrics
+from Output import Output
+from ParallelTest import make_words, get_all_buttons
+from PGMetrics import PGMetrics
+from PhonMetrics import PhonMetrics
+
+'''
+Tests that OrthMetrics, PhonMetrics and PGMetrics share one Lexicon, which gives the same values as a Lexicon of
+their own, and that a Lexicon made from the structures shared by another gives the same values.
+'''
+
+def make_engine(corpus, input_words):
+    orth_words = [word[0] for word in input_words]
+    phon_words = [word[1] for word in input_words]
+    return MetricsEngine(corpus, get_all_buttons(), orth_words, phon_words, list(zip(orth_words, phon_words)),
+                         len(input_words))
+
+def get_rows(engine, input_words):
+    return [word_entry.print() for word_entry in engine.generate_word_entries(input_words)]
+
+def get_metric_classes(engine):
+    return [engine.orth_metrics, engine.phon_metrics, engine.pg_metrics, engine.pg_metrics.orth_metric,
+            engine.pg_metrics.phon_metric]
+
+def without_lexicon(init):
+    '''
+    Returns the __init__ of a metric class which ignores the Lexicon it is given, so that it makes its own.
+    '''
+    def init_without_lexicon(self, *args, lexicon=None, **kwargs):
+        init(self, *args, **kwargs)
+    return init_without_lexicon
+
+class LexiconTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, self.input_words = make_words(3, 1000, 120)
+
+    def test_one_lexicon(self):
+        engine = make_engine(self.corpus, self.input_words)
+        with mock.patch.object(Lexicon, "__init__", autospec=True, side_effect=Lexicon.__init__) as lexicon_init, \
+                mock.patch.object(LexiconColumn, "__init__", autospec=True,
+                                  side_effect=LexiconColumn.__init__) as column_init:
+            engine.init()
+        self.assertEqual(lexicon_init.call_count, 1)
+        self.assertEqual(column_init.call_count, 2)
+        for metric_class in get_metric_classes(engine):
+            self.assertIs(metric_class.lexicon, engine.lexicon)
+        self.assertIs(engine.pg_metrics.orth_metric.word_to_token_dic, engine.orth_metrics.word_to_token_dic)
+        self.assertIs(engine.pg_metrics.phon_metric.word_to_tokens_dic, engine.phon_metrics.word_to_tokens_dic)
+        self.assertIs(engine.pg_metrics.orth_to_phon_dic, engine.orth_metrics.orth_to_phon_dic)
+
+    def test_separate_lexicons(self):
+        engine = make_engine(self.corpus, self.input_words)
+        engine.init()
+        expected = get_rows(engine, engine.input_words)
+        separate_engine = make_engine(self.corpus, self.input_words)
+        with mock.patch.object(OrthMetrics, "__init__", without_lexicon(OrthMetrics.__init__)), \
+                mock.patch.object(PhonMetrics, "__init__", without_lexicon(PhonMetrics.__init__)), \
+                mock.patch.object(PGMetrics, "__init__", without_lexicon(PGMetrics.__init__)):
+            separate_engine.init()
+        lexicons = [metric_class.lexicon for metric_class in get_metric_classes(separate_engine)]
+        self.assertEqual(len(set(map(id, lexicons))), len(lexicons))
+        self.assertEqual(get_rows(separate_engine, separate_engine.input_words), expected)
+
+    def test_shared_lexicon(self):
+        engine = make_engine(self.corpus, self.input_words)
+        engine.init()
+        expected = get_rows(engine, engine.input_words)
+        arrays, tables = engine.lexicon.share()
+        lexicon = Lexicon.from_shared(self.corpus, engine.key, {name: memoryview(arrays[name]) for name in arrays},
+                                      tables)
+        for name in ("orth", "phon"):
+            column = getattr(lexicon, name + "_column")
+            expected_column = getattr(engine.lexicon, name + "_column")
+            for dic in ("word_freq_dic", "word_to_tokens_dic"):
+                self.assertEqual(dict(getattr(column, dic)), getattr(expected_column, dic), (name, dic))
+            self.assertEqual({word: list(column.word_to_codes_dic[word]) for word in column.word_to_codes_dic},
+                             {word: list(codes) for word, codes in expected_column.word_to_codes_dic.items()})
+        self.assertEqual(dict(lexicon.orth_to_phon_dic), engine.lexicon.orth_to_phon_dic)
+        self.assertEqual(dict(lexicon.phon_to_orth_dic), engine.lexicon.phon_to_orth_dic)
+
+        # a worker process makes its metric classes over the shared Lexicon, as init_worker_from_shared_corpus does
+        shared_engine = MetricsEngine(self.corpus, get_all_buttons(), [], [], [], 0)
+        shared_engine.create_metrics(Output(0), True, True, True, lexicon=lexicon)
+        shared_engine.build_corpus_structures()
+        for metric_class in get_metric_classes(shared_engine):
+            self.assertIs(metric_class.lexicon, lexicon)
+        self.assertEqual(get_rows(shared_engine, engine.input_words), expected)
+
+if __name__ == '__main__':
+    unittest.main()
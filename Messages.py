@@ -34,9 +34,18 @@ class AbortMessage(QMessageBox):
         self.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
 
 class FinishMessage(QMessageBox):
-    def __init__(self):
+    def __init__(self, num_duplicates=0, num_cached=0):
+        '''
+        :param num_duplicates: number of input items which repeated an earlier item, whose metrics were copied.
+        :param num_cached: number of input items whose metrics were found in the results of earlier runs.
+        '''
         super().__init__()
-        self.setText("The execution is complete. The output file may now be opened.")
+        text = "The execution is complete. The output file may now be opened."
+        if num_duplicates:
+            text += "\n" + str(num_duplicates) + " repeated input items were computed once."
+        if num_cached:
+            text += "\n" + str(num_cached) + " input items were found in the results of earlier runs."
+        self.setText(text)
         self.setIcon(QMessageBox.Information)
         self.setWindowTitle("Complete")
 
@@ -0,0 +1,94 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import unittest
+from unittest import mock
+from ParallelTest import make_words, get_all_buttons
+from MetricsEngine import MetricsEngine
+from OrthMetrics import OrthMetrics
+from PhonMetrics import PhonMetrics
+from PGMetrics import PGMetrics
+
+'''
+Tests that computing each metric for a chunk of words at a time gives the same output rows, in the columns of the
+header, as computing the words one by one.
+'''
+
+def make_engine(corpus, input_words):
+    orth_words = [word[0] for word in input_words]
+    phon_words = [word[1] for word in input_words]
+    engine = MetricsEngine(corpus, get_all_buttons(), orth_words, phon_words, list(zip(orth_words, phon_words)),
+                           len(input_words))
+    engine.init()
+    return engine
+
+def get_rows(word_entries):
+    return [word_entry.print() for word_entry in word_entries]
+
+class MetricMajorTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, input_words = make_words(4, 800, 150)
+        self.engine = make_engine(self.corpus, input_words)
+        self.words = self.engine.input_words
+
+    def get_calls(self, method, metric_class):
+        return sum(call[0][0] is metric_class for call in method.call_args_list)
+
+    def test_chunk_equals_single_words(self):
+        rows = get_rows(self.engine.generate_word_entries(self.words))
+        self.assertEqual(len(rows), len(self.words))
+        self.assertEqual(rows, [self.engine.generate_word_entry(word).print() for word in self.words])
+        # the entries of a chunk do not depend on the other words of the chunk
+        self.assertEqual(get_rows(self.engine.generate_word_entries(self.words[::-1])), rows[::-1])
+
+    def test_chunk_sizes(self):
+        expected = get_rows(self.engine.generate_word_entries(self.words))
+        for chunk_size in (1, 7, len(self.words)):
+            with mock.patch("MetricsEngine.SEQUENTIAL_CHUNK_SIZE", chunk_size):
+                word_entries = self.engine.iter_word_entries(iter(self.words), len(self.words))
+                chunks = list(word_entries)
+            self.assertEqual(len(chunks), -(-len(self.words) // chunk_size))
+            self.assertEqual([row for chunk in chunks for row in get_rows(chunk)], expected, chunk_size)
+
+    def test_columns_of_header(self):
+        header = self.engine.generate_header()
+        self.assertEqual(header, [title for column in self.engine.get_columns() for title in column[3]])
+        for row in get_rows(self.engine.generate_word_entries(self.words)):
+            self.assertEqual(len(row), len(header))
+
+    def test_metric_major(self):
+        # each metric class is given the whole chunk once, and computes each metric once for it
+        with mock.patch.object(OrthMetrics, "set_words", autospec=True, side_effect=OrthMetrics.set_words) as orth, \
+                mock.patch.object(PhonMetrics, "set_words", autospec=True,
+                                  side_effect=PhonMetrics.set_words) as phon, \
+                mock.patch.object(PGMetrics, "set_words", autospec=True, side_effect=PGMetrics.set_words) as pg, \
+                mock.patch.object(OrthMetrics, "OLD20", autospec=True, side_effect=OrthMetrics.OLD20) as old20:
+            self.engine.generate_word_entries(self.words)
+        # PGMetrics gives the chunk to the OrthMetrics and PhonMetrics it holds
+        self.assertEqual(self.get_calls(orth, self.engine.orth_metrics), 1)
+        self.assertEqual(self.get_calls(orth, self.engine.pg_metrics.orth_metric), 1)
+        # once for the phonological metrics and once for the stress metrics
+        self.assertEqual(self.get_calls(phon, self.engine.phon_metrics), 2)
+        self.assertEqual(self.get_calls(phon, self.engine.pg_metrics.phon_metric), 1)
+        self.assertEqual(pg.call_count, 1)
+        for call in orth.call_args_list + phon.call_args_list + pg.call_args_list:
+            self.assertEqual(len(call[0][1]), len(self.words))
+        self.assertEqual(old20.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
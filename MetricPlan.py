@@ -0,0 +1,111 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+'''
+Works out the intermediate results needed by a selection of metrics, so that each is computed once per input word
+and shared by every metric which uses it, and which corpus structures to build before the first input word.
+'''
+
+# Intermediate results computed for every word entry of a chunk before its metrics
+# neighbours by substitution, addition and deletion
+SAD_NEIGHBOURS = "SAD neighbours"
+# neighbours by substitution only
+SUB_NEIGHBOURS = "SUB neighbours"
+# substitution neighbours at each position of the word
+POSITION_NEIGHBOURS = "position neighbours"
+# phonographic neighbours, found from the orthographic and phonological neighbours
+PG_SAD_NEIGHBOURS = "PG SAD neighbours"
+PG_SUB_NEIGHBOURS = "PG SUB neighbours"
+
+# Corpus structures, built once and shared by all the input words
+TOKEN_TRIE = "token trie"
+NGRAM_TABLE = "n-gram table"
+NEIGHBOUR_GRAPH = "neighbour graph"
+STRESS_PATTERNS = "stress patterns"
+
+# SelectedButtons attributes of the orthographic and phonological metrics, which need the same intermediate results
+ORTH_METRIC_NAMES = {"n_dens": "orth_n_dens", "n_freq": "orth_n_freq", "LD20": "OLD20", "spread": "orth_spread",
+                     "uniq_pt": "orth_uniq_pt", "c_coeff": "orth_c_coeff", "bfreq": "orth_bfreq"}
+PHON_METRIC_NAMES = {"n_dens": "phon_n_dens", "n_freq": "phon_n_freq", "LD20": "PLD20", "spread": "phon_spread",
+                     "uniq_pt": "phon_uniq_pt", "c_coeff": "phon_c_coeff", "bfreq": "phon_bfreq"}
+
+class MetricPlan:
+    '''
+    Sets of the intermediate results and corpus structures needed by the orthographic, phonological, phonographic
+    and stress metrics of a selection.
+    '''
+    def __init__(self, selected_buttons):
+        '''
+        :param selected_buttons: SelectedButtons of the metrics selected.
+        '''
+        self.orth = self.plan_lexical_metrics(selected_buttons, ORTH_METRIC_NAMES)
+        self.phon = self.plan_lexical_metrics(selected_buttons, PHON_METRIC_NAMES)
+        self.pg = self.plan_pg_metrics(selected_buttons)
+        self.stress = set()
+        if selected_buttons.stress_typ:
+            self.stress.add(STRESS_PATTERNS)
+
+    def plan_lexical_metrics(self, selected_buttons, names):
+        '''
+        Returns the set of intermediate results and corpus structures of the orthographic or phonological metrics.
+        :param names: ORTH_METRIC_NAMES or PHON_METRIC_NAMES.
+        '''
+        result = set()
+        for metric in ["n_dens", "n_freq"]:
+            if getattr(selected_buttons, names[metric]):
+                sub_only = getattr(selected_buttons, names[metric] + "_sub")
+                result.add(SUB_NEIGHBOURS if sub_only else SAD_NEIGHBOURS)
+        if getattr(selected_buttons, names["LD20"]):
+            # the nearest words are first looked for among the neighbours, then in the trie
+            result.update([SAD_NEIGHBOURS, TOKEN_TRIE])
+        if getattr(selected_buttons, names["spread"]):
+            result.add(POSITION_NEIGHBOURS)
+        if getattr(selected_buttons, names["uniq_pt"]):
+            result.add(TOKEN_TRIE)
+        if getattr(selected_buttons, names["c_coeff"]):
+            result.update([SAD_NEIGHBOURS, NEIGHBOUR_GRAPH])
+        if getattr(selected_buttons, names["bfreq"]):
+            result.add(NGRAM_TABLE)
+        if SUB_NEIGHBOURS in result:
+            # the substitution neighbours are those at each position taken together
+            result.add(POSITION_NEIGHBOURS)
+        return result
+
+    def plan_pg_metrics(self, selected_buttons):
+        '''
+        Returns the set of intermediate results and corpus structures of the phonographic metrics.
+        '''
+        result = set()
+        if selected_buttons.pg_n_dens:
+            result.add(PG_SUB_NEIGHBOURS if selected_buttons.pg_n_dens_sub else PG_SAD_NEIGHBOURS)
+        if selected_buttons.pg_n_freq:
+            result.add(PG_SUB_NEIGHBOURS if selected_buttons.pg_n_freq_sub else PG_SAD_NEIGHBOURS)
+        if selected_buttons.pg_c_coeff:
+            result.update([PG_SAD_NEIGHBOURS, NEIGHBOUR_GRAPH])
+        return result
+
+def get_lexical_intermediates(pg_intermediates):
+    '''
+    Returns the intermediate results of the orthographic and phonological words needed for phonographic ones.
+    '''
+    result = set()
+    if PG_SAD_NEIGHBOURS in pg_intermediates:
+        result.add(SAD_NEIGHBOURS)
+    if PG_SUB_NEIGHBOURS in pg_intermediates:
+        result.update([SUB_NEIGHBOURS, POSITION_NEIGHBOURS])
+    return result
@@ -0,0 +1,100 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import unittest
+from unittest import mock
+from MetricPlan import MetricPlan
+from MetricsEngine import MetricsEngine
+from Neighbours import Neighbours
+from ParallelTest import make_words, UK_IPA_KEY
+from SelectedButtons import SelectedButtons
+
+'''
+Tests that metrics which share intermediate results give the same values computed together, as planned by
+MetricPlan, as each computed on its own or without a plan, and that the shared results are computed once per word.
+'''
+
+# Metrics which use the neighbours by substitution, addition and deletion of each word
+SAD_METRICS = ["orth_n_dens", "orth_n_freq", "OLD20", "orth_c_coeff", "phon_n_dens", "phon_n_freq", "PLD20",
+               "phon_c_coeff", "pg_n_dens", "pg_c_coeff"]
+# Metrics which use the substitution neighbours at each position of each word
+POSITION_METRICS = ["orth_spread", "phon_spread"]
+# Metrics which find the intermediate results they use if they were not computed before them
+SELF_CONTAINED_METRICS = ["OLD20", "orth_c_coeff", "PLD20", "phon_c_coeff", "pg_c_coeff"] + POSITION_METRICS
+
+def get_buttons(metrics, sub_metrics=()):
+    buttons = SelectedButtons()
+    for metric in metrics:
+        setattr(buttons, metric, True)
+    for metric in sub_metrics:
+        setattr(buttons, metric, True)
+        setattr(buttons, metric + "_sub", True)
+    buttons.set_transcription_system(UK_IPA_KEY)
+    return buttons
+
+def get_values(corpus, input_words, buttons, is_planned=True):
+    '''
+    Returns a dictionary mapping each metric selected to its values for each input word, computed together.
+    :param is_planned: False to compute no intermediate results ahead of the metrics, which must then find them.
+    '''
+    orth_words = [word[0] for word in input_words]
+    phon_words = [word[1] for word in input_words]
+    engine = MetricsEngine(corpus, buttons, orth_words, phon_words, list(zip(orth_words, phon_words)),
+                           len(input_words))
+    if not is_planned:
+        engine.plan = MetricPlan(SelectedButtons())
+    engine.init()
+    rows = [word_entry.print() for word_entry in engine.generate_word_entries(engine.input_words)]
+    values = {}
+    start = 0
+    for metric, variant, kind, titles in engine.get_columns():
+        if metric is not None:
+            values[metric] = [row[start:start + len(titles)] for row in rows]
+        start += len(titles)
+    return values
+
+class MetricPlanTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, input_words = make_words(2, 1000, 80)
+        # distinct words, so that each is computed
+        self.input_words = list(dict.fromkeys(map(tuple, input_words)))
+
+    def test_metrics_computed_together(self):
+        sub_metrics = ["orth_n_freq", "phon_n_dens"]
+        values = get_values(self.corpus, self.input_words, get_buttons(SAD_METRICS + POSITION_METRICS, sub_metrics))
+        for metric in SAD_METRICS + POSITION_METRICS:
+            buttons = get_buttons([metric], [metric] if metric in sub_metrics else [])
+            self.assertEqual(get_values(self.corpus, self.input_words, buttons)[metric], values[metric], metric)
+
+    def test_metrics_computed_without_plan(self):
+        buttons = get_buttons(SELF_CONTAINED_METRICS)
+        self.assertEqual(get_values(self.corpus, self.input_words, buttons, is_planned=False),
+                         get_values(self.corpus, self.input_words, buttons))
+
+    def test_neighbours_found_once(self):
+        with mock.patch.object(Neighbours, "find_neighbours", autospec=True,
+                               side_effect=Neighbours.find_neighbours) as find_neighbours, \
+                mock.patch.object(Neighbours, "find_position_neighbour_ids", autospec=True,
+                                  side_effect=Neighbours.find_position_neighbour_ids) as find_position_neighbour_ids:
+            get_values(self.corpus, self.input_words, get_buttons(SAD_METRICS + POSITION_METRICS, ["orth_n_freq"]))
+        # once for the orthographic and once for the phonological word of each input word
+        self.assertEqual(find_neighbours.call_count, 2 * len(self.input_words))
+        self.assertEqual(find_position_neighbour_ids.call_count, 2 * len(self.input_words))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,6 +16,8 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
+from SymbolTable import get_symbol_table
+
 class Metrics:
     '''
     Parent class for OrthMetrics, PhonMetrics and PGMetrics.
@@ -35,11 +37,16 @@ class Metrics:
     11 : SAMPA German
     12 : Klattese US
     13 : Custom Phonetic System
+    Tokenised words are encoded as arrays of integer ids by the symbol table of the key for neighbourhood searches.
     '''
     def __init__(self, key, output, corpus):
         self.key = key
         self.output = output
         self.corpus = corpus
+        self.symbol_table = get_symbol_table(key)
+
+    def encode(self, tokens):
+        return self.symbol_table.encode(tokens)
 
     def get_output(self):
         return self.output
@@ -0,0 +1,675 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import copy
+import multiprocessing
+import os
+from collections import deque, Counter
+from Output import Output
+from PhonMetrics import PhonMetrics
+from OrthMetrics import OrthMetrics
+from PGMetrics import PGMetrics
+from Phonemes import Phonemes
+from SharedCorpus import PackedCorpus, SharedCorpus, attach_shared_corpus
+from Tokeniser import Tokeniser
+from Lexicon import Lexicon, ORTH_KEY
+from SymbolTable import get_symbol_table, set_symbol_tables
+from MetricPlan import MetricPlan, NEIGHBOUR_GRAPH
+from ResultStore import ResultStore, ResultRow
+
+# Number of input words from which the neighbour graphs of the corpus are built for C coefficients
+NEIGHBOUR_GRAPH_MIN_WORDS = 1000
+# Smallest number of input words for which a parallel run is worth starting worker processes
+PARALLEL_MIN_WORDS = 200
+# Largest number of worker processes used unless more are asked for; more processes start more slowly and each
+# adds less to the speed of a run
+DEFAULT_MAX_PROCESSES = 4
+# Number of chunks given to each worker process in a parallel run, more chunks give finer progress updates
+CHUNKS_PER_PROCESS = 8
+# Largest number of words in a chunk
+MAX_CHUNK_SIZE = 500
+# Number of chunks per worker process which are sent to the pool before their results are collected
+PENDING_CHUNKS_PER_PROCESS = 2
+# number of words computed together in a run without worker processes; progress is reported after each chunk
+SEQUENTIAL_CHUNK_SIZE = 100
+# Kinds of words on which the values of a column depend, see MetricsEngine.get_columns
+ORTH = "orth"
+PHON = "phon"
+PG = "pg"
+# Largest number of distinct pairs of streamed input words whose entries are kept for later duplicates
+MAX_DUPLICATE_PAIRS = 10000
+
+class InputWord:
+    def __init__(self, orth, phon):
+        self.orth = orth
+        self.phon = phon
+
+class ChunkEntries:
+    '''
+    The entries computed for the words of a chunk once they are available, and the number of pairs of
+    DuplicateWords which refer to them.
+    '''
+    def __init__(self):
+        self.entries = None
+        self.num_pairs = 0
+
+class DuplicateWords:
+    '''
+    Finds the input words which repeat the (orthographic word, phonological word) pair of an earlier word, so that each
+    pair is computed once and its entry is given at the position of every word with that pair.
+    If the input words are a list, the pairs are counted beforehand and the entry of a pair is kept until its last
+    word. For streamed input words, the entries of up to MAX_DUPLICATE_PAIRS pairs are kept, the earliest being
+    dropped first.
+    '''
+    def __init__(self, words):
+        self.remaining = None
+        if isinstance(words, list):
+            self.remaining = Counter((word.orth, word.phon) for word in words)
+        self.positions = {}  # pair to (ChunkEntries, index) of its entry
+        self.num_duplicates = 0
+
+    def split_chunk(self, chunk):
+        '''
+        Returns the words of chunk whose entries are to be computed, and the positions of the entries of all the words
+        of chunk, to be given to fan_out with the entries computed.
+        '''
+        computed = ChunkEntries()
+        words = []
+        positions = []
+        for word in chunk:
+            pair = (word.orth, word.phon)
+            is_kept = True
+            if self.remaining is not None:
+                self.remaining[pair] -= 1
+                is_kept = self.remaining[pair] > 0
+                if not is_kept:
+                    del self.remaining[pair]
+            position = self.positions.get(pair)
+            if position is None:
+                position = (computed, len(words))
+                words.append(word)
+                if is_kept:
+                    self.keep_position(pair, position)
+            else:
+                self.num_duplicates += 1
+                if not is_kept:
+                    self.release_position(pair)
+            positions.append(position)
+        return words, (computed, positions)
+
+    def keep_position(self, pair, position):
+        self.positions[pair] = position
+        position[0].num_pairs += 1
+        if self.remaining is None and len(self.positions) > MAX_DUPLICATE_PAIRS:
+            self.release_position(next(iter(self.positions)))
+
+    def release_position(self, pair):
+        position = self.positions.pop(pair)
+        position[0].num_pairs -= 1
+
+    def fan_out(self, chunk_positions, entries):
+        '''
+        Returns the entries of the words of a chunk given the entries computed for it.
+        :param chunk_positions: second value returned by split_chunk for the chunk.
+        '''
+        computed, positions = chunk_positions
+        if computed.num_pairs > 0 and entries and not isinstance(entries[0], ResultRow):
+            # entries kept for later words are held as rows rather than word entries with their neighbour lists
+            results = ResultStore()
+            results.add_word_entries(entries)
+            entries = list(results)
+        computed.entries = entries
+        return [position[0].entries[position[1]] for position in positions]
+
+class MetricsEngine:
+    '''
+    Computes the selected metrics for input words, independently of the UI.
+    The same engine is used by ExecCalculator and the command-line runner in the main process, and by each worker
+    process of a parallel run.
+    '''
+    def __init__(self, corpus, selected_buttons, orth_words, phon_words, pg_words, num_words):
+        self.corpus = corpus
+        self.calculator = selected_buttons
+        self.orth_words = orth_words
+        self.phon_words = phon_words
+        self.pg_words = pg_words
+        self.num_words = num_words
+        self.key = self.calculator.get_transcription_system()
+        self.plan = MetricPlan(self.calculator)
+        self.input_words = []
+        self.shared_corpus = None
+        self.start_method = None
+        self.lexicon = None
+        self.num_duplicates = 0
+        self.num_cached = 0
+        self.result_cache = None
+
+    def init(self):
+        '''
+        Initialise the words and classes OrthMetrics, PhonMetrics and PGMetrics depending
+        on the metrics selected.
+        '''
+        output = Output(self.num_words)
+        self.input_words = self.make_input_words()
+        if self.phon_words:
+            self.add_corpus_tokens_to_cache()
+        self.create_metrics(output, bool(self.orth_words), bool(self.phon_words), bool(self.pg_words))
+        self.build_corpus_structures()
+        if self.num_words >= NEIGHBOUR_GRAPH_MIN_WORDS:
+            self.build_neighbour_graphs()
+
+    def add_corpus_tokens_to_cache(self):
+        '''
+        Adds the tokenised phonological words held by a packed corpus to the token cache, so that the corpus is not
+        tokenised again.
+        '''
+        if isinstance(self.corpus, PackedCorpus) and self.corpus.has_phon_tokens():
+            Tokeniser(self.key).add_to_cache(self.corpus.get_phon_tokens_dic())
+
+    def init_stream(self, has_orth_words, has_phon_words, has_pg_words):
+        '''
+        Initialise the classes OrthMetrics, PhonMetrics and PGMetrics without any input words, for input words
+        which are streamed to generate_word_entry or generate_word_entries in chunks.
+        :param has_orth_words: True if the input words have an orthographic word, similarly for the others.
+        '''
+        if has_phon_words:
+            self.add_corpus_tokens_to_cache()
+        self.create_metrics(Output(0), has_orth_words, has_phon_words, has_pg_words)
+        self.build_corpus_structures()
+        if self.num_words >= NEIGHBOUR_GRAPH_MIN_WORDS:
+            self.build_neighbour_graphs()
+
+    def create_metrics(self, output, has_orth_words, has_phon_words, has_pg_words, lexicon=None):
+        '''
+        Creates the classes OrthMetrics, PhonMetrics and PGMetrics needed for the kinds of input words given
+        and the metrics selected.
+        :param lexicon: Lexicon of the corpus holding structures already built, if any.
+        '''
+        self.phon_metrics = None
+        self.orth_metrics = None
+        self.pg_metrics = None
+        self.lexicon = lexicon if lexicon else Lexicon(self.corpus, self.key)
+
+        if has_orth_words and self.calculator.is_any_orth_metric_checked():
+            self.orth_metrics = OrthMetrics(self.orth_words, self.corpus, output, lexicon=self.lexicon)
+        if has_phon_words and (self.calculator.is_any_phon_metric_checked()
+                               or self.calculator.is_any_stress_metric_checked()):
+            self.phon_metrics = PhonMetrics(self.key, self.phon_words, self.corpus, output, lexicon=self.lexicon)
+        if has_pg_words and self.calculator.is_any_pg_metric_checked():
+            self.pg_metrics = PGMetrics(self.key, self.pg_words, self.corpus, output, lexicon=self.lexicon)
+
+    def build_corpus_structures(self):
+        '''
+        Builds the corpus structures which the metrics selected use, as worked out by the MetricPlan, so that they are
+        ready before the first input word and are inherited by forked worker processes.
+        '''
+        if self.orth_metrics:
+            self.orth_metrics.build_structures(self.plan.orth)
+        if self.phon_metrics:
+            self.phon_metrics.build_structures(self.plan.phon | self.plan.stress)
+        if self.pg_metrics:
+            self.pg_metrics.build_structures(self.plan.pg)
+
+    def build_neighbour_graphs(self):
+        '''
+        Builds the neighbour graphs of the corpus for the C coefficients selected. Each graph takes one neighbour
+        lookup per corpus word, after which the C coefficient of every input word only needs lookups in the graph.
+        '''
+        if self.orth_metrics and NEIGHBOUR_GRAPH in self.plan.orth:
+            self.orth_metrics.build_neighbour_graph()
+        if self.phon_metrics and NEIGHBOUR_GRAPH in self.plan.phon:
+            self.phon_metrics.build_neighbour_graph()
+        if self.pg_metrics and NEIGHBOUR_GRAPH in self.plan.pg:
+            self.pg_metrics.build_neighbour_graph()
+
+    def make_input_words(self):
+        input_words = []
+        if not self.orth_words:
+            for word in self.phon_words:
+                input_words.append(InputWord(None, word))
+        elif not self.phon_words:
+            for word in self.orth_words:
+                input_words.append(InputWord(word, None))
+        elif self.pg_words:
+            for word in self.pg_words:
+                input_words.append(InputWord(word[0], word[1]))
+        return input_words
+
+    def generate_word_entry(self, word):
+        '''
+        Computes the selected metrics for a single InputWord and returns its WordEntry.
+        '''
+        return self.generate_word_entries([word])[0]
+
+    def generate_word_entries(self, words):
+        '''
+        Returns the WordEntry of each InputWord in words, in order.
+        The words are computed together: each selected metric is computed for all of them before the next metric,
+        into a single Output, so the columns of every entry are in the order of generate_header.
+        '''
+        output = Output(len(words))
+        orth_words = [word.orth for word in words]
+        phon_words = [word.phon for word in words]
+        for word_index in range(len(words)):
+            output.init_word_at_index(word_index, orth_words[word_index], list(orth_words[word_index]),
+                                      isOrth=True, print_init=True)
+        if self.orth_metrics and self.calculator.is_any_orth_metric_checked():
+            self.orth_metrics.set_words(orth_words, output)
+            output = self.generate_orth_metrics(self.orth_metrics)
+        if self.phon_metrics and self.calculator.is_any_phon_metric_checked():
+            self.phon_metrics.set_words(phon_words, output)
+            output = self.generate_phon_metrics(self.phon_metrics)
+        if self.pg_metrics and self.calculator.is_any_pg_metric_checked():
+            self.pg_metrics.set_words(words, output)
+            output = self.generate_pg_metrics(self.pg_metrics)
+        if self.phon_metrics and self.calculator.is_any_stress_metric_checked():
+            self.phon_metrics.set_words(phon_words, output)
+            output = self.generate_stress_metrics(self.phon_metrics)
+        return output.word_entries
+
+    def generate_phon_metrics(self, phon_metrics):
+        phon_metrics.compute_intermediates(self.plan.phon)
+        if self.calculator.n_phon:
+            phon_metrics.n_phon()
+        if self.calculator.num_syl:
+            phon_metrics.num_syllables()
+
+        if self.calculator.phon_n_dens:
+            phon_metrics.n_density(self.calculator.phon_n_dens_sub)
+        if self.calculator.phon_n_freq:
+            phon_metrics.n_freq(self.calculator.phon_n_freq_sub)
+
+        if self.calculator.PLD20:
+            phon_metrics.PLD20()
+        if self.calculator.phon_spread:
+            phon_metrics.phon_spread()
+        if self.calculator.phon_uniq_pt:
+            phon_metrics.unique_point()
+        if self.calculator.phon_c_coeff:
+            phon_metrics.ccoeff()
+        if self.calculator.phon_bfreq:
+            phon_metrics.biphone_prob()
+        return phon_metrics.get_output()
+
+    def generate_orth_metrics(self, orth_metrics):
+        orth_metrics.compute_intermediates(self.plan.orth)
+        if self.calculator.num_letters:
+            orth_metrics.num_letters()
+        if self.calculator.orth_n_dens:
+            orth_metrics.n_density(self.calculator.orth_n_dens_sub)
+        if self.calculator.orth_n_freq:
+            orth_metrics.n_freq(self.calculator.orth_n_freq_sub)
+        if self.calculator.OLD20:
+            orth_metrics.OLD20()
+        if self.calculator.orth_spread:
+            orth_metrics.orth_spread()
+        if self.calculator.orth_uniq_pt:
+            orth_metrics.unique_point()
+        if self.calculator.orth_c_coeff:
+            orth_metrics.ccoeff()
+        if self.calculator.orth_bfreq:
+            orth_metrics.bigram_prob()
+        return orth_metrics.get_output()
+
+    def generate_pg_metrics(self, pg_metrics):
+        pg_metrics.compute_intermediates(self.plan.pg)
+        if self.calculator.pg_n_dens:
+            pg_metrics.n_density(self.calculator.pg_n_dens_sub)
+        if self.calculator.pg_n_freq:
+            pg_metrics.n_freq(self.calculator.pg_n_freq_sub)
+        if self.calculator.pg_c_coeff:
+            pg_metrics.ccoeff()
+        return pg_metrics.get_output()
+
+    def generate_stress_metrics(self, phon_metrics):
+        if self.calculator.p_stress_code:
+            phon_metrics.primary_stress_code()
+        if self.calculator.stress_typ:
+            phon_metrics.stress_typicality()
+        return phon_metrics.get_output()
+
+    def get_columns(self):
+        '''
+        Returns the columns of the output in order, as (metric, variant, kind of words, titles) tuples with one tuple
+        per metric. metric is the SelectedButtons attribute of the metric, or None for an input word, variant is
+        "sub" or "sad" for the neighbourhood metrics and "" otherwise, and the kind of words is the words the values
+        depend on: ORTH, PHON or PG.
+        '''
+        columns = []
+        orth_is_printed = True
+        phon_is_printed = False
+        columns.append((None, "", ORTH, ["Item (Orthography)"])) # orth_is_printed by default
+        self.add_column(columns, "num_letters", ORTH, "Length")
+        self.add_column(columns, "orth_n_dens", ORTH, "Orthographic Neighbourhood Density",
+                        "Identity of Orthographic Neighbours")
+        self.add_column(columns, "orth_n_freq", ORTH, "Orthographic Neighbourhood Frequency (M)",
+                        "Orthographic Neighbourhood Frequency (SD)")
+        self.add_column(columns, "OLD20", ORTH, "OLD-20 (M)", "OLD-20 (SD)")
+        self.add_column(columns, "orth_spread", ORTH, "Orthographic Spread")
+        self.add_column(columns, "orth_uniq_pt", ORTH, "Orthographic Uniqueness Point")
+        self.add_column(columns, "orth_c_coeff", ORTH, "Orthographic C Coefficient")
+        self.add_column(columns, "orth_bfreq", ORTH, "Sum Bigram Frequency")
+
+        if self.calculator.is_any_phon_metric_checked():
+            columns.append((None, "", PHON, ["Item (Phonology)"]))
+            phon_is_printed = True
+        self.add_column(columns, "n_phon", PHON, "No. of Phonemes")
+        self.add_column(columns, "num_syl", PHON, "No. of Syllables")
+        self.add_column(columns, "phon_n_dens", PHON, "Phonological Neighbourhood Density",
+                        "Identity of Phonological Neighbours (O)", "Identity of Phonological Neighbours (P)")
+        self.add_column(columns, "phon_n_freq", PHON, "Phonological Neighbourhood Frequency (M)",
+                        "Phonological Neighbourhood Frequency (SD)")
+        self.add_column(columns, "PLD20", PHON, "PLD-20 (M)", "PLD-20 (SD)")
+        self.add_column(columns, "phon_spread", PHON, "Phonological Spread")
+        self.add_column(columns, "phon_uniq_pt", PHON, "Phonological Uniqueness Point")
+        self.add_column(columns, "phon_c_coeff", PHON, "Phonological C Coefficient")
+        self.add_column(columns, "phon_bfreq", PHON, "Sum Biphone Frequency")
+
+        if self.calculator.is_any_pg_metric_checked():
+            if not orth_is_printed:
+                columns.append((None, "", ORTH, ["Item (Orthography)"]))
+            if not phon_is_printed:
+                columns.append((None, "", PHON, ["Item (Phonology)"]))
+        self.add_column(columns, "pg_n_dens", PG, "Phonographic Neighbourhood Density",
+                        "Identity of Phonographic Neighbours (O)", "Identity of Phonographic Neighbours (P)")
+        self.add_column(columns, "pg_n_freq", PG, "Phonographic Neighbourhood Frequency (M)",
+                        "Phonographic Neighbourhood Frequency (SD)")
+        self.add_column(columns, "pg_c_coeff", PG, "Phonographic C Coefficient")
+
+        if self.calculator.is_any_stress_metric_checked():
+            if not phon_is_printed:
+                columns.append((None, "", PHON, ["Item (Phonology)"]))
+        self.add_column(columns, "p_stress_code", PHON, "Stress Code")
+        self.add_column(columns, "stress_typ", PHON, "Stress Typicality")
+        return columns
+
+    def add_column(self, columns, metric, kind, *titles):
+        '''
+        Adds the columns of metric to columns if it is selected, see get_columns.
+        '''
+        if not getattr(self.calculator, metric):
+            return
+        variant = ""
+        if hasattr(self.calculator, metric + "_sub"):
+            variant = "sub" if getattr(self.calculator, metric + "_sub") else "sad"
+        columns.append((metric, variant, kind, list(titles)))
+
+    def generate_header(self):
+        header = []
+        for metric, variant, kind, titles in self.get_columns():
+            header += titles
+        return header
+
+    def format_result(self, result):
+        new_result = []
+        for row in result:
+            string = ""
+            for n in row:
+                if type(n) is not str:
+                    string += str(n)
+                else:
+                    string += n
+                string += ", "
+            new_result.append([string[:-2]])
+        return new_result
+
+    def get_worker_copy(self):
+        '''
+        Returns a copy of the engine holding the prepared corpus structures but not the input words,
+        to be sent to the worker processes of a parallel run. The metric classes of the copy are shallow copies
+        sharing the corpus structures of those of this engine, with an empty output of their own, so that the metric
+        classes of this engine keep their output.
+        '''
+        worker_engine = MetricsEngine(self.corpus, self.calculator, [], [], [], 0)
+        empty_output = Output(0)
+        worker_engine.orth_metrics = get_metrics_copy(self.orth_metrics, empty_output)
+        worker_engine.phon_metrics = get_metrics_copy(self.phon_metrics, empty_output)
+        worker_engine.pg_metrics = get_metrics_copy(self.pg_metrics, empty_output)
+        if self.pg_metrics:
+            worker_engine.pg_metrics.orth_metric = get_metrics_copy(self.pg_metrics.orth_metric, empty_output)
+            worker_engine.pg_metrics.phon_metric = get_metrics_copy(self.pg_metrics.phon_metric, empty_output)
+        worker_engine.lexicon = self.lexicon
+        return worker_engine
+
+    def warm_up(self):
+        '''
+        Builds the corpus structures of the selected metrics ahead of the first input word, for an engine which
+        answers many small requests. The structures of the MetricPlan are built when the engine is initialised, so
+        only the neighbour graphs remain, which are built here whatever the number of words.
+        '''
+        self.build_neighbour_graphs()
+
+    def get_job_engine(self, selected_buttons, num_words, has_orth_words, has_phon_words, has_pg_words):
+        '''
+        Returns an engine for another run over the same corpus which shares the prepared metric classes of this
+        engine, so that the corpus structures built for one run are used by the next. This engine must have been
+        initialised with init_stream for kinds of input words and a selection of metrics covering those of the run.
+        :param selected_buttons: SelectedButtons of the run, with the same transcription system as this engine.
+        :param has_orth_words: True if the input words of the run have an orthographic word, similarly for the others.
+        '''
+        engine = MetricsEngine(self.corpus, selected_buttons, [], [], [], num_words)
+        engine.orth_metrics = self.orth_metrics if has_orth_words else None
+        engine.phon_metrics = self.phon_metrics if has_phon_words else None
+        engine.pg_metrics = self.pg_metrics if has_pg_words else None
+        engine.lexicon = self.lexicon
+        engine.start_method = self.start_method
+        return engine
+
+    def iter_word_entries(self, words, num_words, num_processes=1, chunk_size=None):
+        '''
+        Yields lists of the word entries of the input words in input order, one chunk at a time. Each chunk is
+        computed metric by metric, here or by a pool of worker processes. Only a few chunks per process are sent ahead
+        of the results collected, so streamed input is read as it is processed. The pool is stopped when the
+        generator is closed, so a run is aborted by no longer iterating and closing it.
+        The entries of chunks processed by worker processes are ResultRow views of the ResultStore sent back by the
+        worker rather than WordEntry objects, and likewise give their output row with print().
+        Words which repeat the pair of words of an earlier word are not computed again but given its entry (see
+        DuplicateWords), and self.num_duplicates counts them. Likewise, if there is a result cache, words whose
+        results are all found in it are not computed, and self.num_cached counts them.
+        :param words: iterable of InputWord.
+        :param num_words: number of input words, used to decide whether to use worker processes and the chunk size.
+        :param chunk_size: number of words in each chunk of a parallel run, by default chosen from num_words.
+        '''
+        duplicates = DuplicateWords(words)
+        self.num_duplicates = 0
+        self.num_cached = 0
+        if num_processes <= 1 or num_words < PARALLEL_MIN_WORDS:
+            for chunk in self.iter_word_chunks(words, SEQUENTIAL_CHUNK_SIZE):
+                chunk_words, positions = self.split_chunk(chunk, duplicates)
+                yield self.fan_out(positions, duplicates, self.generate_word_entries(chunk_words))
+            return
+        if chunk_size is None:
+            chunk_size = min(num_words // (num_processes * CHUNKS_PER_PROCESS) + 1, MAX_CHUNK_SIZE)
+        max_pending = num_processes * PENDING_CHUNKS_PER_PROCESS
+        pending = deque()
+        pool = self.create_pool(num_processes)
+        try:
+            for chunk in self.iter_word_chunks(words, chunk_size):
+                chunk_words, positions = self.split_chunk(chunk, duplicates)
+                pending.append((positions, pool.apply_async(process_chunk, (chunk_words,))))
+                while len(pending) >= max_pending:
+                    positions, result = pending.popleft()
+                    yield self.fan_out(positions, duplicates, list(result.get()))
+            while pending:
+                positions, result = pending.popleft()
+                yield self.fan_out(positions, duplicates, list(result.get()))
+        finally:
+            self.close_pool(pool)
+
+    def split_chunk(self, chunk, duplicates):
+        '''
+        Returns the words of chunk which are to be computed, leaving out duplicates and words found in the result
+        cache, and the positions of the entries of all the words of chunk, to be given to fan_out.
+        :param duplicates: DuplicateWords of the run.
+        '''
+        words, positions = duplicates.split_chunk(chunk)
+        self.num_duplicates = duplicates.num_duplicates
+        if self.result_cache is None:
+            return words, (positions, None, None)
+        cached_rows = self.result_cache.find_rows(self.get_columns(), words)
+        missing_words = []
+        for idx in range(len(words)):
+            if cached_rows[idx] is None:
+                missing_words.append(words[idx])
+            else:
+                self.num_cached += 1
+        return missing_words, (positions, cached_rows, missing_words)
+
+    def fan_out(self, chunk_positions, duplicates, entries):
+        '''
+        Returns the entries of the words of a chunk given the entries computed for it, and stores the results
+        computed in the result cache if there is one.
+        :param chunk_positions: second value returned by split_chunk for the chunk.
+        '''
+        positions, cached_rows, missing_words = chunk_positions
+        if cached_rows is not None:
+            rows = [entry.print() for entry in entries]
+            self.result_cache.add_rows(self.get_columns(), missing_words, rows)
+            results = ResultStore()
+            computed = iter(rows)
+            for row in cached_rows:
+                results.add_row(next(computed) if row is None else row)
+            entries = list(results)
+        return duplicates.fan_out(positions, entries)
+
+    def iter_word_chunks(self, words, chunk_size):
+        '''
+        Yields the words of an iterable in chunks of at most chunk_size words, reading it as the chunks are used.
+        '''
+        chunk = []
+        for word in words:
+            chunk.append(word)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def get_phon_tokens_dic(self):
+        '''
+        Returns the tokenised phonological words of the corpus if they have been prepared, otherwise None.
+        '''
+        if self.lexicon is None:
+            return None
+        return self.lexicon.get_phon_tokens_dic()
+
+    def create_pool(self, num_processes):
+        '''
+        Returns a process pool whose workers each hold the prepared corpus structures.
+        Where worker processes are forked, they inherit the prepared engine from this process without it being
+        copied or sent to them, and share its memory until they write to it. Otherwise the corpus rows and the flat
+        arrays of the Lexicon structures built here (see Lexicon.share) are placed in shared memory once, and each
+        worker attaches to them by name instead of receiving a pickled copy of the whole engine or building the
+        structures again. Only the tables whose size does not grow with the corpus and the symbol tables the encoded
+        words refer to are pickled and sent to each worker.
+        Custom phonemes are class attributes of Phonemes, so they are passed on explicitly for platforms
+        where worker processes do not inherit the memory of this process.
+        Workers are started with self.start_method, or the default start method of the platform if it is None.
+        '''
+        custom_phonemes = (Phonemes.custom_cons, Phonemes.custom_vowels, Phonemes.custom_phonemes,
+                           Phonemes.custom_primary_stress)
+        context = multiprocessing.get_context(self.start_method)
+        if context.get_start_method() == 'fork':
+            return context.Pool(num_processes, initializer=init_worker_process,
+                                initargs=(self.get_worker_copy(), custom_phonemes))
+        arrays, tables = self.lexicon.share()
+        self.shared_corpus = SharedCorpus(self.corpus, arrays=arrays)
+        symbol_tables = {key: get_symbol_table(key) for key in (ORTH_KEY, self.key)}
+        has_words = (self.orth_metrics is not None, self.phon_metrics is not None, self.pg_metrics is not None)
+        return context.Pool(num_processes, initializer=init_worker_from_shared_corpus,
+                            initargs=(self.shared_corpus.name, self.calculator, has_words, custom_phonemes,
+                                      tables, symbol_tables))
+
+    def close_pool(self, pool):
+        '''
+        Stops the worker processes of pool and frees the shared corpus given to them, if any.
+        '''
+        pool.terminate()
+        pool.join()
+        if self.shared_corpus:
+            self.shared_corpus.close()
+            self.shared_corpus = None
+
+worker_engine = None
+worker_shared_memory = None
+
+def get_default_num_processes():
+    '''
+    Returns the number of worker processes of a parallel run unless another is chosen: the number of CPUs, up to
+    DEFAULT_MAX_PROCESSES.
+    '''
+    return min(os.cpu_count() or 1, DEFAULT_MAX_PROCESSES)
+
+def iter_input_stream(input_stream):
+    '''
+    Yields an InputWord for each (orthographic word, phonological word) pair in a stream of chunks of pairs,
+    e.g. from FileReader.read_input_words.
+    '''
+    for chunk in input_stream:
+        for orth, phon in chunk:
+            yield InputWord(orth, phon)
+
+def get_metrics_copy(metrics, output):
+    '''
+    Returns a shallow copy of a metric class, or None, which shares its corpus structures but writes to output.
+    '''
+    if metrics is None:
+        return None
+    metrics_copy = copy.copy(metrics)
+    metrics_copy.output = output
+    return metrics_copy
+
+def set_custom_phonemes(custom_phonemes):
+    Phonemes.custom_cons, Phonemes.custom_vowels, Phonemes.custom_phonemes, \
+        Phonemes.custom_primary_stress = custom_phonemes
+
+def init_worker_process(engine, custom_phonemes):
+    '''
+    Initialiser of each worker process of a parallel run which inherits the prepared engine.
+    '''
+    global worker_engine
+    worker_engine = engine
+    set_custom_phonemes(custom_phonemes)
+
+def init_worker_from_shared_corpus(name, selected_buttons, has_words, custom_phonemes, tables, symbol_tables):
+    '''
+    Initialiser of each worker process of a parallel run which attaches to a SharedCorpus. The Lexicon of the worker
+    is made over the arrays in shared memory, so the corpus structures built by the process which started this one
+    are used without being copied or built again.
+    :param has_words: (has orthographic words, has phonological words, has orthographic-phonological pairs).
+    :param tables: pickled tables of the Lexicon, see Lexicon.share.
+    :param symbol_tables: dictionary mapping keys to the SymbolTable the shared encoded words refer to.
+    '''
+    global worker_engine, worker_shared_memory
+    set_custom_phonemes(custom_phonemes)
+    set_symbol_tables(symbol_tables)
+    worker_shared_memory, corpus, arrays = attach_shared_corpus(name)
+    worker_engine = MetricsEngine(corpus, selected_buttons, [], [], [], 0)
+    lexicon = Lexicon.from_shared(corpus, worker_engine.key, arrays, tables)
+    worker_engine.create_metrics(Output(0), *has_words, lexicon=lexicon)
+    # only assigns the shared structures to the metric classes, unless the plan needs one which was not built
+    worker_engine.build_corpus_structures()
+
+def process_chunk(words):
+    '''
+    Computes the output rows of a chunk of input words in a worker process, returned in a ResultStore, which is
+    much smaller to send back than the word entries with their neighbour lists.
+    '''
+    results = ResultStore()
+    results.add_word_entries(worker_engine.generate_word_entries(words))
+    return results
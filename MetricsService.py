@@ -0,0 +1,280 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import errno
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from BatchCalculator import BatchCalculator, BatchError, Job, METRICS
+from MetricsEngine import InputWord
+from Phonemes import Phonemes
+from Exceptions import TokeniseException
+
+'''
+Long-running service which keeps corpora prepared in memory and computes metrics for the words of each request.
+Requests are JSON objects sent with POST to /metrics, e.g.
+    {"corpus": "english", "metrics": ["orth_n_dens", "PLD20"], "words": [["cat", "kat"], ["dog", "dɒɡ"]]}
+where each word is an orthographic word, or a pair of orthographic and phonological words, and "corpus" may be left
+out if only one corpus is loaded. The response holds the header and rows of the output, as in the output file:
+    {"header": [...], "rows": [[...], [...]]}
+GET /corpora lists the corpora loaded and GET /metrics lists the metrics which can be selected.
+'''
+
+# Largest request body accepted, in bytes
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+class ServiceError(Exception):
+    def __init__(self, msg, status=400):
+        super().__init__(msg)
+        self.msg = msg
+        self.status = status
+
+class WarmCorpus:
+    '''
+    A corpus loaded once, whose metric classes are prepared for every metric its words allow and whose structures are
+    built before the first request, so that a request only pays for the metrics of its own words.
+    '''
+    def __init__(self, name, args):
+        '''
+        :param name: name by which requests select the corpus.
+        :param args: options with the arguments of BatchCalculator.add_corpus_arguments and the corpus file.
+        '''
+        self.name = name
+        self.calculator = BatchCalculator(args)
+        self.calculator.load_phonetic_system()
+        self.calculator.load_corpus_file()
+        has_phon_words = self.calculator.input_is_both_phon_and_orth
+        buttons = self.calculator.get_selected_buttons(["all"])
+        if not self.supports_stress_metrics():
+            buttons.p_stress_code = False
+            buttons.stress_typ = False
+        self.calculator.prepare_engine(buttons, 0, True, has_phon_words, has_phon_words)
+        # requests are computed on threads of the server, and forking a process which has other threads running may
+        # leave its workers deadlocked on locks held by those threads
+        self.calculator.engine.start_method = "spawn"
+        self.calculator.engine.warm_up()
+
+    def supports_stress_metrics(self):
+        key = self.calculator.key
+        if key == Phonemes.CUSTOM_KEY:
+            return Phonemes.custom_primary_stress is not None
+        return key in Phonemes.SAMPA_KEYS + Phonemes.IPA_KEYS
+
+    def get_info(self):
+        return {"name": self.name, "file": self.calculator.corpus_file, "words": len(self.calculator.corpus),
+                "key": self.calculator.key, "orth_only": not self.calculator.input_is_both_phon_and_orth}
+
+    def make_input_words(self, words):
+        '''
+        Returns the InputWord of each word of a request, cleaned as the words of an input file are.
+        :param words: list of orthographic words, or of [orthographic word, phonological word] pairs.
+        '''
+        input_words = []
+        for word in words:
+            if isinstance(word, str):
+                word = [word]
+            if not isinstance(word, list) or not 1 <= len(word) <= 2 or not all(isinstance(w, str) for w in word):
+                raise ServiceError("Each word must be a string or a pair of strings.")
+            word = [w.strip() for w in word]
+            if not all(word):
+                raise ServiceError("Words must not be empty.")
+            input_words.append(InputWord(word[0].lower(), word[1] if len(word) == 2 else None))
+        if len({word.phon is None for word in input_words}) > 1:
+            raise ServiceError("Either all words or none must have a phonological word.")
+        return input_words
+
+    def compute(self, words, metrics):
+        '''
+        Returns the header and the rows of the output for the words and metrics of a request.
+        Not thread safe: the metric classes hold the word being computed.
+        :param metrics: list of metric names, see BatchCalculator.METRICS, or ["all"].
+        '''
+        job, input_words = self.prepare_request(words, metrics)
+        return self.compute_words(job, input_words)
+
+    def prepare_request(self, words, metrics):
+        '''
+        Checks the words and metrics of a request as compute does, and returns the Job of the request, whose input
+        file and output file are None, and its InputWords.
+        '''
+        input_words = self.make_input_words(words)
+        try:
+            job = Job(None, None, self.calculator.get_selected_buttons(metrics))
+            job.num_words = len(input_words)
+            job.input_has_phon_column = bool(input_words) and input_words[0].phon is not None
+            self.calculator.run_prechecks(job)
+            self.calculator.load_input_words(job)
+        except BatchError as e:
+            raise ServiceError(str(e))
+        if not job.read_phon_words:
+            input_words = [InputWord(word.orth, None) for word in input_words]
+        return job, input_words
+
+    def compute_words(self, job, input_words, num_processes=1):
+        '''
+        Returns the header and the rows of the output for input words checked by prepare_request with job, which may
+        hold other words of the same kinds. Not thread safe.
+        :param num_processes: number of worker processes used if there are enough words, see
+        MetricsEngine.iter_word_entries.
+        '''
+        engine = self.calculator.engine.get_job_engine(job.selected_buttons, len(input_words), job.has_orth_words,
+                                                       job.has_phon_words, job.has_pg_words)
+        rows = []
+        chunks = engine.iter_word_entries(input_words, len(input_words), num_processes)
+        try:
+            for chunk_entries in chunks:
+                rows += [word_entry.print() for word_entry in chunk_entries]
+        except TokeniseException as e:
+            raise ServiceError("Unable to tokenise the string '" + e.word + "'.")
+        finally:
+            chunks.close()
+        return engine.generate_header(), rows
+
+class MetricsService:
+    '''
+    The corpora of the service by name. Requests are computed one at a time under a single lock, as the metric
+    classes and the token cache hold state between calls, and threads do not compute metrics in parallel anyway.
+    '''
+    def __init__(self):
+        self.corpora = {}
+        self.lock = threading.Lock()
+
+    def add_corpus(self, warm_corpus):
+        self.corpora[warm_corpus.name] = warm_corpus
+
+    def get_corpus(self, name):
+        if name is None and len(self.corpora) == 1:
+            return next(iter(self.corpora.values()))
+        if name not in self.corpora:
+            raise ServiceError("Unknown corpus " + str(name) + ".", 404)
+        return self.corpora[name]
+
+    def get_corpora(self):
+        return {"corpora": [corpus.get_info() for corpus in self.corpora.values()]}
+
+    def handle_metrics_request(self, request):
+        '''
+        Returns the response to a metrics request, see the description of this module.
+        '''
+        corpus, words, metrics = self.parse_request(request)
+        start = time.monotonic()
+        with self.lock:
+            header, rows = corpus.compute(words, metrics)
+        return {"header": header, "rows": rows, "time": time.monotonic() - start}
+
+    def parse_request(self, request):
+        '''
+        Returns the WarmCorpus, the words and the metrics of a metrics request.
+        '''
+        if not isinstance(request, dict):
+            raise ServiceError("The request must be a JSON object.")
+        words = request.get("words")
+        metrics = request.get("metrics")
+        if not isinstance(words, list):
+            raise ServiceError("The request must have a list of words.")
+        if not isinstance(metrics, list) or not all(isinstance(metric, str) for metric in metrics):
+            raise ServiceError("The request must have a list of metrics.")
+        return self.get_corpus(request.get("corpus")), words, metrics
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    '''
+    Handles the HTTP requests of a server made by make_server.
+    '''
+    def do_GET(self):
+        if self.path == "/corpora":
+            self.send_json(200, self.server.service.get_corpora())
+        elif self.path == "/metrics":
+            self.send_json(200, {"metrics": METRICS})
+        else:
+            self.send_json(404, {"error": "Unknown path " + self.path + "."})
+
+    def do_POST(self):
+        if self.path != "/metrics":
+            self.send_json(404, {"error": "Unknown path " + self.path + "."})
+            return
+        try:
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                raise ServiceError("The Content-Length header is not a number.")
+            if length < 0:
+                raise ServiceError("The Content-Length header is negative.")
+            if length > MAX_REQUEST_SIZE:
+                raise ServiceError("The request is too large.", 413)
+            try:
+                request = json.loads(self.rfile.read(length).decode("utf-8"))
+            except ValueError:
+                raise ServiceError("The request is not valid JSON.")
+            self.send_json(200, self.server.service.handle_metrics_request(request))
+        except ServiceError as e:
+            self.send_json(e.status, {"error": e.msg})
+        except Exception as e:
+            # the server keeps answering other requests
+            traceback.print_exc()
+            self.send_json(500, {"error": "Internal error: " + str(e)})
+
+    def send_json(self, status, obj):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # clients of a Unix socket have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def remove_socket(socket_path):
+    '''
+    Removes the Unix socket at socket_path if there is one, e.g. left by a server which was not stopped cleanly.
+    Raises FileExistsError if socket_path is a file of another kind, which is left as it is.
+    '''
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "Not a socket", socket_path)
+    os.remove(socket_path)
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_server(service, host="127.0.0.1", port=8765, socket_path=None, quiet=False):
+    '''
+    Returns an HTTP server for service, listening on a Unix socket if socket_path is given, else on host and port.
+    '''
+    if socket_path:
+        remove_socket(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, MetricsRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
@@ -0,0 +1,105 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import http.client
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from MetricsService import ServiceError, make_server
+
+'''
+Tests for the handling of HTTP requests and Unix socket paths by the metrics service.
+'''
+
+class StubService:
+    '''
+    Service answering metrics requests by echoing them, or raising the error of the request.
+    '''
+    def handle_metrics_request(self, request):
+        if request.get("error") == "service":
+            raise ServiceError("Bad words.")
+        if request.get("error") == "internal":
+            raise RuntimeError("failed")
+        return request
+
+class MetricsServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server(StubService(), port=0, quiet=True)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def post(self, body, content_length=None):
+        connection = http.client.HTTPConnection(*self.server.server_address)
+        try:
+            connection.putrequest("POST", "/metrics")
+            connection.putheader("Content-Length", str(len(body)) if content_length is None else content_length)
+            connection.endheaders(body)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def test_request(self):
+        self.assertEqual(self.post(b'{"words": ["cat"]}'), (200, {"words": ["cat"]}))
+        self.assertEqual(self.post(b'{"error": "service"}'), (400, {"error": "Bad words."}))
+        self.assertEqual(self.post(b'not json')[0], 400)
+
+    def test_bad_content_length(self):
+        self.assertEqual(self.post(b'{}', "abc")[0], 400)
+        self.assertEqual(self.post(b'{}', "-1")[0], 400)
+
+    def test_internal_error(self):
+        with mock.patch("traceback.print_exc"):
+            status, response = self.post(b'{"error": "internal"}')
+        self.assertEqual(status, 500)
+        self.assertIn("failed", response["error"])
+        # the server still answers
+        self.assertEqual(self.post(b'{}'), (200, {}))
+
+class SocketPathTest(unittest.TestCase):
+    def test_other_file_is_kept(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "service.sock")
+            with open(path, "w") as file:
+                file.write("data")
+            with self.assertRaises(FileExistsError):
+                make_server(StubService(), socket_path=path)
+            with open(path) as file:
+                self.assertEqual(file.read(), "data")
+
+    def test_stale_socket_is_replaced(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "service.sock")
+            stale = socket.socket(socket.AF_UNIX)
+            stale.bind(path)
+            stale.close()
+            server = make_server(StubService(), socket_path=path)
+            server.server_close()
+            self.assertTrue(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from array import array
+from Biphones import get_biphones
+
+'''
+Positional bigram/biphone probabilities. The probability of a bigram at a position is its frequency at that position
+over the total frequency of all bigrams at that position, and a word scores the sum of the probabilities of its
+bigrams at their positions. Bigrams are given integer ids, and the probabilities at each position are stored in an
+array indexed by bigram id, as long as the largest id of the bigrams seen at that position.
+'''
+
+class PositionalBigramTable:
+    '''
+    Probability of each bigram at each position, i.e. its frequency at that position over the total frequency
+    of all bigrams at that position.
+    '''
+    def __init__(self, corpus):
+        '''
+        Builds the table in one pass over the corpus.
+        :param corpus: dictionary mapping tokenised words to their frequency.
+        '''
+        self.bigram_ids = {}
+        # frequency of each bigram id at each position, in the order in which the bigrams were first seen there
+        counts = []
+        for word in corpus:
+            freq = corpus[word]
+            biphones = get_biphones(word)
+            for idx in range(len(biphones)):
+                bp = biphones[idx]
+                if bp not in self.bigram_ids:
+                    self.bigram_ids[bp] = len(self.bigram_ids)
+                if idx == len(counts):
+                    counts.append({})
+                bp_id = self.bigram_ids[bp]
+                if bp_id not in counts[idx]:
+                    counts[idx][bp_id] = 0
+                counts[idx][bp_id] += freq
+
+        self.probs = []
+        for position_counts in counts:
+            probs = array('d', [0.0]) * (max(position_counts) + 1)
+            # summed in the order in which the bigrams were first seen, as LexiCAL always has
+            total = sum(position_counts.values())
+            if total != 0:
+                for bp_id in position_counts:
+                    probs[bp_id] = position_counts[bp_id] / total
+            self.probs.append(probs)
+
+    def get_bigram_ids(self, word):
+        '''
+        Returns the ids of the bigrams of a tokenised word in order, with -1 for bigrams not seen in the corpus.
+        '''
+        return [self.bigram_ids.get(bp, -1) for bp in get_biphones(word)]
+
+    def get_prob_sum(self, bigram_ids):
+        '''
+        Returns the sum of the probabilities of bigrams at each position, or "NULL" for a word with no bigrams.
+        Bigrams not seen at a position in the corpus have a probability of 0, which includes every position past the
+        last bigram of the longest corpus word.
+        :param bigram_ids: bigram ids of a word, see get_bigram_ids.
+        '''
+        if not bigram_ids:
+            return "NULL"
+        result = []
+        for idx in range(len(bigram_ids)):
+            bp_id = bigram_ids[idx]
+            if idx < len(self.probs) and 0 <= bp_id < len(self.probs[idx]):
+                result.append(self.probs[idx][bp_id])
+            else:
+                result.append(0.0)
+        return sum(result)
+
+    def get_prob_sums(self, words):
+        '''
+        Returns the sum of the probabilities of the bigrams of each of a list of tokenised words, see get_prob_sum.
+        '''
+        return [self.get_prob_sum(self.get_bigram_ids(word)) for word in words]
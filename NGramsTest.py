@@ -0,0 +1,82 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import random
+import unittest
+from NGrams import PositionalBigramTable
+
+'''
+Tests the positional bigram tables against the positional probabilities LexiCAL first computed.
+'''
+
+def reference_prob_base(corpus):
+    '''
+    Returns a dictionary mapping each position to a dictionary mapping the bigrams at that position to their
+    probability, computed as LexiCAL first did.
+    '''
+    dic = {}
+    for word in corpus:
+        for idx in range(len(word) - 1):
+            bp = word[idx] + word[idx + 1]
+            dic.setdefault(idx, {}).setdefault(bp, 0)
+            dic[idx][bp] += corpus[word]
+    base = {}
+    for idx in dic:
+        base[idx] = {}
+        for bp in dic[idx]:
+            if sum(list(dic[idx].values())) == 0:
+                continue
+            base[idx][bp] = dic[idx][bp] / sum(list(dic[idx].values()))
+    return base
+
+def reference_prob_sum(word, base):
+    if len(word) < 2:
+        return "NULL"
+    result = []
+    for idx in range(len(word) - 1):
+        result.append(base[idx].get(word[idx] + word[idx + 1], 0.0))
+    return sum(result)
+
+def make_words(rnd, num_words, max_length):
+    return [tuple(rnd.choice("abcde") for i in range(rnd.randint(1, max_length))) for j in range(num_words)]
+
+class NGramsTest(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(9)
+        self.corpus = {word: rnd.choice([0, 0.5, 1, 12.25, 300]) for word in make_words(rnd, 500, 7)}
+        # multi-character tokens, whose bigrams are concatenated as LexiCAL always has
+        self.corpus[("ab", "c")] = 2
+        self.corpus[("a", "bc")] = 3
+        self.words = list(self.corpus) + make_words(rnd, 200, 7) + [(), ("ab",), ("x", "y")]
+
+    def test_prob_sums(self):
+        base = reference_prob_base(self.corpus)
+        table = PositionalBigramTable(self.corpus)
+        self.assertEqual(table.get_prob_sums(self.words), [reference_prob_sum(word, base) for word in self.words])
+
+    def test_zero_frequencies(self):
+        corpus = {("a", "b"): 0, ("b", "a", "c"): 0}
+        self.assertEqual(PositionalBigramTable(corpus).get_prob_sums([("a", "b"), ("b", "a", "c")]), [0, 0])
+
+    def test_positions_past_longest_word(self):
+        table = PositionalBigramTable({("a", "b"): 1, ("a", "c"): 3})
+        self.assertEqual(table.get_prob_sums([("a", "b", "a", "b"), ("a", "c", "c")]), [0.25, 0.75])
+        self.assertEqual(PositionalBigramTable({}).get_prob_sums([("a", "b"), ("a",)]), [0.0, "NULL"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,382 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import editdistance
+from array import array
+from bisect import bisect_left
+from FlatTables import KeyIndex, RaggedArray, StringMap, get_prefixed_arrays, add_prefixed_arrays, ID_TYPE
+from SymbolTable import CODE_TYPE, MASK_ID
+
+'''
+Indexes over an encoded corpus which are built once and then shared by every input word.
+Words are arrays of symbol ids (see SymbolTable.py) and index keys are the bytes of such arrays.
+Each index gives its structures as flat arrays with get_arrays, and from_arrays makes it again over those arrays,
+e.g. in shared memory, for a corpus held as a StringMap of encoded words (see FlatTables.py) with the same words.
+'''
+
+MASK = array(CODE_TYPE, [MASK_ID]).tobytes()
+
+def get_words_and_codes(corpus):
+    '''
+    Returns the words of a corpus in order, the position of a word being its id, and the encoded words by id.
+    :param corpus: dictionary mapping word as string to encoded word, or StringMap of the encoded words.
+    '''
+    if isinstance(corpus, StringMap):
+        return corpus.key_strings, corpus.value_sequence
+    words = list(corpus)
+    return words, [corpus[word] for word in words]
+
+def get_key_index_arrays(index):
+    '''
+    Returns the arrays of the KeyIndex of a dictionary mapping keys to lists of word ids, or of a KeyIndex.
+    '''
+    if not isinstance(index, KeyIndex):
+        index = KeyIndex.make(index)
+    return index.get_arrays()
+
+def get_deletion_keys(word):
+    '''
+    Returns the set of keys for an encoded word: the word itself and every variant with one symbol deleted.
+    '''
+    data = word.tobytes()
+    keys = {data}
+    for idx in range(0, len(data), word.itemsize):
+        keys.add(data[:idx] + data[idx+word.itemsize:])
+    return keys
+
+class DeletionIndex:
+    '''
+    Maps every corpus word, and every variant of it with one symbol deleted, to the words that produce it.
+    Two words at edit distance 1 always share at least one such key, so the neighbours of a word are
+    found by looking up its own keys and verifying the few candidates returned.
+    '''
+    def __init__(self, corpus):
+        '''
+        :param corpus: dictionary mapping word as string to encoded word.
+        '''
+        self.corpus = corpus
+        self.words, self.codes = get_words_and_codes(corpus)
+        self.word_ids = {}
+        self.index = {}
+        for word_id in range(len(self.words)):
+            self.word_ids[self.words[word_id]] = word_id
+            for key in get_deletion_keys(self.codes[word_id]):
+                if key not in self.index:
+                    self.index[key] = []
+                self.index[key].append(word_id)
+
+    @classmethod
+    def from_arrays(cls, arrays, corpus):
+        '''
+        :param corpus: StringMap of the encoded words of the corpus the index was built for.
+        '''
+        index = cls.__new__(cls)
+        index.corpus = corpus
+        index.words, index.codes = get_words_and_codes(corpus)
+        index.word_ids = corpus.with_values(range(len(corpus)))
+        index.index = KeyIndex.from_arrays(arrays)
+        return index
+
+    def get_arrays(self):
+        return get_key_index_arrays(self.index)
+
+    def find_neighbour_ids(self, word):
+        '''
+        Returns the ids of the words in the corpus with an edit distance of 1 from word, in increasing order.
+        :param word: encoded word.
+        '''
+        candidates = set()
+        for key in get_deletion_keys(word):
+            word_ids = self.index.get(key)
+            if word_ids is not None:
+                candidates.update(word_ids)
+        ids = []
+        for word_id in sorted(candidates):
+            if editdistance.eval(word, self.codes[word_id]) == 1:
+                ids.append(word_id)
+        return ids
+
+    def find_neighbours(self, word):
+        '''
+        Returns the words in the corpus with an edit distance of 1 from word, in corpus order.
+        :param word: encoded word.
+        '''
+        return [self.words[word_id] for word_id in self.find_neighbour_ids(word)]
+
+class NeighbourGraph:
+    '''
+    Graph of the corpus words in which words at an edit distance of 1 are connected, stored as compressed sparse rows:
+    the neighbours of the word with id i are indices[indptr[i]:indptr[i+1]].
+    '''
+    def __init__(self, index):
+        '''
+        :param index: DeletionIndex of the corpus.
+        '''
+        self.corpus = index.corpus
+        self.indptr = array('L', [0])
+        self.indices = array('L')
+        for word_id in range(len(index.words)):
+            self.indices.extend(index.find_neighbour_ids(index.codes[word_id]))
+            self.indptr.append(len(self.indices))
+
+    @classmethod
+    def from_arrays(cls, arrays, corpus):
+        graph = cls.__new__(cls)
+        graph.corpus = corpus
+        graph.indptr = arrays["indptr"]
+        graph.indices = arrays["indices"]
+        return graph
+
+    def get_arrays(self):
+        return {"indptr": self.indptr, "indices": self.indices}
+
+    def get_neighbour_ids(self, word_id):
+        return self.indices[self.indptr[word_id]:self.indptr[word_id + 1]]
+
+def get_substitution_keys(word):
+    '''
+    Returns a list of keys for an encoded word, one per position, with the symbol at that position masked.
+    '''
+    data = word.tobytes()
+    keys = []
+    for idx in range(0, len(data), word.itemsize):
+        keys.append(data[:idx] + MASK + data[idx+word.itemsize:])
+    return keys
+
+class SubstitutionIndex:
+    '''
+    Maps every corpus word with one position masked to the words that produce it.
+    Words in the same bucket as a word differ from it at most at the masked position, so substitution
+    neighbours and neighbours at each position are found with one lookup per position.
+    '''
+    def __init__(self, corpus):
+        '''
+        :param corpus: dictionary mapping word as string to encoded word.
+        '''
+        self.corpus = corpus
+        self.words, self.codes = get_words_and_codes(corpus)
+        self.index = {}
+        for word_id in range(len(self.words)):
+            for key in get_substitution_keys(self.codes[word_id]):
+                if key not in self.index:
+                    self.index[key] = []
+                self.index[key].append(word_id)
+
+    @classmethod
+    def from_arrays(cls, arrays, corpus):
+        '''
+        :param corpus: StringMap of the encoded words of the corpus the index was built for.
+        '''
+        index = cls.__new__(cls)
+        index.corpus = corpus
+        index.words, index.codes = get_words_and_codes(corpus)
+        index.index = KeyIndex.from_arrays(arrays)
+        return index
+
+    def get_arrays(self):
+        return get_key_index_arrays(self.index)
+
+    def find_position_neighbour_ids(self, word):
+        '''
+        Returns a list with one entry per position of word, each entry being the ids of the corpus words
+        that differ from word only at that position.
+        :param word: encoded word.
+        '''
+        result = []
+        keys = get_substitution_keys(word)
+        for idx in range(len(keys)):
+            ids = []
+            for word_id in self.index.get(keys[idx], []):
+                if self.codes[word_id][idx] != word[idx]:
+                    ids.append(word_id)
+            result.append(ids)
+        return result
+
+    def find_neighbours(self, word):
+        '''
+        Returns the words in the corpus which differ from word by exactly one substitution, in corpus order.
+        :param word: encoded word.
+        '''
+        return self.get_neighbours(self.find_position_neighbour_ids(word))
+
+    def get_neighbours(self, position_neighbour_ids):
+        '''
+        Returns the substitution neighbours of a word in corpus order, given its neighbours at each position.
+        :param position_neighbour_ids: result of find_position_neighbour_ids for the word.
+        '''
+        ids = []
+        for position_ids in position_neighbour_ids:
+            ids += position_ids
+        return [self.words[word_id] for word_id in sorted(ids)]
+
+    def find_position_neighbours(self, word):
+        '''
+        Returns a list with number of entries = len(word) and each entry being the number of neighbours at that position.
+        :param word: encoded word.
+        '''
+        return [len(ids) for ids in self.find_position_neighbour_ids(word)]
+
+class TokenTrie:
+    '''
+    Prefix tree over the encoded words of a corpus.
+    Words sharing a prefix share the work done for that prefix when searching for words within an edit distance,
+    and branches which can no longer come within the distance are not visited.
+    The nodes are numbered breadth first, the children of a node in increasing order of symbol id, and held in flat
+    arrays: the children of node n are the nodes first_child[n] to first_child[n+1] - 1, tokens[n] is the symbol
+    leading to node n, counts[n] is the number of corpus words which end at node n or below it, and word_ids[n] holds
+    the ids of the corpus words which end at node n. Node 0 is the root.
+    '''
+    def __init__(self, corpus):
+        '''
+        :param corpus: dictionary mapping word as string to encoded word.
+        '''
+        self.corpus = corpus
+        self.words, self.codes = get_words_and_codes(corpus)
+        # nested dictionaries of symbol ids, with the ids of the words ending at a node under None
+        root = {}
+        for word_id in range(len(self.words)):
+            node = root
+            for token in self.codes[word_id]:
+                node = node.setdefault(token, {})
+            node.setdefault(None, []).append(word_id)
+        self.tokens = array(CODE_TYPE, [MASK_ID])
+        self.first_child = array('L')
+        word_ids = []
+        nodes = [root]
+        for node in nodes:
+            self.first_child.append(len(nodes))
+            word_ids.append(node.pop(None, []))
+            for token in sorted(node):
+                self.tokens.append(token)
+                nodes.append(node[token])
+        self.first_child.append(len(nodes))
+        counts = [len(ids) for ids in word_ids]
+        # children are numbered after their parent
+        for node in range(len(nodes) - 1, -1, -1):
+            for child in range(self.first_child[node], self.first_child[node + 1]):
+                counts[node] += counts[child]
+        self.counts = array('L', counts)
+        self.word_ids = RaggedArray.make(ID_TYPE, word_ids)
+
+    @classmethod
+    def from_arrays(cls, arrays, corpus):
+        '''
+        :param corpus: StringMap of the encoded words of the corpus the trie was built for.
+        '''
+        trie = cls.__new__(cls)
+        trie.corpus = corpus
+        trie.words, trie.codes = get_words_and_codes(corpus)
+        trie.tokens = arrays["tokens"]
+        trie.first_child = arrays["first_child"]
+        trie.counts = arrays["counts"]
+        trie.word_ids = RaggedArray.from_arrays(get_prefixed_arrays(arrays, "word_ids"))
+        return trie
+
+    def get_arrays(self):
+        arrays = {"tokens": self.tokens, "first_child": self.first_child, "counts": self.counts}
+        add_prefixed_arrays(arrays, "word_ids", self.word_ids.get_arrays())
+        return arrays
+
+    def find_child(self, node, token):
+        '''
+        Returns the child of node reached by the symbol token, or -1 if there is none.
+        '''
+        end = self.first_child[node + 1]
+        child = bisect_left(self.tokens, token, self.first_child[node], end)
+        if child < end and self.tokens[child] == token:
+            return child
+        return -1
+
+    def unique_point(self, word):
+        '''
+        Returns the uniqueness point of word: 1 + the length of the longest prefix of word shared with a corpus word
+        other than word itself, or 0 for an empty word.
+        :param word: encoded word.
+        '''
+        if len(word) == 0:
+            return 0
+        # counts of corpus words beginning with each prefix of word, as far as the prefixes are in the trie
+        counts = []
+        node = 0
+        for token in word:
+            node = self.find_child(node, token)
+            if node < 0:
+                break
+            counts.append(self.counts[node])
+        # corpus words equal to word do not make it less unique
+        num_same = len(self.word_ids[node]) if len(counts) == len(word) else 0
+        point = 1
+        for count in counts:
+            if count == num_same:
+                break
+            point += 1
+        return point
+
+    def find_within_distance(self, word, max_distance):
+        '''
+        Returns a list of (word id, Levenshtein distance) pairs for the corpus words within max_distance of word.
+        The trie is walked with a bit-parallel Levenshtein automaton of word: bit j of states[d] is set if the first j
+        symbols of word are within d edits of the prefix at the current node.
+        :param word: encoded word.
+        '''
+        length = len(word)
+        all_bits = (1 << (length + 1)) - 1
+        accept_bit = 1 << length
+        token_masks = {}
+        for idx in range(length):
+            token_masks[word[idx]] = token_masks.get(word[idx], 0) | (1 << (idx + 1))
+
+        tokens = self.tokens
+        first_child = self.first_child
+        word_offsets = self.word_ids.offsets
+        result = []
+        distances = range(1, max_distance + 1)
+        initial_states = [(1 << (min(d, length) + 1)) - 1 for d in range(max_distance + 1)]
+        if word_offsets[0] != word_offsets[1]:
+            self.add_accepted(0, initial_states, accept_bit, result)
+        stack = [(0, initial_states)]
+        while stack:
+            node, states = stack.pop()
+            for child in range(first_child[node], first_child[node + 1]):
+                mask = token_masks.get(tokens[child], 0)
+                prev_state = states[0]
+                new_state = (prev_state << 1) & mask
+                new_states = [new_state]
+                for d in distances:
+                    state = states[d]
+                    # match, substitution, insertion, deletion
+                    new_state = ((state << 1) & mask | prev_state << 1 | prev_state | new_state << 1) & all_bits
+                    new_states.append(new_state)
+                    prev_state = state
+                if new_state == 0:
+                    continue
+                if word_offsets[child] != word_offsets[child + 1]:
+                    self.add_accepted(child, new_states, accept_bit, result)
+                if first_child[child] != first_child[child + 1]:
+                    stack.append((child, new_states))
+        return result
+
+    def add_accepted(self, node, states, accept_bit, result):
+        '''
+        Adds (word id, distance) pairs for the words ending at node if the whole word has been matched.
+        '''
+        for d in range(len(states)):
+            if states[d] & accept_bit:
+                for word_id in self.word_ids[node]:
+                    result.append((word_id, d))
+                return
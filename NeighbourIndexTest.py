@@ -0,0 +1,154 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import random
+import unittest
+from FlatTables import StringMap
+from NeighbourIndex import DeletionIndex, NeighbourGraph, SubstitutionIndex, TokenTrie
+from SymbolTable import SymbolTable
+
+'''
+Tests for the indexes of NeighbourIndex.py against brute-force scans of the corpus.
+'''
+
+# symbols of more than one character, as phonemes are
+SYMBOLS = ["a", "b", "c", "d", "ei", "tʃ"]
+
+def levenshtein(word1, word2):
+    previous = list(range(len(word2) + 1))
+    for idx1 in range(len(word1)):
+        current = [idx1 + 1]
+        for idx2 in range(len(word2)):
+            current.append(min(previous[idx2 + 1] + 1, current[idx2] + 1,
+                               previous[idx2] + (word1[idx1] != word2[idx2])))
+        previous = current
+    return previous[-1]
+
+def get_substitution_positions(word1, word2):
+    '''
+    Returns the positions at which two words of the same length differ.
+    '''
+    return [idx for idx in range(len(word1)) if word1[idx] != word2[idx]]
+
+def reference_unique_point(word, corpus):
+    '''
+    Uniqueness point computed by filtering the corpus one prefix of word at a time, as LexiCAL first computed it.
+    :param corpus: list of tokenised words.
+    '''
+    if len(word) == 0:
+        return 0
+    corpus = [other for other in corpus if other != word]
+    point = 1
+    for idx in range(len(word)):
+        corpus = [other for other in corpus if other[:idx + 1] == word[:idx + 1]]
+        if len(corpus) != 0:
+            point += 1
+    return point
+
+def make_corpus(seed, num_words):
+    '''
+    Returns a dictionary mapping random words as strings to their encoded words, and the symbol table encoding them.
+    Short words from few symbols are used, so that most words have neighbours.
+    '''
+    rnd = random.Random(seed)
+    symbol_table = SymbolTable()
+    corpus = {}
+    while len(corpus) < num_words:
+        tokens = [rnd.choice(SYMBOLS) for _ in range(rnd.randint(1, 5))]
+        corpus["".join(tokens) + "/" + " ".join(tokens)] = symbol_table.encode(tokens)
+    return corpus, symbol_table
+
+def make_input_words(seed, corpus, symbol_table):
+    '''
+    Returns encoded words to search for: words of the corpus, and random words, some of them empty.
+    '''
+    rnd = random.Random(seed)
+    words = list(corpus.values())[:100]
+    for _ in range(100):
+        words.append(symbol_table.encode([rnd.choice(SYMBOLS) for _ in range(rnd.randint(0, 6))]))
+    return words
+
+class NeighbourIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, self.symbol_table = make_corpus(1, 600)
+        self.words = make_input_words(2, self.corpus, self.symbol_table)
+
+    def test_deletion_index(self):
+        index = DeletionIndex(self.corpus)
+        for word in self.words:
+            expected = [other for other in self.corpus if levenshtein(word, self.corpus[other]) == 1]
+            self.assertEqual(index.find_neighbours(word), expected)
+
+    def test_substitution_index(self):
+        index = SubstitutionIndex(self.corpus)
+        for word in self.words:
+            expected = []
+            position_counts = [0] * len(word)
+            for other in self.corpus:
+                if len(self.corpus[other]) != len(word):
+                    continue
+                positions = get_substitution_positions(word, self.corpus[other])
+                if len(positions) == 1:
+                    expected.append(other)
+                    position_counts[positions[0]] += 1
+            self.assertEqual(index.find_neighbours(word), expected)
+            self.assertEqual(index.find_position_neighbours(word), position_counts)
+
+    def test_find_within_distance(self):
+        trie = TokenTrie(self.corpus)
+        words = list(self.corpus)
+        for max_distance in range(1, 4):
+            for word in self.words:
+                expected = {}
+                for word_id in range(len(words)):
+                    distance = levenshtein(word, self.corpus[words[word_id]])
+                    if distance <= max_distance:
+                        expected[word_id] = distance
+                result = trie.find_within_distance(word, max_distance)
+                self.assertEqual(len(result), len(expected))
+                self.assertEqual(dict(result), expected)
+
+    def test_unique_point(self):
+        trie = TokenTrie(self.corpus)
+        corpus = [list(word) for word in self.corpus.values()]
+        for word in self.words:
+            self.assertEqual(trie.unique_point(word), reference_unique_point(list(word), corpus))
+
+    def test_from_arrays(self):
+        # indexes made over their arrays, as in a worker process, and over a StringMap of the corpus
+        codes = list(self.corpus.values())
+        corpus = StringMap.make(list(self.corpus), codes)
+        deletion_index = DeletionIndex(self.corpus)
+        substitution_index = SubstitutionIndex(self.corpus)
+        trie = TokenTrie(self.corpus)
+        graph = NeighbourGraph(deletion_index)
+        shared_deletion_index = DeletionIndex.from_arrays(deletion_index.get_arrays(), corpus)
+        shared_substitution_index = SubstitutionIndex.from_arrays(substitution_index.get_arrays(), corpus)
+        shared_trie = TokenTrie.from_arrays(trie.get_arrays(), corpus)
+        shared_graph = NeighbourGraph.from_arrays(graph.get_arrays(), corpus)
+        for word in self.words:
+            self.assertEqual(shared_deletion_index.find_neighbours(word), deletion_index.find_neighbours(word))
+            self.assertEqual(shared_substitution_index.find_position_neighbours(word),
+                             substitution_index.find_position_neighbours(word))
+            self.assertEqual(shared_trie.find_within_distance(word, 2), trie.find_within_distance(word, 2))
+            self.assertEqual(shared_trie.unique_point(word), trie.unique_point(word))
+        for word_id in range(len(codes)):
+            self.assertEqual(list(shared_graph.get_neighbour_ids(word_id)), list(graph.get_neighbour_ids(word_id)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,6 +19,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import editdistance
 import math
 import heapq
+from array import array
+from NeighbourIndex import DeletionIndex, SubstitutionIndex, TokenTrie, NeighbourGraph
+from FlatTables import get_prefixed_arrays, add_prefixed_arrays
+
+# Largest radius searched for PLD20/OLD20 neighbours before falling back to a scan of the corpus
+MAX_SEARCH_RADIUS = 3
+# Classes of the indexes of Neighbours, by attribute
+INDEX_CLASSES = {"deletion_index": DeletionIndex, "substitution_index": SubstitutionIndex, "token_trie": TokenTrie,
+                 "neighbour_graph": NeighbourGraph}
 
 def num_substitutions(word1, word2):
     '''
@@ -39,42 +48,157 @@ class Neighbours:
     '''
     def __init__(self, freq_dic):
         self.freq_dic = freq_dic
+        self.deletion_index = None
+        self.substitution_index = None
+        self.token_trie = None
+        self.neighbour_graph = None
+
+    def get_arrays(self):
+        '''
+        Returns the indexes built so far as flat arrays by name, see from_arrays.
+        '''
+        arrays = {}
+        for name in INDEX_CLASSES:
+            index = getattr(self, name)
+            if index is not None:
+                add_prefixed_arrays(arrays, name, index.get_arrays())
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, freq_dic, arrays, corpus):
+        '''
+        Returns a Neighbours whose indexes are those given by get_arrays, made over the arrays.
+        :param corpus: StringMap of the encoded words of the corpus the indexes were built for (see FlatTables.py).
+        '''
+        neighbour_calc = cls(freq_dic)
+        for name in INDEX_CLASSES:
+            index_arrays = get_prefixed_arrays(arrays, name)
+            if index_arrays:
+                setattr(neighbour_calc, name, INDEX_CLASSES[name].from_arrays(index_arrays, corpus))
+        return neighbour_calc
+
+    def get_deletion_index(self, corpus):
+        '''
+        Returns the deletion index of the corpus, building it the first time the corpus is seen.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        if self.deletion_index is None or self.deletion_index.corpus is not corpus:
+            self.deletion_index = DeletionIndex(corpus)
+        return self.deletion_index
+
+    def get_substitution_index(self, corpus):
+        '''
+        Returns the substitution index of the corpus, building it the first time the corpus is seen.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        if self.substitution_index is None or self.substitution_index.corpus is not corpus:
+            self.substitution_index = SubstitutionIndex(corpus)
+        return self.substitution_index
+
+    def get_token_trie(self, corpus):
+        '''
+        Returns the token trie of the corpus, building it the first time the corpus is seen.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        if self.token_trie is None or self.token_trie.corpus is not corpus:
+            self.token_trie = TokenTrie(corpus)
+        return self.token_trie
+
+    def build_neighbour_graph(self, corpus):
+        '''
+        Builds the graph of all pairs of corpus words at an edit distance of 1, which is then used instead of
+        looking up the neighbours of each neighbour when counting edges. Worth building only when many input
+        words are processed, as it looks up the neighbours of every corpus word once.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        if self.neighbour_graph is None or self.neighbour_graph.corpus is not corpus:
+            self.neighbour_graph = NeighbourGraph(self.get_deletion_index(corpus))
+
+    def get_word_id(self, word, corpus):
+        '''
+        Returns the id of a word of the corpus.
+        :param word: word as string.
+        '''
+        return self.get_deletion_index(corpus).word_ids[word]
+
+    def find_neighbour_ids(self, word_id, corpus):
+        '''
+        Returns the ids of the corpus words with an edit distance of 1 from the corpus word with id word_id,
+        from the neighbour graph if it has been built.
+        '''
+        if self.neighbour_graph is not None and self.neighbour_graph.corpus is corpus:
+            return self.neighbour_graph.get_neighbour_ids(word_id)
+        index = self.get_deletion_index(corpus)
+        return index.find_neighbour_ids(index.codes[word_id])
+
+    def count_edges(self, words, corpus):
+        '''
+        Returns the number of pairs of words with an edit distance of 1 in a list of corpus words.
+        :param words: list of words as strings.
+        '''
+        ids = set(map(lambda w: self.get_word_id(w, corpus), words))
+        num_edges = 0
+        for word_id in ids:
+            for neighbour_id in self.find_neighbour_ids(word_id, corpus):
+                if neighbour_id in ids:
+                    num_edges += 1
+        # each edge was counted from both ends
+        return num_edges // 2
 
     def find_neighbours(self, word, corpus, sub_only):
         '''
         If sub_only is true, then a neighbour is defined by substitutions only
         If it is false, a neighbour is defined by substitution, addition and deletion
-        :param word: tokenised word as a list.
-        :param corpus: dictionary mapping word as string to tokenised word as list.
-        '''
-        if type(word) != list:
-            raise ValueError("Word is not a tokenised list")
-        ld_one = []
-        for w in corpus:
-            if sub_only:
-                ld = num_substitutions(word, corpus[w])
-            else:
-                if abs(len(corpus[w]) - len(word)) > 1:
-                    continue
-                ld = editdistance.eval(word, corpus[w])
-            if ld == 1:
-                ld_one.append(w)
-        return ld_one
+        :param word: encoded word.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        if type(word) != array:
+            raise ValueError("Word is not an encoded array")
+        if sub_only:
+            return self.get_substitution_index(corpus).find_neighbours(word)
+        return self.get_deletion_index(corpus).find_neighbours(word)
 
     def find_position_neighbours(self, word, corpus):
         '''
         Returns a list with number of entries = len(word) and each entry being the number of neighbours at that position.
-        :param word: tokenised word.
-        :param corpus: dictionary mapping word as string to tokenised word as list.
-        '''
-        result = [0 for i in range(len(word))]
-        for w in corpus:
-            w = corpus[w]
-            if len(w) != len(word):
-                continue
-            for idx in range(len(w)):
-                if w[:idx] == word[:idx] and w[idx+1:] == word[idx+1:] and w[idx] != word[idx]:
-                    result[idx] += 1
+        :param word: encoded word.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        return self.get_substitution_index(corpus).find_position_neighbours(word)
+
+    def find_position_neighbour_ids(self, word, corpus):
+        '''
+        Returns a list with one entry per position of word, each entry being the ids of the corpus words that differ
+        from word only at that position. Both the substitution neighbours and the spread of the word are found from it.
+        :param word: encoded word.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        return self.get_substitution_index(corpus).find_position_neighbour_ids(word)
+
+    def get_sub_neighbours(self, position_neighbour_ids, corpus):
+        '''
+        Returns the substitution neighbours of a word given the result of find_position_neighbour_ids for it.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        return self.get_substitution_index(corpus).get_neighbours(position_neighbour_ids)
+
+    def spread(self, word, corpus):
+        '''
+        Returns the orthographic/phonological spread, i.e. the number of positions at which the word has at least one
+        substitution neighbour.
+        :param word: encoded word.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        '''
+        return self.get_spread(self.find_position_neighbour_ids(word, corpus))
+
+    def get_spread(self, position_neighbour_ids):
+        '''
+        Returns the spread of a word given the result of find_position_neighbour_ids for it.
+        '''
+        result = 0
+        for position_ids in position_neighbour_ids:
+            if position_ids:
+                result += 1
         return result
 
     def n_density(self, neighbours):
@@ -124,21 +248,55 @@ class Neighbours:
         sd = math.sqrt(sum_of_sq_diff / (len(n_freq_vals) - 1))
         return sd
 
-    def find_PLD_20(self, word, corpus, sub_only):
+    def find_nearest(self, word, corpus, k, neighbours=None):
         '''
-        Returns PLD20/OLD20 information in thee form [list of neighbours, mean LD, standard deviation of LD].
-        :param word: tokenised word.
-        :param corpus: dictionary mapping word as string to tokenised word as list.
-        :param sub_only: if True, compute distance as number of substitutions, else by Levenstein distance.
+        Returns (word, LD) pairs for the k nearest words with a non-zero LD from word, together with every word tied
+        with the furthest of them, sorted by LD and then by corpus order.
+        Radius 1 is searched with the deletion index. If it holds fewer than k words, the token trie is walked once
+        for the words within MAX_SEARCH_RADIUS, which are taken by increasing distance up to the first distance
+        reaching k words. The whole corpus is only scanned if fewer than k words are within that radius.
+        :param word: encoded word.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        :param neighbours: the neighbours of word by substitution, addition and deletion if already found.
         '''
+        if neighbours is None:
+            neighbours = self.get_deletion_index(corpus).find_neighbours(word)
+        if len(neighbours) >= k:
+            return [(w, 1) for w in neighbours]
+        trie = self.get_token_trie(corpus)
+        word_ids_by_ld = [[] for ld in range(MAX_SEARCH_RADIUS + 1)]
+        for word_id, ld in trie.find_within_distance(word, MAX_SEARCH_RADIUS):
+            word_ids_by_ld[ld].append(word_id)
+        word_ld_pairs = []
+        # the words at distance 1 are the neighbours found above, fewer than k
+        for ld in range(1, MAX_SEARCH_RADIUS + 1):
+            word_ld_pairs += [(trie.words[word_id], ld) for word_id in sorted(word_ids_by_ld[ld])]
+            if len(word_ld_pairs) >= k:
+                return word_ld_pairs
         word_ld_pairs = []
-        for w in corpus:
-            if sub_only:
-                ld = num_substitutions(word, corpus[w])
-            else:
-                ld = editdistance.eval(word, corpus[w])
+        for w, codes in corpus.items():
+            ld = editdistance.eval(word, codes)
             if ld != 0:
                 word_ld_pairs.append((w, ld))
+        return word_ld_pairs
+
+    def find_PLD_20(self, word, corpus, sub_only, neighbours=None):
+        '''
+        Returns PLD20/OLD20 information in thee form [list of neighbours, mean LD, standard deviation of LD].
+        :param word: encoded word.
+        :param corpus: dictionary mapping word as string to encoded word (see SymbolTable.py).
+        :param sub_only: if True, compute distance as number of substitutions, else by Levenstein distance.
+        :param neighbours: the neighbours of word by substitution, addition and deletion if already found,
+        used when sub_only is False.
+        '''
+        if sub_only:
+            word_ld_pairs = []
+            for w, codes in corpus.items():
+                ld = num_substitutions(word, codes)
+                if ld != 0:
+                    word_ld_pairs.append((w, ld))
+        else:
+            word_ld_pairs = self.find_nearest(word, corpus, 20, neighbours)
         twenty_word_ld_pairs = heapq.nsmallest(20, word_ld_pairs, key=lambda x: x[1])
         cutoff_ld = max(twenty_word_ld_pairs, key=lambda x: x[1])[1]
         additional_neighbours = list(filter(lambda x: x[1] == cutoff_ld, word_ld_pairs))
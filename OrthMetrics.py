@@ -17,12 +17,15 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
 from Metrics import Metrics
-import Biphones
 import Ccoeff
-from Neighbours import Neighbours
+from Lexicon import Lexicon
+from MetricPlan import SAD_NEIGHBOURS, SUB_NEIGHBOURS, POSITION_NEIGHBOURS, TOKEN_TRIE, NGRAM_TABLE
 
 class OrthMetrics(Metrics):
-    def __init__(self, words, corpus, output, print_init=True):
+    def __init__(self, words, corpus, output, print_init=True, lexicon=None):
+        '''
+        :param lexicon: Lexicon of the corpus shared with the other metric classes of the run, if any.
+        '''
         words = list(filter(lambda x: x != "", words))
         self.print_init = print_init
         super().__init__(-1, output, corpus)
@@ -31,75 +34,54 @@ class OrthMetrics(Metrics):
             tokenised = self.tokenise(word)
             self.output.init_word_at_index(word_index, word, tokenised, isOrth=True, print_init=print_init)
 
-        freq_dic = self.create_word_to_freq_dic(corpus)
-        self.word_to_token_dic = self.create_word_to_tokens_dic(freq_dic)
-        self.neighbour_calc = Neighbours(freq_dic)
-        self.freq_dic = self.create_tokens_to_freq_dic(self.word_to_token_dic, freq_dic)
-        self.orth_to_phon_dic = self.create_orth_to_phon_dic(corpus)
+        self.lexicon = lexicon if lexicon else Lexicon(corpus)
+        orth_column = self.lexicon.get_orth_column()
+        self.word_to_token_dic = orth_column.word_to_tokens_dic
+        self.word_to_codes_dic = orth_column.word_to_codes_dic
+        self.neighbour_calc = orth_column.neighbour_calc
+        self.orth_to_phon_dic = self.lexicon.get_orth_to_phon_dic()
         self.bigram_base = None
-        self.unique_pt_dic = None
 
     def set_word(self, word, output):
-        self.output = output
-        tokenised = self.tokenise(word)
-        self.output.init_word_at_index(0, word, tokenised, isOrth=True, print_init=self.print_init)
+        self.set_words([word], output)
 
-    def create_word_to_freq_dic(self, data):
-        '''
-        Returns a dictionary mapping orthographic words as strings to frequency.
-        '''
-        freq_dic = {}
-        for row in data:
-            word = row[0]
-            if word not in freq_dic:
-                freq_dic[word] = 0
-            freq_dic[word] += float(row[2])
-        return freq_dic
-
-    def create_orth_to_phon_dic(self, data):
+    def set_words(self, words, output):
         '''
-        Returns a dictionary of orthographic word as key, phonological word as value.
+        Overwrites existing words and output with a batch of words, one per word entry of output.
         '''
-        dic = {}
-        for row in data:
-            dic[row[0]] = row[1]
-        return dic
+        self.output = output
+        for word_index in range(len(words)):
+            word = words[word_index]
+            tokenised = self.tokenise(word)
+            self.output.init_word_at_index(word_index, word, tokenised, isOrth=True, print_init=self.print_init)
 
-    def create_word_to_tokens_dic(self, corpus):
-        '''
-        Returns a dictionary mapping words as strings to tokenised words as a list.
-        '''
-        new_corpus = {}
-        for word in corpus:
-            new_corpus[word] = self.tokenise(word)
-        return new_corpus
+    def tokenise(self, word):
+        return list(word)
 
-    def create_tokens_to_freq_dic(self, words_to_tokens_dic, freq_dic):
+    def build_structures(self, intermediates):
         '''
-        Returns a dictionary mapping tokenised words (tuple) to frequency.
+        Builds the corpus structures used for the intermediate results and metrics of a MetricPlan,
+        except for the neighbour graph, see build_neighbour_graph.
         '''
-        dic = {}
-        for word in freq_dic:
-            tokens = words_to_tokens_dic[word]
-            dic[tuple(tokens)] = freq_dic[word]
-        return dic
-
-    def create_uniq_pt_dic(self):
+        if SAD_NEIGHBOURS in intermediates:
+            self.neighbour_calc.get_deletion_index(self.word_to_codes_dic)
+        if POSITION_NEIGHBOURS in intermediates:
+            self.neighbour_calc.get_substitution_index(self.word_to_codes_dic)
+        if TOKEN_TRIE in intermediates:
+            self.neighbour_calc.get_token_trie(self.word_to_codes_dic)
+        if NGRAM_TABLE in intermediates and not self.bigram_base:
+            self.bigram_base = self.lexicon.get_orth_column().get_bigram_table()
+
+    def compute_intermediates(self, intermediates):
         '''
-        Returns a dictionary mapping the first phoneme/token of each word to the tokenised word.
+        Computes the intermediate results of a MetricPlan for every word entry, before the metrics which use them.
         '''
-        corpus = list(self.word_to_token_dic.values())  # list of tokenised words
-        uniq_pt_dic = {}
-        for word in corpus:
-            if word == []:
-                continue
-            if word[0] not in uniq_pt_dic:
-                uniq_pt_dic[word[0]] = []
-            uniq_pt_dic[word[0]].append(word)
-        return uniq_pt_dic
-
-    def tokenise(self, word):
-        return list(word)
+        if POSITION_NEIGHBOURS in intermediates:
+            self.find_position_neighbour_ids()
+        if SUB_NEIGHBOURS in intermediates:
+            self.find_neighbours(sub_only=True)
+        if SAD_NEIGHBOURS in intermediates:
+            self.find_neighbours(sub_only=False)
 
     ####
     # Length
@@ -126,9 +108,15 @@ class OrthMetrics(Metrics):
             if self.output.has_orth_sad_neighbours:
                 return
 
+        if sub_only:
+            self.find_position_neighbour_ids()
         for word_entry in self.output.word_entries:
-            word = word_entry.orth_tokenised
-            neighbours = self.neighbour_calc.find_neighbours(word, self.word_to_token_dic, sub_only)
+            if sub_only:
+                neighbours = self.neighbour_calc.get_sub_neighbours(word_entry.orth_position_neighbour_ids,
+                                                                    self.word_to_codes_dic)
+            else:
+                word = word_entry.orth_tokenised
+                neighbours = self.neighbour_calc.find_neighbours(self.encode(word), self.word_to_codes_dic, False)
             neighbours_in_ipa = self.get_neighbours_in_ipa(neighbours)
             word_entry.set_orth_neighbours(neighbours, neighbours_in_ipa, sub_only)
 
@@ -140,9 +128,21 @@ class OrthMetrics(Metrics):
     def find_position_neighbours(self):
         for word_entry in self.output.word_entries:
             word = word_entry.orth_tokenised
-            result = self.neighbour_calc.find_position_neighbours(word, self.word_to_token_dic)
+            result = self.neighbour_calc.find_position_neighbours(self.encode(word), self.word_to_codes_dic)
             word_entry.append(result)
 
+    def find_position_neighbour_ids(self):
+        '''
+        Populates the ids of the substitution neighbours at each position if they have not yet been found.
+        '''
+        if self.output.has_orth_position_neighbours:
+            return
+        for word_entry in self.output.word_entries:
+            word = word_entry.orth_tokenised
+            word_entry.orth_position_neighbour_ids = self.neighbour_calc.find_position_neighbour_ids(
+                self.encode(word), self.word_to_codes_dic)
+        self.output.has_orth_position_neighbours = True
+
     def get_neighbours_in_ipa(self, neighbours):
         result = []
         for word in neighbours:
@@ -170,9 +170,12 @@ class OrthMetrics(Metrics):
             word_entry.add([mean, sd])
 
     def OLD20(self, sub_only = False):
+        if not sub_only:
+            self.find_neighbours(sub_only=False)
         for word_entry in self.output.word_entries:
             word = word_entry.orth_tokenised
-            result = self.neighbour_calc.find_PLD_20(word, self.word_to_token_dic, sub_only)
+            neighbours = None if sub_only else word_entry.orth_neighbours_sad
+            result = self.neighbour_calc.find_PLD_20(self.encode(word), self.word_to_codes_dic, sub_only, neighbours)
             word_entry.add(result[1:])
             neighbours = result[0]
             word_entry.add_OLD20_neighbours(neighbours)
@@ -182,38 +185,36 @@ class OrthMetrics(Metrics):
     ####
 
     def ccoeff(self):
+        self.find_neighbours(sub_only=False)
         for word_entry in self.output.word_entries:
-            if self.output.has_orth_sad_neighbours:
-                neighbours = word_entry.orth_neighbours_sad
-            else:
-                word = word_entry.orth_tokenised
-                neighbours = self.neighbour_calc.find_neighbours(word, self.word_to_token_dic, False)
-            neighbours = list(map(lambda x: self.tokenise(x), neighbours))
-            result = Ccoeff.ccoeff(neighbours, False)
+            neighbours = word_entry.orth_neighbours_sad
+            num_edges = self.neighbour_calc.count_edges(neighbours, self.word_to_codes_dic)
+            result = Ccoeff.get_ccoeff(num_edges, len(neighbours))
             word_entry.append(result)
 
+    def build_neighbour_graph(self):
+        '''
+        Builds the neighbour graph of the corpus used by ccoeff, for runs with many input words.
+        '''
+        self.neighbour_calc.build_neighbour_graph(self.word_to_codes_dic)
+
     def orth_spread(self):
+        self.find_position_neighbour_ids()
         for word_entry in self.output.word_entries:
-            word = word_entry.orth_tokenised
-            if self.output.has_orth_sub_neighbours:
-                neighbours = word_entry.orth_neighbours_sub
-            else:
-                neighbours = self.neighbour_calc.find_neighbours(word, self.word_to_token_dic, True)
-            neighbours = list(map(lambda x: self.tokenise(x), neighbours))
-            result = Ccoeff.phon_spread(word, neighbours)
+            result = self.neighbour_calc.get_spread(word_entry.orth_position_neighbour_ids)
             word_entry.append(result)
 
     def unique_point(self):
-        if not self.unique_pt_dic:
-            self.unique_pt_dic = self.create_uniq_pt_dic()
+        token_trie = self.neighbour_calc.get_token_trie(self.word_to_codes_dic)
         for word_entry in self.output.word_entries:
             word = word_entry.orth_tokenised
-            result = Ccoeff.unique_point(word, self.unique_pt_dic)
+            result = token_trie.unique_point(self.encode(word))
             word_entry.append(result)
 
     def bigram_prob(self):
         if not self.bigram_base:
-            self.bigram_base = Biphones.get_bpprob_base(self.freq_dic)
-        for word_entry in self.output.word_entries:
-            word = word_entry.orth_tokenised
-            word_entry.append(Biphones.get_biphone_prob(word, self.bigram_base))
+            self.bigram_base = self.lexicon.get_orth_column().get_bigram_table()
+        words = [word_entry.orth_tokenised for word_entry in self.output.word_entries]
+        results = self.bigram_base.get_prob_sums(words)
+        for idx in range(len(words)):
+            self.output.word_entries[idx].append(results[idx])
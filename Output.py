@@ -24,6 +24,11 @@ class Output:
     The class also stores the headers for the csv output,
     and boolean attributes indicating if different neighbour types have been initialised.
     '''
+    __slots__ = ("word_entries", "has_phon_sub_neighbours", "has_orth_sub_neighbours", "has_phon_sad_neighbours",
+                 "has_orth_sad_neighbours", "has_pg_sad_neighbours", "has_pg_sub_neighbours",
+                 "has_orth_position_neighbours", "has_phon_position_neighbours", "orth_word_is_init",
+                 "phon_word_is_init", "header")
+
     def __init__(self, num_words):
         self.word_entries = [WordEntry() for i in range(num_words)]
         self.has_phon_sub_neighbours = False
@@ -32,6 +37,8 @@ class Output:
         self.has_orth_sad_neighbours = False
         self.has_pg_sad_neighbours = False
         self.has_pg_sub_neighbours = False
+        self.has_orth_position_neighbours = False
+        self.has_phon_position_neighbours = False
         self.orth_word_is_init = False
         self.phon_word_is_init = False
         self.header = []
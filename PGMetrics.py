@@ -21,11 +21,17 @@ from Metrics import Metrics
 from OrthMetrics import OrthMetrics
 from PhonMetrics import PhonMetrics
 from Phonograph import *
+from Ccoeff import get_ccoeff
 from Tokeniser import Tokeniser
+from Lexicon import Lexicon
 from Exceptions import TokeniseException
+from MetricPlan import PG_SAD_NEIGHBOURS, PG_SUB_NEIGHBOURS, get_lexical_intermediates
 
 class PGMetrics(Metrics):
-    def __init__(self, key, words, corpus, output):
+    def __init__(self, key, words, corpus, output, lexicon=None):
+        '''
+        :param lexicon: Lexicon of the corpus shared with the other metric classes of the run, if any.
+        '''
         super().__init__(key, output, corpus)
         self.tokeniser = Tokeniser(key)
         self.orth_words = list(map(lambda x: x[0], words))
@@ -35,42 +41,50 @@ class PGMetrics(Metrics):
             orth_word = word[0]
             phon_word = word[1]
             self.output.init_pg_at_index(word_index, orth_word, phon_word)
-        self.neighbour_calc = Neighbours(self.create_word_to_freq_dic(corpus))
-        self.orth_to_phon_dic = self.create_phon_to_orth_dic(corpus)
+        self.lexicon = lexicon if lexicon else Lexicon(corpus, key)
+        self.neighbour_calc = Neighbours(self.lexicon.get_pg_freq_dic())
+        self.orth_to_phon_dic = self.lexicon.get_orth_to_phon_dic()
         self.word_to_tokens_dic = None
-        self.orth_metric = OrthMetrics(self.orth_words, self.corpus, self.output, print_init=False)
-        self.phon_metric = PhonMetrics(self.key, self.phon_words, self.corpus, self.output, print_init=False)
+        self.orth_metric = OrthMetrics(self.orth_words, self.corpus, self.output, print_init=False,
+                                       lexicon=self.lexicon)
+        self.phon_metric = PhonMetrics(self.key, self.phon_words, self.corpus, self.output, print_init=False,
+                                       lexicon=self.lexicon)
 
     def set_word(self, word, output):
         '''
         Overwrites existing word and output to a single word entry
         '''
+        self.set_words([word], output)
+
+    def set_words(self, words, output):
+        '''
+        Overwrites existing words and output with a batch of words, one per word entry of output.
+        :param words: list of InputWord.
+        '''
         self.output = output
-        orth_word = word.orth
-        phon_word = word.phon
-        self.orth_words = [orth_word]
-        self.phon_words = [phon_word]
-        self.output.init_pg_at_index(0, orth_word, phon_word)
-        self.orth_metric.set_word(orth_word, self.output)
-        self.phon_metric.set_word(phon_word, self.output)
+        self.orth_words = [word.orth for word in words]
+        self.phon_words = [word.phon for word in words]
+        for word_index in range(len(words)):
+            self.output.init_pg_at_index(word_index, self.orth_words[word_index], self.phon_words[word_index])
+        self.orth_metric.set_words(self.orth_words, self.output)
+        self.phon_metric.set_words(self.phon_words, self.output)
 
-    def create_word_to_freq_dic(self, data):
+    def build_structures(self, intermediates):
         '''
-        Returns a dictionary mapping orthographic words as string to frequency.
+        Builds the corpus structures used for the intermediate results and metrics of a MetricPlan,
+        except for the neighbour graphs, see build_neighbour_graph.
         '''
-        freq_dic = {}
-        for i in data:
-            freq_dic[i[0]] = i[2]
-        return freq_dic
+        self.orth_metric.build_structures(get_lexical_intermediates(intermediates))
+        self.phon_metric.build_structures(get_lexical_intermediates(intermediates))
 
-    def create_phon_to_orth_dic(self, data):
+    def compute_intermediates(self, intermediates):
         '''
-        Returns a dictionary of orthographic word as key, phonological word as value.
+        Computes the intermediate results of a MetricPlan for every word entry, before the metrics which use them.
         '''
-        dic = {}
-        for row in data:
-            dic[row[0]] = row[1]
-        return dic
+        if PG_SUB_NEIGHBOURS in intermediates:
+            self.find_pg_neighbours(sub_only=True)
+        if PG_SAD_NEIGHBOURS in intermediates:
+            self.find_pg_neighbours(sub_only=False)
 
     def create_word_to_tokens_dic(self, data):
         '''
@@ -169,21 +183,46 @@ class PGMetrics(Metrics):
             sd = self.neighbour_calc.n_freq_sd(result)
             word_entry.add([mean, sd])
 
-    def get_tokenised_pg_neighbour_tuple(self, word_entry, sub_only):
-        '''
-        Returns list of phonographic neighbours where each entry is a tuple of the form (tokenised_orth, tokenised_phon)
-        '''
-        orth_neighbours = list(map(lambda w: self.tokenise_orth(w), word_entry.get_pg_neighbours(True, sub_only)))
-        phon_neighbours = list(map(lambda w: self.tokenise_phon(w), word_entry.get_pg_neighbours(False, sub_only)))
-        return list(zip(orth_neighbours, phon_neighbours))
-
     def ccoeff(self):
         self.find_pg_neighbours(sub_only=False)
         for word_entry in self.output.word_entries:
-            neighbours = self.get_tokenised_pg_neighbour_tuple(word_entry, False)
-            result = ccoeff_pg(neighbours)
+            neighbours = list(zip(word_entry.get_pg_neighbours(True, False), word_entry.get_pg_neighbours(False, False)))
+            result = get_ccoeff(self.count_pg_edges(neighbours), len(neighbours))
             word_entry.append(result)
 
+    def count_pg_edges(self, neighbours):
+        '''
+        Returns the number of pairs of phonographic neighbours which are both orthographic and phonological
+        neighbours of each other, using the neighbour graphs of OrthMetrics and PhonMetrics.
+        :param neighbours: list of (orth word, phon word) tuples.
+        '''
+        orth_calc = self.orth_metric.neighbour_calc
+        phon_calc = self.phon_metric.neighbour_calc
+        orth_corpus = self.orth_metric.word_to_codes_dic
+        phon_corpus = self.phon_metric.word_to_codes_dic
+        phon_ids = []
+        positions = {}  # orth word id to position in neighbours
+        for idx in range(len(neighbours)):
+            positions[orth_calc.get_word_id(neighbours[idx][0], orth_corpus)] = idx
+            phon_ids.append(phon_calc.get_word_id(neighbours[idx][1], phon_corpus))
+        num_edges = 0
+        for orth_id in positions:
+            idx = positions[orth_id]
+            phon_neighbour_ids = set(phon_calc.find_neighbour_ids(phon_ids[idx], phon_corpus))
+            for neighbour_id in orth_calc.find_neighbour_ids(orth_id, orth_corpus):
+                if neighbour_id in positions and phon_ids[positions[neighbour_id]] in phon_neighbour_ids:
+                    num_edges += 1
+        # each edge was counted from both ends
+        return num_edges // 2
+
+    def build_neighbour_graph(self):
+        '''
+        Builds the orthographic and phonological neighbour graphs of the corpus used by ccoeff, for runs with many
+        input words.
+        '''
+        self.orth_metric.build_neighbour_graph()
+        self.phon_metric.build_neighbour_graph()
+
     def PGLD20(self):
         if not self.word_to_tokens_dic:
             self.word_to_tokens_dic = self.create_word_to_tokens_dic(self.corpus)
@@ -0,0 +1,130 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import csv
+import os
+import random
+import tempfile
+import unittest
+import cli
+from ExecCalculator import ExecCalculator
+from MetricsEngine import MetricsEngine
+from SelectedButtons import SelectedButtons
+
+'''
+Tests that a parallel run gives the same output as a run in one process.
+'''
+
+CONSONANTS = ['b', 'd', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'tʃ', 'ʃ']
+VOWELS = ['ɪ', 'iː', 'a', 'ɒ', 'ʊ', 'ə', 'eɪ', 'əʊ', 'ɪə', 'ʊə']
+UK_IPA_KEY = 1
+
+def make_phon_word(rnd):
+    num_syllables = rnd.randint(1, 3)
+    stress = rnd.randrange(num_syllables)
+    word = ""
+    for idx in range(num_syllables):
+        if idx == stress and num_syllables > 1:
+            word += "ˈ"
+        word += rnd.choice(CONSONANTS) + rnd.choice(VOWELS) + (rnd.choice(CONSONANTS) if rnd.random() < 0.5 else "")
+    return word
+
+def make_orth_word(rnd):
+    return "".join(rnd.choice("abcdeilmnorst") for _ in range(rnd.randint(1, 6)))
+
+def make_words(seed, num_corpus_words, num_input_words):
+    '''
+    Returns a random corpus of (orthographic word, phonological word, frequency) rows, and input words of which
+    half are taken from the corpus and some are repeated.
+    '''
+    rnd = random.Random(seed)
+    corpus = [[make_orth_word(rnd), make_phon_word(rnd), float(rnd.randint(0, 50))] for _ in range(num_corpus_words)]
+    input_words = []
+    for _ in range(num_input_words):
+        if rnd.random() < 0.5:
+            input_words.append([rnd.choice(corpus)[0], rnd.choice(corpus)[1]])
+        else:
+            input_words.append([make_orth_word(rnd), make_phon_word(rnd)])
+    return corpus, input_words + input_words[:10]
+
+def get_all_buttons():
+    buttons = SelectedButtons()
+    for name, value in vars(buttons).items():
+        if value is False and not name.endswith("_sub") and name != "ps_stress_code":
+            setattr(buttons, name, True)
+    buttons.set_transcription_system(UK_IPA_KEY)
+    return buttons
+
+def run_calculator(corpus, input_words, num_processes, start_method=None):
+    orth_words = [word[0] for word in input_words]
+    phon_words = [word[1] for word in input_words]
+    calculator = ExecCalculator(corpus, get_all_buttons(), orth_words, phon_words, list(zip(orth_words, phon_words)),
+                                len(input_words), num_processes)
+    calculator.set_start_method(start_method)
+    calculator.init()
+    calculator.run()
+    return calculator.output
+
+def write_csv(directory, name, rows):
+    filename = os.path.join(directory, name)
+    with open(filename, "w", newline="", encoding="utf-8") as file:
+        csv.writer(file).writerows(rows)
+    return filename
+
+class ParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.corpus, self.input_words = make_words(1, 1500, 300)
+
+    def run_cli(self, directory, num_processes, *options):
+        input_file = write_csv(directory, "input.csv", self.input_words)
+        corpus_file = write_csv(directory, "corpus.csv", self.corpus)
+        output_file = os.path.join(directory, "output_%d.csv" % num_processes)
+        status = cli.main([input_file, corpus_file, "-o", output_file, "--all", "--language", "uk",
+                           "-p", str(num_processes), "--no-cache", "-q"] + list(options))
+        self.assertEqual(status, 0)
+        with open(output_file, "rb") as file:
+            return file.read()
+
+    def test_cli_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(self.run_cli(directory, 3), self.run_cli(directory, 1))
+
+    def test_cli_start_method(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(self.run_cli(directory, 2, "--start-method", "spawn"), self.run_cli(directory, 1))
+
+    def test_spawned_workers(self):
+        expected = run_calculator(self.corpus, self.input_words, 1)
+        self.assertEqual(run_calculator(self.corpus, self.input_words, 2, "spawn"), expected)
+
+    def test_worker_copy_keeps_output(self):
+        orth_words = [word[0] for word in self.input_words]
+        phon_words = [word[1] for word in self.input_words]
+        engine = MetricsEngine(self.corpus, get_all_buttons(), orth_words, phon_words,
+                               list(zip(orth_words, phon_words)), len(self.input_words))
+        engine.init()
+        metrics = [engine.orth_metrics, engine.phon_metrics, engine.pg_metrics, engine.pg_metrics.orth_metric,
+                   engine.pg_metrics.phon_metric]
+        outputs = [metric.output for metric in metrics]
+        worker_engine = engine.get_worker_copy()
+        self.assertEqual([metric.output for metric in metrics], outputs)
+        self.assertIs(worker_engine.lexicon, engine.lexicon)
+        self.assertEqual(len(worker_engine.pg_metrics.orth_metric.output.word_entries), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,15 +17,18 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
 from Metrics import Metrics
-import Biphones
 import Ccoeff
 from Stress import Stress
-from Neighbours import Neighbours
+from Lexicon import Lexicon
+from MetricPlan import SAD_NEIGHBOURS, SUB_NEIGHBOURS, POSITION_NEIGHBOURS, TOKEN_TRIE, NGRAM_TABLE, STRESS_PATTERNS
 from Tokeniser import Tokeniser
 from Exceptions import TokeniseException
 
 class PhonMetrics(Metrics):
-    def __init__(self, key, words, corpus, output, print_init=True):
+    def __init__(self, key, words, corpus, output, print_init=True, lexicon=None):
+        '''
+        :param lexicon: Lexicon of the corpus shared with the other metric classes of the run, if any.
+        '''
         words = list(filter(lambda x: x != "", words))
         super().__init__(key, output, corpus)
         self.tokeniser = Tokeniser(key)
@@ -35,78 +38,28 @@ class PhonMetrics(Metrics):
             tokenised = self.tokenise(word)
             self.output.init_word_at_index(word_index, word, tokenised, isOrth=False, print_init=print_init)
 
-        freq_dic = self.create_word_to_freq_dic(corpus)
-        self.word_to_tokens_dic = self.create_word_to_tokens_dic(freq_dic)
-        self.neighbour_calc = Neighbours(freq_dic)
-        self.freq_dic = self.create_tokens_to_freq_dic(self.word_to_tokens_dic, freq_dic)
-        self.phon_to_orth_dic = self.create_phon_to_orth_dic(corpus)
+        self.lexicon = lexicon if lexicon else Lexicon(corpus, key)
+        phon_column = self.lexicon.get_phon_column()
+        self.word_to_tokens_dic = phon_column.word_to_tokens_dic
+        self.word_to_codes_dic = phon_column.word_to_codes_dic
+        self.neighbour_calc = phon_column.neighbour_calc
+        self.phon_to_orth_dic = self.lexicon.get_phon_to_orth_dic()
         self.biphone_base = None
         self.stress_code_calc = None
         self.stress_typ_calc = None
-        self.unique_pt_dic = None
-        self.ipa_words = list(map(lambda w: w[1], self.corpus))
 
     def set_word(self, word, output):
-        self.output = output
-        tokenised = self.tokenise(word)
-        self.output.init_word_at_index(0, word, tokenised, isOrth=False, print_init=self.print_init)
-
-    def create_word_to_freq_dic(self, data):
-        '''
-        Returns a dictionary mapping phonological words as strings to frequency.
-        '''
-        freq_dic = {}
-        for row in data:
-            word = row[1]
-            if word not in freq_dic:
-                freq_dic[word] = 0
-            freq_dic[word] += float(row[2])
-        return freq_dic
-
-    def create_phon_to_orth_dic(self, data):
-        '''
-        Returns a dictionary mapping phonological words to orthographic words (untokenised).
-        '''
-        dic = {}
-        for row in data:
-            if row[1] in dic:
-                dic[row[1]] += "/" + row[0]
-            else:
-                dic[row[1]] = row[0]
-        return dic
-
-    def create_word_to_tokens_dic(self, corpus):
-        '''
-        Returns a dictionary mapping words as strings to tokenised words as a list.
-        '''
-        new_corpus = {}
-        for word in corpus:
-            new_corpus[word] = self.tokenise(word)
-        return new_corpus
+        self.set_words([word], output)
 
-    def create_tokens_to_freq_dic(self, words_to_tokens_dic, freq_dic):
+    def set_words(self, words, output):
         '''
-        Returns a dictionary mapping tokenised words (tuple) to frequency.
+        Overwrites existing words and output with a batch of words, one per word entry of output.
         '''
-        dic = {}
-        for word in freq_dic:
-            tokens = words_to_tokens_dic[word]
-            dic[tuple(tokens)] = freq_dic[word]
-        return dic
-
-    def create_uniq_pt_dic(self):
-        '''
-        Returns a dictionary mapping the first phoneme/token of each word to the tokenised word.
-        '''
-        corpus = list(self.word_to_tokens_dic.values())  # list of tokenised words
-        uniq_pt_dic = {}
-        for word in corpus:
-            if word == []:
-                continue
-            if word[0] not in uniq_pt_dic:
-                uniq_pt_dic[word[0]] = []
-            uniq_pt_dic[word[0]].append(word)
-        return uniq_pt_dic
+        self.output = output
+        for word_index in range(len(words)):
+            word = words[word_index]
+            tokenised = self.tokenise(word)
+            self.output.init_word_at_index(word_index, word, tokenised, isOrth=False, print_init=self.print_init)
 
     def tokenise(self, word):
         try:
@@ -114,6 +67,33 @@ class PhonMetrics(Metrics):
         except TokeniseException as e:
             raise e
 
+    def build_structures(self, intermediates):
+        '''
+        Builds the corpus structures used for the intermediate results and metrics of a MetricPlan,
+        except for the neighbour graph, see build_neighbour_graph.
+        '''
+        if SAD_NEIGHBOURS in intermediates:
+            self.neighbour_calc.get_deletion_index(self.word_to_codes_dic)
+        if POSITION_NEIGHBOURS in intermediates:
+            self.neighbour_calc.get_substitution_index(self.word_to_codes_dic)
+        if TOKEN_TRIE in intermediates:
+            self.neighbour_calc.get_token_trie(self.word_to_codes_dic)
+        if NGRAM_TABLE in intermediates and not self.biphone_base:
+            self.biphone_base = self.lexicon.get_phon_column().get_bigram_table()
+        if STRESS_PATTERNS in intermediates and not self.stress_typ_calc:
+            self.stress_typ_calc = Stress(self.key, stress_typicality_dic=self.lexicon.get_stress_typicality_dic())
+
+    def compute_intermediates(self, intermediates):
+        '''
+        Computes the intermediate results of a MetricPlan for every word entry, before the metrics which use them.
+        '''
+        if POSITION_NEIGHBOURS in intermediates:
+            self.find_position_neighbour_ids()
+        if SUB_NEIGHBOURS in intermediates:
+            self.find_neighbours(sub_only=True)
+        if SAD_NEIGHBOURS in intermediates:
+            self.find_neighbours(sub_only=False)
+
     ####
     # Surface metrics
     ####
@@ -132,7 +112,7 @@ class PhonMetrics(Metrics):
 
     def stress_typicality(self):
         if not self.stress_typ_calc:
-            self.stress_typ_calc = Stress(self.key, self.ipa_words)
+            self.stress_typ_calc = Stress(self.key, stress_typicality_dic=self.lexicon.get_stress_typicality_dic())
         for word_entry in self.output.word_entries:
             word = word_entry.phon_word
             word_entry.append(self.stress_typ_calc.get_stress_typicality(word))
@@ -162,9 +142,15 @@ class PhonMetrics(Metrics):
             if self.output.has_phon_sad_neighbours:
                 return
 
+        if sub_only:
+            self.find_position_neighbour_ids()
         for word_entry in self.output.word_entries:
-            word = word_entry.phon_tokenised
-            neighbours = self.neighbour_calc.find_neighbours(word, self.word_to_tokens_dic, sub_only)
+            if sub_only:
+                neighbours = self.neighbour_calc.get_sub_neighbours(word_entry.phon_position_neighbour_ids,
+                                                                    self.word_to_codes_dic)
+            else:
+                word = word_entry.phon_tokenised
+                neighbours = self.neighbour_calc.find_neighbours(self.encode(word), self.word_to_codes_dic, False)
             neighbours_in_spelling = self.get_neighbours_in_spelling(neighbours)
             word_entry.set_phon_neighbours(neighbours, neighbours_in_spelling, sub_only)
 
@@ -176,9 +162,21 @@ class PhonMetrics(Metrics):
     def find_position_neighbours(self):
         for word_entry in self.output.word_entries:
             word = word_entry.phon_tokenised
-            result = self.neighbour_calc.find_position_neighbours(word, self.word_to_tokens_dic)
+            result = self.neighbour_calc.find_position_neighbours(self.encode(word), self.word_to_codes_dic)
             word_entry.append(result)
 
+    def find_position_neighbour_ids(self):
+        '''
+        Populates the ids of the substitution neighbours at each position if they have not yet been found.
+        '''
+        if self.output.has_phon_position_neighbours:
+            return
+        for word_entry in self.output.word_entries:
+            word = word_entry.phon_tokenised
+            word_entry.phon_position_neighbour_ids = self.neighbour_calc.find_position_neighbour_ids(
+                self.encode(word), self.word_to_codes_dic)
+        self.output.has_phon_position_neighbours = True
+
     def get_neighbours_in_spelling(self, neighbours):
         result = []
         for word in neighbours:
@@ -206,9 +204,12 @@ class PhonMetrics(Metrics):
             word_entry.add([mean, sd])
 
     def PLD20(self, sub_only=False):
+        if not sub_only:
+            self.find_neighbours(sub_only=False)
         for word_entry in self.output.word_entries:
             word = word_entry.phon_tokenised
-            result = self.neighbour_calc.find_PLD_20(word, self.word_to_tokens_dic, sub_only)
+            neighbours = None if sub_only else word_entry.phon_neighbours_sad
+            result = self.neighbour_calc.find_PLD_20(self.encode(word), self.word_to_codes_dic, sub_only, neighbours)
 
             result[0] = list(map(lambda x: (self.phon_to_orth_dic[x[0]], x[1]), result[0]))
             word_entry.add(result[1:])
@@ -220,39 +221,37 @@ class PhonMetrics(Metrics):
     ####
 
     def ccoeff(self):
+        self.find_neighbours(sub_only=False)
         for word_entry in self.output.word_entries:
-            if self.output.has_phon_sad_neighbours:
-                neighbours = word_entry.phon_neighbours_sad
-            else:
-                word = word_entry.phon_tokenised
-                neighbours = self.neighbour_calc.find_neighbours(word, self.word_to_tokens_dic, False)
-            neighbours = list(map(lambda x: self.tokenise(x), neighbours))
-            result = Ccoeff.ccoeff(neighbours, False)
+            neighbours = word_entry.phon_neighbours_sad
+            num_edges = self.neighbour_calc.count_edges(neighbours, self.word_to_codes_dic)
+            result = Ccoeff.get_ccoeff(num_edges, len(neighbours))
             word_entry.append(result)
 
+    def build_neighbour_graph(self):
+        '''
+        Builds the neighbour graph of the corpus used by ccoeff, for runs with many input words.
+        '''
+        self.neighbour_calc.build_neighbour_graph(self.word_to_codes_dic)
+
     def phon_spread(self):
+        self.find_position_neighbour_ids()
         for word_entry in self.output.word_entries:
-            word = word_entry.phon_tokenised
-            if self.output.has_phon_sub_neighbours:
-                neighbours = word_entry.phon_neighbours_sub
-            else:
-                neighbours = self.neighbour_calc.find_neighbours(word, self.word_to_tokens_dic, True)
-            neighbours = list(map(lambda x: self.tokenise(x), neighbours))
-            result = Ccoeff.phon_spread(word, neighbours)
+            result = self.neighbour_calc.get_spread(word_entry.phon_position_neighbour_ids)
             word_entry.append(result)
 
     def unique_point(self):
-        if not self.unique_pt_dic:
-            self.unique_pt_dic = self.create_uniq_pt_dic()
+        token_trie = self.neighbour_calc.get_token_trie(self.word_to_codes_dic)
         for word_entry in self.output.word_entries:
             word = word_entry.phon_tokenised
-            result = Ccoeff.unique_point(word, self.unique_pt_dic)
+            result = token_trie.unique_point(self.encode(word))
             word_entry.append(result)
 
     def biphone_prob(self):
         if not self.biphone_base:
-            self.biphone_base = Biphones.get_bpprob_base(self.freq_dic)
-        for word_entry in self.output.word_entries:
-            word = word_entry.phon_tokenised
-            word_entry.append(Biphones.get_biphone_prob(word, self.biphone_base))
+            self.biphone_base = self.lexicon.get_phon_column().get_bigram_table()
+        words = [word_entry.phon_tokenised for word_entry in self.output.word_entries]
+        results = self.biphone_base.get_prob_sums(words)
+        for idx in range(len(words)):
+            self.output.word_entries[idx].append(results[idx])
 
@@ -229,3 +229,50 @@ class Phonemes:
                 if char not in char_list:
                     char_list.append(char)
         return char_list
+
+class PhonemeInventory:
+    '''
+    Phonemic inventory of a key, created once by get_inventory and shared by every user of the key.
+    Its attributes are tuples and frozensets, so that membership tests are fast and it cannot be modified.
+    '''
+    def __init__(self, key):
+        phonemes = Phonemes()
+        self.key = key
+        self.phonemes = tuple(phonemes.get_phonemes_by_key(key))
+        self.vowels = frozenset(phonemes.get_vowels_by_key(key))
+        self.consonants = frozenset(self.phonemes) - self.vowels
+        self.chars = tuple(phonemes.get_list_of_phoneme_chars(key))
+        self.char_set = frozenset(self.chars)
+        self.primary_stress = None
+        self.secondary_stress = None
+        if key in Phonemes.SAMPA_KEYS:
+            self.primary_stress = Phonemes.PRIMARY_STRESS_SAMPA
+            self.secondary_stress = Phonemes.SECONDARY_STRESS_SAMPA
+        elif key in Phonemes.IPA_KEYS:
+            self.primary_stress = Phonemes.PRIMARY_STRESS_IPA
+            self.secondary_stress = Phonemes.SECONDARY_STRESS_IPA
+        elif key == Phonemes.CUSTOM_KEY:
+            self.primary_stress = Phonemes.custom_primary_stress
+        # custom phonemes the inventory was made from, to detect when they are replaced
+        self.custom_phonemes = (tuple(Phonemes.custom_phonemes), tuple(Phonemes.custom_vowels),
+                                Phonemes.custom_primary_stress)
+
+    def is_current(self):
+        '''
+        Returns False if the inventory is of the custom key and the custom phonemes have changed since it was made.
+        '''
+        if self.key != Phonemes.CUSTOM_KEY:
+            return True
+        return self.custom_phonemes == (tuple(Phonemes.custom_phonemes), tuple(Phonemes.custom_vowels),
+                                        Phonemes.custom_primary_stress)
+
+inventories = {}
+
+def get_inventory(key):
+    '''
+    Returns the PhonemeInventory of key, creating it the first time the key is used or after the custom phonemes
+    have been reloaded.
+    '''
+    if key not in inventories or not inventories[key].is_current():
+        inventories[key] = PhonemeInventory(key)
+    return inventories[key]
@@ -0,0 +1,98 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+import Phonemes as PhonemesModule
+from Phonemes import Phonemes, get_inventory
+from Tokeniser import Tokeniser
+from Stress import Stress
+
+'''
+Tests that the phoneme inventories of the predefined keys are shared, and that the inventory of the custom key is
+made again when other custom phonemes are loaded.
+'''
+
+# consonants, vowels and the primary stress mark of two custom phonetic systems
+FIRST_SYSTEM = [["p", "a", "ˈ"], ["t", "i", ""], ["k", "", ""]]
+SECOND_SYSTEM = [["p", "a", "'"], ["ts", "o", ""], ["k", "", ""]]
+
+class PhonemeInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.custom_phonemes = (Phonemes.custom_cons, Phonemes.custom_vowels, Phonemes.custom_phonemes,
+                                Phonemes.custom_primary_stress)
+        self.inventories = dict(PhonemesModule.inventories)
+
+    def tearDown(self):
+        (Phonemes.custom_cons, Phonemes.custom_vowels, Phonemes.custom_phonemes,
+         Phonemes.custom_primary_stress) = self.custom_phonemes
+        PhonemesModule.inventories.clear()
+        PhonemesModule.inventories.update(self.inventories)
+        shutil.rmtree(self.directory)
+
+    def load_system(self, rows):
+        fname = os.path.join(self.directory, "system.csv")
+        with open(fname, "w", encoding="utf-8") as f:
+            f.write("\n".join(",".join(row) for row in rows) + "\n")
+        self.assertTrue(Phonemes().get_custom_phonemes(fname))
+
+    def test_predefined_inventories(self):
+        for key in range(Phonemes.CUSTOM_KEY):
+            inventory = get_inventory(key)
+            self.assertIs(get_inventory(key), inventory)
+            self.assertEqual(list(inventory.phonemes), Phonemes().get_phonemes_by_key(key))
+            self.assertEqual(inventory.vowels, frozenset(Phonemes().get_vowels_by_key(key)))
+            self.assertEqual(inventory.consonants, frozenset(inventory.phonemes) - inventory.vowels)
+            self.assertTrue(inventory.is_current())
+
+    def test_reloaded_custom_phonemes(self):
+        self.load_system(FIRST_SYSTEM)
+        inventory = get_inventory(Phonemes.CUSTOM_KEY)
+        self.assertIs(get_inventory(Phonemes.CUSTOM_KEY), inventory)
+        self.assertEqual(inventory.vowels, {"a", "i"})
+        self.assertEqual(inventory.consonants, {"p", "t", "k"})
+        self.assertEqual(inventory.primary_stress, "ˈ")
+        self.assertEqual(Tokeniser(Phonemes.CUSTOM_KEY).tokenise("tsak"), ["t", "a", "k"])
+
+        self.load_system(SECOND_SYSTEM)
+        self.assertFalse(inventory.is_current())
+        new_inventory = get_inventory(Phonemes.CUSTOM_KEY)
+        self.assertIsNot(new_inventory, inventory)
+        self.assertEqual(new_inventory.vowels, {"a", "o"})
+        self.assertEqual(new_inventory.consonants, {"p", "ts", "k"})
+        self.assertEqual(new_inventory.primary_stress, "'")
+        # strings tokenised with the first system are not taken from the token cache
+        self.assertEqual(Tokeniser(Phonemes.CUSTOM_KEY).tokenise("tsak"), ["ts", "a", "k"])
+        self.assertEqual(Stress(Phonemes.CUSTOM_KEY).primary_stress, "'")
+
+        # loading the same phonemes again keeps the inventory
+        self.load_system(SECOND_SYSTEM)
+        self.assertIs(get_inventory(Phonemes.CUSTOM_KEY), new_inventory)
+
+    def test_changed_stress_mark(self):
+        self.load_system(FIRST_SYSTEM)
+        inventory = get_inventory(Phonemes.CUSTOM_KEY)
+        Phonemes.custom_primary_stress = None
+        self.assertFalse(inventory.is_current())
+        self.assertIsNone(get_inventory(Phonemes.CUSTOM_KEY).primary_stress)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,37 +20,6 @@ import editdistance
 import heapq
 import math
 
-def ccoeff_pg(neighbours):
-    '''
-    Computes the C coefficient based only on neighbours with both orthographgic and phonological edit distance = 1.
-    :param neighbours: a list of tokenised words.
-    '''
-    num_edges = 0
-    if len(neighbours) <= 1:
-        return "NULL"
-    # count number of connections based on edit distance or substitutions = 1
-    for w1 in neighbours:
-        for w2 in neighbours:
-            if w1 == w2:
-                continue
-            elif abs(len(w1[0]) - len(w2[0])) > 1:
-                continue
-            elif abs(len(w1[1]) - len(w2[1])) > 1:
-                continue
-            else:
-                ld_orth = editdistance.eval(w1[0], w2[0])
-                ld_phon = editdistance.eval(w1[1], w2[1])
-            if ld_orth == 1 and ld_phon == 1:
-                num_edges += 1
-    # divide by 2 since each edge was counted twice
-    num_edges /= 2
-    num_nodes = len(neighbours)
-    # total possible number of edges in a complete graph:
-    poss_edges = (num_nodes * (num_nodes - 1)) / 2
-    if poss_edges == 0:
-        return 0
-    return num_edges / poss_edges
-
 def get_mean(n_freq_vals):
     if sum(n_freq_vals) == 0:
         return 0
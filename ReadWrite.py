@@ -16,7 +16,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
-import csv, io
+import csv, io, os
 
 def read_csv(fname):
     new = []
@@ -25,9 +25,56 @@ def read_csv(fname):
             new.append(row)
     return new
 
-def write(result, output_name):
-    ofile = io.open(output_name, 'w', newline='', encoding='utf-32')
-    with ofile:
-        writer = csv.writer(ofile, delimiter=",", quotechar="'")
-        writer.writerows(result)
-    ofile.close()
\ No newline at end of file
+def iter_csv(fname):
+    '''
+    Yields the rows of a csv file one at a time.
+    '''
+    with open(fname, encoding = 'utf-8-sig') as f:
+        for row in csv.reader(f):
+            yield row
+
+# Encoding of the output files, utf-8 files are a quarter of the size of utf-32 ones
+DEFAULT_ENCODING = 'utf-32'
+
+class CsvWriter:
+    '''
+    Writes the rows of a csv output file as they are produced, so that the whole output is never held in memory.
+    A run which stops before its last row removes the file with discard, so that no truncated output is left.
+    '''
+    def __init__(self, output_name, encoding=DEFAULT_ENCODING):
+        '''
+        :param output_name: path of the output file, which is overwritten.
+        :param encoding: encoding of the output file.
+        '''
+        self.output_name = output_name
+        self.file = io.open(output_name, 'w', newline='', encoding=encoding)
+        self.writer = csv.writer(self.file, delimiter=",", quotechar="'")
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        '''
+        Closes and removes the output file, whose rows are incomplete.
+        '''
+        self.file.close()
+        try:
+            os.remove(self.output_name)
+        except OSError:
+            pass
+
+def write(result, output_name, encoding=DEFAULT_ENCODING):
+    writer = CsvWriter(output_name, encoding)
+    try:
+        writer.write_rows(result)
+    finally:
+        writer.close()
\ No newline at end of file
@@ -0,0 +1,186 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import json
+import time
+import sqlite3
+from MetricsEngine import ORTH, PHON, PG
+
+'''
+Metric results of earlier runs, stored in an SQLite database in the cache directory of the corpus (see CorpusCache.py)
+so that the words of a run which were computed before against the same corpus are not computed again.
+'''
+
+RESULT_CACHE_EXTENSION = ".results.sqlite"
+# Changed whenever the results of a metric or the tables change, which makes the results stored before unusable
+RESULT_CACHE_VERSION = 2
+# Largest total size in bytes of the values stored before the least recently used ones are removed
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+# Fraction of max_size to which the values stored are reduced when it is exceeded
+EVICTION_TARGET = 0.9
+
+class ResultCache:
+    '''
+    The values of each metric of each word are stored separately as a JSON list of its columns, keyed by the
+    fingerprint of the corpus, the transcription key, the metric, its variant (sub only or SAD) and the words the
+    values depend on (see MetricsEngine.get_columns), so that a run reuses the results of any earlier run on the same
+    words, whatever the other metrics selected. A word whose row is missing any of the metrics selected is computed in
+    full, and its results are then stored. The least recently used results are removed when the values stored exceed
+    max_size bytes.
+    The database is used by one thread at a time, though not always the one which opened it.
+    '''
+    def __init__(self, filename, fingerprint, key, max_size=DEFAULT_MAX_SIZE):
+        '''
+        :param fingerprint: fingerprint of the corpus and everything its preprocessing depends on,
+        e.g. CorpusCache.fingerprint.
+        :param key: transcription key of the run.
+        '''
+        self.fingerprint = fingerprint
+        self.key = key
+        self.max_size = max_size
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        with self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != RESULT_CACHE_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS results")
+                self.connection.execute("PRAGMA user_version = %d" % RESULT_CACHE_VERSION)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results (corpus TEXT, key INTEGER, metric TEXT, "
+                                    "variant TEXT, orth TEXT, phon TEXT, value TEXT, size INTEGER, last_used REAL, "
+                                    "PRIMARY KEY (corpus, key, orth, phon, metric, variant))")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            # words whose values are looked up by find_rows
+            self.connection.execute("CREATE TEMP TABLE value_words (orth TEXT, phon TEXT)")
+        self.size = self.get_size()
+
+    @classmethod
+    def open(cls, corpus_cache, key, max_size=DEFAULT_MAX_SIZE):
+        '''
+        Returns the result cache of the corpus of corpus_cache, or None if it cannot be opened,
+        e.g. in a read-only directory.
+        :param corpus_cache: CorpusCache of the corpus file.
+        '''
+        filename = os.path.join(corpus_cache.directory, corpus_cache.prefix[:-1] + RESULT_CACHE_EXTENSION)
+        try:
+            os.makedirs(corpus_cache.directory, exist_ok=True)
+            return cls(filename, corpus_cache.fingerprint, key, max_size)
+        except (OSError, sqlite3.Error):
+            return None
+
+    def close(self):
+        self.connection.close()
+
+    def get_value_keys(self, columns, word):
+        '''
+        Returns (metric, variant, orthographic word, phonological word) keys of the values of the metrics of columns
+        for an InputWord, in the order of columns, with None for the columns of the input words.
+        :param columns: result of MetricsEngine.get_columns.
+        '''
+        words = {ORTH: (word.orth or "", ""), PHON: ("", word.phon or ""), PG: (word.orth or "", word.phon or "")}
+        return [(metric, variant) + words[kind] if metric else None for metric, variant, kind, titles in columns]
+
+    def find_rows(self, columns, words):
+        '''
+        Returns the output row of each InputWord of words made from the values stored, or None for a word for which
+        any of the metrics of columns is missing. The values of all the words are found with one query, which looks up
+        each (orthographic word, phonological word) key of the values in the primary key of the results stored.
+        '''
+        word_value_keys = [self.get_value_keys(columns, word) for word in words]
+        value_words = set()
+        for value_keys in word_value_keys:
+            for value_key in value_keys:
+                if value_key is not None:
+                    value_words.add(value_key[2:])
+        values = {}
+        with self.connection:
+            self.connection.execute("DELETE FROM temp.value_words")
+            self.connection.executemany("INSERT INTO temp.value_words VALUES (?, ?)", value_words)
+            # a cross join keeps value_words as the outer loop, so that each of its keys is one index lookup
+            for metric, variant, orth, phon, value in self.connection.execute(
+                    "SELECT results.metric, results.variant, results.orth, results.phon, results.value "
+                    "FROM temp.value_words CROSS JOIN results ON results.corpus = ? AND results.key = ? "
+                    "AND results.orth = value_words.orth AND results.phon = value_words.phon",
+                    (self.fingerprint, self.key)):
+                values[(metric, variant, orth, phon)] = value
+
+        rows = []
+        now = time.time()
+        used = []
+        for word, value_keys in zip(words, word_value_keys):
+            if not all(value_key is None or value_key in values for value_key in value_keys):
+                rows.append(None)
+                continue
+            row = []
+            for idx in range(len(columns)):
+                if value_keys[idx] is None:
+                    row.append(word.orth if columns[idx][2] == ORTH else word.phon)
+                else:
+                    row += json.loads(values[value_keys[idx]])
+                    used.append((now, self.fingerprint, self.key) + value_keys[idx])
+            rows.append(row)
+        if used:
+            with self.connection:
+                self.connection.executemany("UPDATE results SET last_used = ? WHERE corpus = ? AND key = ? "
+                                            "AND metric = ? AND variant = ? AND orth = ? AND phon = ?", used)
+        return rows
+
+    def add_rows(self, columns, words, rows):
+        '''
+        Stores the values of each metric of columns from the output row of each InputWord of words.
+        '''
+        now = time.time()
+        values = []
+        for word, row in zip(words, rows):
+            value_keys = self.get_value_keys(columns, word)
+            start = 0
+            for idx in range(len(columns)):
+                end = start + len(columns[idx][3])
+                if value_keys[idx] is not None:
+                    value = json.dumps(row[start:end], ensure_ascii=False)
+                    values.append((self.fingerprint, self.key) + value_keys[idx] + (value, len(value), now))
+                start = end
+        if not values:
+            return
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", values)
+        # values replaced are still counted, so the size is recounted before removing any values
+        self.size += sum(value[7] for value in values)
+        if self.size > self.max_size:
+            self.size = self.get_size()
+            if self.size > self.max_size:
+                self.remove_least_recently_used()
+
+    def get_size(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def remove_least_recently_used(self):
+        '''
+        Removes the least recently used values until their total size is at most EVICTION_TARGET of max_size.
+        '''
+        excess = self.size - int(self.max_size * EVICTION_TARGET)
+        cutoff = None
+        for last_used, size in self.connection.execute("SELECT last_used, size FROM results ORDER BY last_used"):
+            if excess <= 0:
+                break
+            cutoff = last_used
+            excess -= size
+        if cutoff is None:
+            return
+        with self.connection:
+            self.connection.execute("DELETE FROM results WHERE last_used <= ?", (cutoff,))
+        self.size = self.get_size()
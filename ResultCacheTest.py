@@ -0,0 +1,122 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import os
+import itertools
+import tempfile
+import unittest
+from unittest import mock
+import cli
+import ResultCache as result_cache_module
+from ResultCache import ResultCache
+from MetricsEngine import InputWord, ORTH, PHON, PG
+from ParallelTest import make_words, write_csv
+
+'''
+Tests for the results of earlier runs kept by ResultCache.
+'''
+
+COLUMNS = [(None, "", ORTH, ["Item (Orthography)"]), ("num_letters", "", ORTH, ["Length"]),
+           (None, "", PHON, ["Item (Phonology)"]), ("phon_n_dens", "sad", PHON, ["Density", "Identity"]),
+           ("pg_c_coeff", "", PG, ["C Coefficient"])]
+
+def make_row(word):
+    return [word.orth, len(word.orth), word.phon, len(word.phon), word.phon + "; " + word.orth, 0.5]
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "corpus.results.sqlite")
+        self.words = [InputWord("cat", "kat"), InputWord("bat", "bat"), InputWord("cat", "kaːt")]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, fingerprint="corpus", key=1, max_size=result_cache_module.DEFAULT_MAX_SIZE):
+        cache = ResultCache(self.filename, fingerprint, key, max_size)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_hits_and_misses(self):
+        cache = self.open()
+        self.assertEqual(cache.find_rows(COLUMNS, self.words), [None, None, None])
+        cache.add_rows(COLUMNS, self.words[:2], [make_row(word) for word in self.words[:2]])
+        self.assertEqual(cache.find_rows(COLUMNS, self.words), [make_row(self.words[0]), make_row(self.words[1]), None])
+        # the values of one metric of a word are shared by every pair of words with that word
+        self.assertEqual(cache.find_rows(COLUMNS[:2], self.words[2:]), [["cat", 3]])
+        self.assertEqual(cache.find_rows(COLUMNS[2:], [InputWord("rat", "kat")]), [None])
+        self.assertEqual(cache.find_rows(COLUMNS[2:4], [InputWord("rat", "kat")]), [["kat", 3, "kat; cat"]])
+
+    def test_other_corpus_or_key(self):
+        cache = self.open()
+        cache.add_rows(COLUMNS, self.words, [make_row(word) for word in self.words])
+        cache.close()
+        self.assertEqual(self.open(fingerprint="other").find_rows(COLUMNS, self.words), [None, None, None])
+        self.assertEqual(self.open(key=0).find_rows(COLUMNS, self.words), [None, None, None])
+        self.assertEqual(self.open().find_rows(COLUMNS, self.words), [make_row(word) for word in self.words])
+
+    def test_version_change(self):
+        cache = self.open()
+        cache.add_rows(COLUMNS, self.words, [make_row(word) for word in self.words])
+        cache.close()
+        with mock.patch("ResultCache.RESULT_CACHE_VERSION", result_cache_module.RESULT_CACHE_VERSION + 1):
+            cache = self.open()
+            self.assertEqual(cache.find_rows(COLUMNS, self.words), [None, None, None])
+            self.assertEqual(cache.get_size(), 0)
+
+    def test_least_recently_used_are_removed(self):
+        words = [InputWord("w%d" % idx, "p%d" % idx) for idx in range(11)]
+        columns = COLUMNS[:2]
+        value_size = len("[2]")
+        cache = self.open(max_size=10 * value_size)
+        clock = itertools.count()
+        with mock.patch("ResultCache.time.time", lambda: next(clock)):
+            for word in words[:10]:
+                cache.add_rows(columns, [word], [make_row(word)])
+            # the first word is used again, so the second and third are the least recently used
+            self.assertIsNotNone(cache.find_rows(columns, words[:1])[0])
+            cache.add_rows(columns, words[10:], [make_row(words[10])])
+        # the values stored are reduced to at most EVICTION_TARGET of max_size
+        self.assertEqual([row is not None for row in cache.find_rows(columns, words)], [True, False, False] + [True] * 8)
+        self.assertEqual(cache.get_size(), 9 * value_size)
+
+class CachedRunTest(unittest.TestCase):
+    '''
+    Runs the command-line runner on the same input with the caches off and on, and compares the output files.
+    '''
+    def run_cli(self, directory, name, *options):
+        output_file = os.path.join(directory, name)
+        status = cli.main([os.path.join(directory, "input.csv"), os.path.join(directory, "corpus.csv"),
+                           "-o", output_file, "--all", "--language", "uk", "-q"] + list(options))
+        self.assertEqual(status, 0)
+        with open(output_file, "rb") as file:
+            return file.read()
+
+    def test_output_with_caches(self):
+        corpus, input_words = make_words(2, 1500, 300)
+        with tempfile.TemporaryDirectory() as directory:
+            write_csv(directory, "input.csv", input_words)
+            write_csv(directory, "corpus.csv", corpus)
+            expected = self.run_cli(directory, "uncached.csv", "--no-cache", "-p", "1")
+            self.assertEqual(self.run_cli(directory, "cold.csv", "--result-cache", "-p", "1"), expected)
+            self.assertEqual(self.run_cli(directory, "warm.csv", "--result-cache", "-p", "1"), expected)
+            self.assertEqual(self.run_cli(directory, "parallel.csv", "--result-cache", "-p", "2"), expected)
+            self.assertEqual(self.run_cli(directory, "corpus_cache.csv", "-p", "1"), expected)
+
+if __name__ == '__main__':
+    unittest.main()
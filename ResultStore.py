@@ -0,0 +1,215 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from array import array
+
+'''
+Columnar storage of output rows, which takes much less memory than a WordEntry per row with its neighbour lists,
+and is sent between processes as a few arrays instead of many objects.
+'''
+
+NULL = "NULL"
+
+# Kinds of column, by the values in it other than NULL
+INT = 'q'
+FLOAT = 'd'
+STRING = 'L'  # ids in the string table of the store
+OBJECT = None  # any mix of values, kept in a list
+
+class ResultColumn:
+    '''
+    One column of a ResultStore. Integers and floats are held in typed arrays and strings as ids in the string table
+    of the store, with the NULL cells marked in a mask. A column whose values are of more than one type is turned into
+    a list of the values.
+    '''
+    def __init__(self, num_rows):
+        '''
+        :param num_rows: number of rows already in the store, which have no value in this column.
+        '''
+        self.kind = None
+        self.values = None
+        self.nulls = bytearray(b'\x01') * num_rows
+
+    def append(self, value, store):
+        if self.nulls is None:
+            self.values.append(value)
+            return
+        if type(value) is str and value == NULL:
+            self.append_null()
+            return
+        kind = get_kind(value)
+        if self.values is None:
+            if kind is OBJECT:
+                self.to_list(store)
+                self.values.append(value)
+                return
+            self.kind = kind
+            self.values = array(kind, [0]) * len(self.nulls)
+        if kind != self.kind:
+            self.to_list(store)
+            self.values.append(value)
+            return
+        if kind == STRING:
+            value = store.get_string_id(value)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            self.to_list(store)
+            self.values.append(value)
+            return
+        self.nulls.append(0)
+
+    def append_null(self):
+        if self.nulls is None:
+            self.values.append(NULL)
+            return
+        if self.values is not None:
+            self.values.append(0)
+        self.nulls.append(1)
+
+    def get(self, index, store):
+        if self.nulls is None:
+            return self.values[index]
+        if self.nulls[index]:
+            return NULL
+        if self.kind == STRING:
+            return store.strings[self.values[index]]
+        return self.values[index]
+
+    def to_list(self, store):
+        '''
+        Replaces the typed values by a list of the values, for a column of mixed types.
+        '''
+        self.values = [self.get(index, store) for index in range(len(self.nulls))]
+        self.kind = OBJECT
+        self.nulls = None
+
+def get_kind(value):
+    value_type = type(value)
+    if value_type is int:
+        return INT
+    if value_type is float:
+        return FLOAT
+    if value_type is str:
+        return STRING
+    return OBJECT
+
+class ResultStore:
+    '''
+    Output rows held by column (see ResultColumn). Rows may differ in length, and a row is read back either as a list
+    with get_row or through a ResultRow view.
+    '''
+    def __init__(self):
+        self.columns = []
+        self.row_lengths = array('L')
+        self.strings = []
+        self.string_ids = {}
+
+    def __len__(self):
+        return len(self.row_lengths)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ResultStore index out of range")
+        return ResultRow(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ResultRow(self, index)
+
+    def __getstate__(self):
+        # the string ids are rebuilt from the string table rather than pickled with it
+        state = self.__dict__.copy()
+        del state["string_ids"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.string_ids = {self.strings[string_id]: string_id for string_id in range(len(self.strings))}
+
+    def get_string_id(self, string):
+        '''
+        Returns the id of string in the string table, adding it if it is new, so that each distinct string, e.g. the
+        identities of neighbours shared by many words, is held once.
+        '''
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(string)
+            self.string_ids[string] = string_id
+        return string_id
+
+    def add_row(self, row):
+        num_rows = len(self)
+        while len(self.columns) < len(row):
+            self.columns.append(ResultColumn(num_rows))
+        for column_index in range(len(self.columns)):
+            if column_index < len(row):
+                self.columns[column_index].append(row[column_index], self)
+            else:
+                self.columns[column_index].append_null()
+        self.row_lengths.append(len(row))
+
+    def add_rows(self, rows):
+        for row in rows:
+            self.add_row(row)
+
+    def add_word_entries(self, word_entries):
+        '''
+        Adds the output row of each WordEntry (or ResultRow) in word_entries.
+        '''
+        for word_entry in word_entries:
+            self.add_row(word_entry.print())
+
+    def get_row(self, index):
+        '''
+        Returns the row at index as a list of its values.
+        '''
+        return [self.columns[column_index].get(index, self) for column_index in range(self.row_lengths[index])]
+
+    def get_rows(self):
+        return [self.get_row(index) for index in range(len(self))]
+
+class ResultRow:
+    '''
+    View of one row of a ResultStore, for code which handles rows one at a time like WordEntry objects.
+    '''
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __len__(self):
+        return self.store.row_lengths[self.index]
+
+    def __getitem__(self, column_index):
+        if column_index < 0:
+            column_index += len(self)
+        if not 0 <= column_index < len(self):
+            raise IndexError("ResultRow index out of range")
+        return self.store.columns[column_index].get(self.index, self.store)
+
+    def __iter__(self):
+        for column_index in range(len(self)):
+            yield self.store.columns[column_index].get(self.index, self.store)
+
+    def print(self):
+        return self.store.get_row(self.index)
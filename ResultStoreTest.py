@@ -0,0 +1,82 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import pickle
+import unittest
+from ResultStore import ResultStore, NULL, INT, FLOAT, STRING, OBJECT
+
+'''
+Tests for the columnar rows of ResultStore.
+'''
+
+class ResultStoreTest(unittest.TestCase):
+    def make_store(self, rows):
+        store = ResultStore()
+        store.add_rows(rows)
+        return store
+
+    def get_column_value_types(self, store, column_index):
+        return [type(value) for value in (store.get_row(index)[column_index] for index in range(len(store)))]
+
+    def test_typed_columns(self):
+        rows = [["cat", 3, 0.5, NULL], ["bat", NULL, 1.5, "x"], ["cat", 4, NULL, "y"]]
+        store = self.make_store(rows)
+        self.assertEqual([column.kind for column in store.columns], [STRING, INT, FLOAT, STRING])
+        self.assertEqual(store.get_rows(), rows)
+        self.assertEqual(store.strings, ["cat", "bat", "x", "y"])
+
+    def test_mixed_types(self):
+        rows = [[NULL, 1, "a"], [2, 2.5, "b"], [3.5, "c", 4]]
+        store = self.make_store(rows)
+        self.assertEqual([column.kind for column in store.columns], [OBJECT, OBJECT, OBJECT])
+        self.assertEqual(store.get_rows(), rows)
+        self.assertEqual(self.get_column_value_types(store, 1), [int, float, str])
+
+    def test_values_which_are_not_numbers_or_strings(self):
+        rows = [[1], [True], [None]]
+        store = self.make_store(rows)
+        self.assertEqual(store.columns[0].kind, OBJECT)
+        self.assertEqual(store.get_rows(), rows)
+        self.assertEqual(self.get_column_value_types(store, 0), [int, bool, type(None)])
+
+    def test_large_integers(self):
+        rows = [[1], [2 ** 70], [NULL]]
+        store = self.make_store(rows)
+        self.assertEqual(store.columns[0].kind, OBJECT)
+        self.assertEqual(store.get_rows(), rows)
+
+    def test_rows_of_different_lengths(self):
+        rows = [["cat"], ["bat", 1, 2.0], [], ["rat", 3]]
+        store = self.make_store(rows)
+        self.assertEqual(store.get_rows(), rows)
+        self.assertEqual([len(row) for row in store], [1, 3, 0, 2])
+        self.assertEqual(list(store[1]), rows[1])
+        self.assertEqual(store[-1][-1], 3)
+        self.assertEqual(store[3].print(), rows[3])
+        with self.assertRaises(IndexError):
+            store[0][1]
+
+    def test_pickle(self):
+        rows = [["cat", 3, 0.5], ["bat", NULL, "mixed"]]
+        store = pickle.loads(pickle.dumps(self.make_store(rows)))
+        self.assertEqual(store.get_rows(), rows)
+        store.add_row(["cat", 1, 2.0])
+        self.assertEqual(store.strings.count("cat"), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import json
+import struct
+from array import array
+from multiprocessing import shared_memory
+
+'''
+Corpus rows packed into one flat buffer, which can be placed in shared memory or a memory-mapped file and read
+without copying it. The buffer holds a header, the frequency column, the offsets of every string and the UTF-8
+bytes of the strings, in that order.
+A SharedCorpus places such a buffer in shared memory together with named flat arrays, e.g. those of Lexicon.share.
+'''
+
+MAGIC = b'LEXCORP1'
+HEADER = struct.Struct('<8sQQ')  # magic, number of rows, number of string columns
+# Separator between the tokens of a tokenised word stored as a string
+TOKEN_SEPARATOR = '\x1f'
+SHARED_MAGIC = b'LEXSHAR1'
+SHARED_HEADER = struct.Struct('<8sQ')  # magic, size of the JSON contents
+# Alignment in bytes of the packed corpus and of each array in shared memory
+ALIGNMENT = 8
+
+def align(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def pack_corpus(corpus, phon_tokens_dic=None):
+    '''
+    Returns the corpus packed into bytes.
+    :param corpus: list of [orthographic word, phonological word, frequency] rows.
+    :param phon_tokens_dic: optional dictionary mapping phonological words to tokenised words, stored as a third
+    string column so that the words do not need to be tokenised again.
+    '''
+    num_columns = 3 if phon_tokens_dic is not None else 2
+    freqs = array('d')
+    offsets = array('Q', [0])
+    blob = bytearray()
+    for row in corpus:
+        strings = [row[0], row[1]]
+        if phon_tokens_dic is not None:
+            strings.append(TOKEN_SEPARATOR.join(phon_tokens_dic.get(row[1], [])))
+        for string in strings:
+            blob += string.encode('utf-8')
+            offsets.append(len(blob))
+        freqs.append(float(row[2]))
+    return HEADER.pack(MAGIC, len(corpus), num_columns) + freqs.tobytes() + offsets.tobytes() + bytes(blob)
+
+class PackedCorpus:
+    '''
+    Read-only view of a packed corpus which behaves like the list of [orth, phon, freq] rows read by FileReader.
+    Rows are decoded from the buffer when they are accessed.
+    '''
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        magic, self.num_rows, self.num_columns = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Buffer does not hold a packed corpus")
+        start = HEADER.size
+        end = start + 8 * self.num_rows
+        self.freqs = self.buffer[start:end].cast('d')
+        start, end = end, end + 8 * (self.num_rows * self.num_columns + 1)
+        self.offsets = self.buffer[start:end].cast('Q')
+        self.blob = self.buffer[end:]
+
+    def __len__(self):
+        return self.num_rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.num_rows))]
+        if index < 0:
+            index += self.num_rows
+        if not 0 <= index < self.num_rows:
+            raise IndexError("Row index out of range")
+        return [self.get_string(index, 0), self.get_string(index, 1), self.freqs[index]]
+
+    def __iter__(self):
+        for index in range(self.num_rows):
+            yield self[index]
+
+    def get_string(self, index, column):
+        cell = index * self.num_columns + column
+        return str(self.blob[self.offsets[cell]:self.offsets[cell + 1]], 'utf-8')
+
+    def has_phon_tokens(self):
+        return self.num_columns > 2
+
+    def get_phon_tokens_dic(self):
+        '''
+        Returns a dictionary mapping phonological words to tokenised words, from the stored token column.
+        '''
+        dic = {}
+        if not self.has_phon_tokens():
+            return dic
+        for index in range(self.num_rows):
+            tokens = self.get_string(index, 2)
+            if tokens:
+                dic[self.get_string(index, 1)] = tokens.split(TOKEN_SEPARATOR)
+        return dic
+
+    def release(self):
+        '''
+        Releases the views of the buffer so that the memory holding it can be closed.
+        '''
+        self.freqs.release()
+        self.offsets.release()
+        self.blob.release()
+        self.buffer.release()
+
+class SharedCorpus:
+    '''
+    Packed corpus and named flat arrays placed in one block of shared memory. Worker processes attach to the block
+    by name and read the rows and the arrays from it without copying them, so that neither is pickled and sent to
+    each of them. The block holds a header, the JSON contents giving the place of the corpus and of each array, and
+    the data, each part of which is aligned to 8 bytes.
+    '''
+    def __init__(self, corpus, phon_tokens_dic=None, arrays=None):
+        '''
+        :param arrays: optional dictionary of arrays or memoryviews by name.
+        '''
+        parts = [memoryview(pack_corpus(corpus, phon_tokens_dic))]
+        contents = {"corpus": [0, parts[0].nbytes], "arrays": {}}
+        size = align(parts[0].nbytes)
+        for name, values in (arrays or {}).items():
+            view = memoryview(values)
+            contents["arrays"][name] = [view.format, size, view.nbytes]
+            parts.append(view)
+            size = align(size + view.nbytes)
+        contents = json.dumps(contents).encode('utf-8')
+        start = align(SHARED_HEADER.size + len(contents))
+        self.shm = shared_memory.SharedMemory(create=True, size=start + size)
+        SHARED_HEADER.pack_into(self.shm.buf, 0, SHARED_MAGIC, len(contents))
+        self.shm.buf[SHARED_HEADER.size:SHARED_HEADER.size + len(contents)] = contents
+        for view in parts:
+            self.shm.buf[start:start + view.nbytes] = view.cast('B')
+            start = align(start + view.nbytes)
+        self.name = self.shm.name
+
+    def close(self):
+        '''
+        Frees the shared memory. Called by the process which created it once the workers are done.
+        '''
+        self.shm.close()
+        self.shm.unlink()
+
+def attach_shared_corpus(name):
+    '''
+    Attaches to the shared memory block of a SharedCorpus and returns (shared memory, PackedCorpus, arrays), where
+    arrays is a dictionary of memoryviews of the block by name.
+    The block is owned by the process which created it, so it is not tracked by this process where that can be
+    turned off. Worker processes share the resource tracker of the process which started them, which already
+    tracks the block.
+    '''
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # track was added in Python 3.13
+        shm = shared_memory.SharedMemory(name=name)
+    magic, contents_size = SHARED_HEADER.unpack_from(shm.buf, 0)
+    if magic != SHARED_MAGIC:
+        raise ValueError("Shared memory does not hold a shared corpus")
+    contents = json.loads(bytes(shm.buf[SHARED_HEADER.size:SHARED_HEADER.size + contents_size]))
+    start = align(SHARED_HEADER.size + contents_size)
+    offset, size = contents["corpus"]
+    corpus = PackedCorpus(shm.buf[start + offset:start + offset + size])
+    arrays = {}
+    for name, (typecode, offset, size) in contents["arrays"].items():
+        arrays[name] = shm.buf[start + offset:start + offset + size].cast(typecode)
+    return shm, corpus, arrays
@@ -0,0 +1,82 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import unittest
+from array import array
+from SharedCorpus import PackedCorpus, SharedCorpus, pack_corpus, attach_shared_corpus
+
+'''
+Tests for packed corpora and the shared memory holding them.
+'''
+
+CORPUS = [["cat", "kat", 10.0], ["", "", 0.0], ["naïve", "naɪˈiːv", 2.5], ["bat", "bat", 1e-3]]
+PHON_TOKENS_DIC = {"kat": ["k", "a", "t"], "naɪˈiːv": ["n", "aɪ", "ˈ", "iː", "v"], "bat": ["b", "a", "t"]}
+
+class SharedCorpusTest(unittest.TestCase):
+    def test_round_trip(self):
+        corpus = PackedCorpus(pack_corpus(CORPUS))
+        self.assertEqual(len(corpus), len(CORPUS))
+        self.assertEqual(list(corpus), CORPUS)
+        self.assertEqual(corpus[-1], CORPUS[-1])
+        self.assertEqual(corpus[1:3], CORPUS[1:3])
+        self.assertFalse(corpus.has_phon_tokens())
+        self.assertEqual(corpus.get_phon_tokens_dic(), {})
+        with self.assertRaises(IndexError):
+            corpus[len(CORPUS)]
+
+    def test_round_trip_with_tokens(self):
+        corpus = PackedCorpus(pack_corpus(CORPUS, PHON_TOKENS_DIC))
+        self.assertEqual(list(corpus), CORPUS)
+        self.assertTrue(corpus.has_phon_tokens())
+        self.assertEqual(corpus.get_phon_tokens_dic(), PHON_TOKENS_DIC)
+
+    def test_not_packed(self):
+        with self.assertRaises(ValueError):
+            PackedCorpus(b"\0" * 64)
+
+    def test_shared_corpus(self):
+        shared_corpus = SharedCorpus(CORPUS, PHON_TOKENS_DIC)
+        try:
+            shm, corpus, arrays = attach_shared_corpus(shared_corpus.name)
+            self.assertEqual(list(corpus), CORPUS)
+            self.assertEqual(corpus.get_phon_tokens_dic(), PHON_TOKENS_DIC)
+            self.assertEqual(arrays, {})
+            corpus.release()
+            shm.close()
+        finally:
+            shared_corpus.close()
+
+    def test_shared_arrays(self):
+        values = {"a": array('H', [1, 2, 3]), "b": array('d', [0.5, -1.0]), "c": b"abc", "d": array('q'),
+                  "e": memoryview(array('L', [7, 8, 9]))[1:]}
+        shared_corpus = SharedCorpus(CORPUS, arrays=values)
+        try:
+            shm, corpus, arrays = attach_shared_corpus(shared_corpus.name)
+            self.assertEqual(list(corpus), CORPUS)
+            self.assertEqual(sorted(arrays), sorted(values))
+            for name in values:
+                self.assertEqual(arrays[name].format, memoryview(values[name]).format)
+                self.assertEqual(arrays[name].tolist(), memoryview(values[name]).tolist())
+                arrays[name].release()
+            corpus.release()
+            shm.close()
+        finally:
+            shared_corpus.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,35 +16,24 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
-from Phonemes import Phonemes
+from Phonemes import get_inventory
 from Tokeniser import Tokeniser
 
 class Stress:
     '''
     Class for computing stress/surface metrics including stress code and stress typicality.
     '''
-    def __init__(self, key, *words):
+    def __init__(self, key, *words, stress_typicality_dic=None):
         self.key = key
-        self.set_primary_stress()
-        self.set_secondary_stress()
+        self.inventory = get_inventory(key)
+        self.primary_stress = self.inventory.primary_stress
+        self.secondary_stress = self.inventory.secondary_stress
         self.tokeniser = Tokeniser(key)
         self.tokeniser.set_recognise_stress()
         if words:
             self.stress_typicality_dic = self.make_stress_typicality_dic(words[0])
-
-    def set_primary_stress(self):
-        if self.key in Phonemes.SAMPA_KEYS:
-            self.primary_stress = Phonemes.PRIMARY_STRESS_SAMPA
-        elif self.key in Phonemes.IPA_KEYS:
-            self.primary_stress = Phonemes.PRIMARY_STRESS_IPA
-        elif self.key == Phonemes.CUSTOM_KEY and Phonemes.custom_primary_stress is not None:
-            self.primary_stress = Phonemes.custom_primary_stress
-
-    def set_secondary_stress(self):
-        if self.key in Phonemes.SAMPA_KEYS:
-            self.secondary_stress = Phonemes.SECONDARY_STRESS_SAMPA
-        elif self.key in Phonemes.IPA_KEYS:
-            self.secondary_stress = Phonemes.SECONDARY_STRESS_IPA
+        elif stress_typicality_dic is not None:
+            self.stress_typicality_dic = stress_typicality_dic
 
     def make_stress_typicality_dic(self, words):
         '''
@@ -94,7 +83,7 @@ class Stress:
         '''
         tokenised_word = self.tokeniser.tokenise(word)
         num_vowels = 0
-        vowels = Phonemes().get_vowels_by_key(self.key)
+        vowels = self.inventory.vowels
         if self.primary_stress not in tokenised_word:
             return 0
         for token in tokenised_word:
@@ -111,7 +100,7 @@ class Stress:
         '''
         tokenised_word = self.tokeniser.tokenise(word)
         num_vowels = 0
-        vowels = Phonemes().get_vowels_by_key(self.key)
+        vowels = self.inventory.vowels
         if self.secondary_stress not in tokenised_word:
             return 0
         for token in tokenised_word:
@@ -0,0 +1,91 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+from array import array
+
+# Type code of encoded words: unsigned 2-byte integers
+CODE_TYPE = 'H'
+# Id reserved for masked positions, never given to a symbol
+MASK_ID = 0
+
+class SymbolTable:
+    '''
+    Maps each letter or phoneme of a transcription system to a small integer so that tokenised words can be
+    stored as compact arrays of integers. Symbols are given ids in the order they are first seen.
+    '''
+    def __init__(self):
+        self.symbols = [None]  # id 0 is MASK_ID
+        self.symbol_ids = {}
+
+    def get_id(self, symbol):
+        if symbol not in self.symbol_ids:
+            self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self.symbol_ids[symbol]
+
+    def encode(self, tokens):
+        '''
+        Returns the tokenised word as an array of symbol ids.
+        '''
+        return array(CODE_TYPE, [self.get_id(token) for token in tokens])
+
+    def decode(self, codes):
+        '''
+        Returns the array of symbol ids as a tokenised word (list).
+        '''
+        return [self.symbols[code] for code in codes]
+
+    def encode_dic(self, word_to_tokens_dic):
+        '''
+        Returns a dictionary mapping words as strings to encoded words, given a dictionary mapping words to tokenised words.
+        '''
+        dic = {}
+        for word in word_to_tokens_dic:
+            dic[word] = self.encode(word_to_tokens_dic[word])
+        return dic
+
+class DecodedWords:
+    '''
+    Sequence of the tokenised words of a sequence of encoded words, each decoded when it is accessed.
+    '''
+    def __init__(self, codes, symbol_table):
+        self.codes = codes
+        self.symbol_table = symbol_table
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        return self.symbol_table.decode(self.codes[index])
+
+symbol_tables = {}
+
+def get_symbol_table(key):
+    '''
+    Returns the symbol table shared by all words of the transcription system key (see Metrics.py for the keys).
+    '''
+    if key not in symbol_tables:
+        symbol_tables[key] = SymbolTable()
+    return symbol_tables[key]
+
+def set_symbol_tables(tables):
+    '''
+    Sets the symbol tables of transcription systems, e.g. to those of another process whose encoded words are used.
+    :param tables: dictionary mapping keys to SymbolTable.
+    '''
+    symbol_tables.update(tables)
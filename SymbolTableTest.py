@@ -0,0 +1,78 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import pickle
+import unittest
+from array import array
+from Phonemes import Phonemes
+from SymbolTable import SymbolTable, DecodedWords, CODE_TYPE, MASK_ID, get_symbol_table
+from TokeniserTest import ReferenceTokeniser, make_strings, get_result
+
+'''
+Tests that words encoded by a SymbolTable are decoded to the same tokenised words.
+'''
+
+class SymbolTableTest(unittest.TestCase):
+    def test_round_trip(self):
+        for key in range(Phonemes.CUSTOM_KEY):
+            reference = ReferenceTokeniser(key)
+            symbol_table = SymbolTable()
+            words = [get_result(reference, string) for string in make_strings(key, reference)]
+            words = [word for word in words if isinstance(word, list)]
+            codes = [symbol_table.encode(word) for word in words]
+            for word, encoded in zip(words, codes):
+                self.assertEqual(encoded.typecode, CODE_TYPE)
+                self.assertEqual(len(encoded), len(word))
+                self.assertNotIn(MASK_ID, encoded)
+                self.assertEqual(symbol_table.decode(encoded), word)
+            # each symbol has one id, given in the order the symbols are first seen
+            symbols = list(dict.fromkeys(token for word in words for token in word))
+            self.assertEqual(symbol_table.symbols[1:], symbols)
+            self.assertEqual([symbol_table.get_id(symbol) for symbol in symbols], list(range(1, len(symbols) + 1)))
+
+    def test_equal_words_equal_codes(self):
+        symbol_table = SymbolTable()
+        self.assertEqual(symbol_table.encode(["t", "ʃ", "a"]), symbol_table.encode(["t", "ʃ", "a"]))
+        self.assertNotEqual(symbol_table.encode(["tʃ", "a"]), symbol_table.encode(["t", "ʃ", "a"]))
+        self.assertEqual(symbol_table.encode([]), array(CODE_TYPE))
+        self.assertEqual(symbol_table.decode(array(CODE_TYPE)), [])
+
+    def test_encode_dic(self):
+        symbol_table = SymbolTable()
+        word_to_tokens_dic = {"cat": ["k", "æ", "t"], "act": ["æ", "k", "t"], "": []}
+        word_to_codes_dic = symbol_table.encode_dic(word_to_tokens_dic)
+        self.assertEqual(list(word_to_codes_dic), list(word_to_tokens_dic))
+        self.assertEqual({word: symbol_table.decode(codes) for word, codes in word_to_codes_dic.items()},
+                         word_to_tokens_dic)
+        words = DecodedWords(list(word_to_codes_dic.values()), symbol_table)
+        self.assertEqual(len(words), 3)
+        self.assertEqual(words[1], ["æ", "k", "t"])
+
+    def test_pickle(self):
+        symbol_table = SymbolTable()
+        encoded = symbol_table.encode(["k", "æ", "t"])
+        copy = pickle.loads(pickle.dumps(symbol_table))
+        self.assertEqual(copy.decode(encoded), ["k", "æ", "t"])
+        self.assertEqual(copy.encode(["t", "æ", "k"]), symbol_table.encode(["t", "æ", "k"]))
+
+    def test_shared_symbol_table(self):
+        self.assertIs(get_symbol_table(0), get_symbol_table(0))
+        self.assertIsNot(get_symbol_table(0), get_symbol_table(1))
+
+if __name__ == '__main__':
+    unittest.main()
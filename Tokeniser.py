@@ -16,123 +16,124 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 
-from Phonemes import Phonemes
+import re
+from collections import OrderedDict
+from Phonemes import Phonemes, get_inventory
 from Exceptions import TokeniseException
 
+# Maximum number of tokenised strings kept in the token cache
+TOKEN_CACHE_SIZE = 200000
+
 class Tokeniser:
     def __init__(self, key):
-        self.phoneme_list = Phonemes().get_phonemes_by_key(key)
-        self.phoneme_dict = self.make_phoneme_dict() # a dictionary of phonemes by char length
-        self.list_of_chars = Phonemes().get_list_of_phoneme_chars(key)
+        self.inventory = get_inventory(key)
+        self.phoneme_list = list(self.inventory.phonemes)
+        self.list_of_chars = list(self.inventory.chars)
         self.key = key
+        self.automaton = get_phoneme_automaton(self.phoneme_list, self.list_of_chars)
+        self.pair_corrections = {}
+        self.rhotics = frozenset()
+        self.rhotic_vowels = frozenset()
+        if self.key == 1:
+            self.add_triphthong_correction("ɪə", "ʊ")
+            self.add_triphthong_correction("ʊə", "ʊ")
+        elif self.key == 7:
+            self.add_triphthong_correction("I@", "U")
+            self.add_triphthong_correction("U@", "U")
+        elif self.key == 5:
+            self.rhotics = frozenset(Phonemes.ipa_de_rhotics)
+            self.rhotic_vowels = frozenset(Phonemes.ipa_de_vowels)
+        elif self.key == 12:
+            self.rhotics = frozenset(Phonemes.klattese_rhotics)
+            self.rhotic_vowels = frozenset(Phonemes.klattese_vowels)
+        self.remove_dots = self.key in Phonemes.SAMPA_KEYS
 
     def set_recognise_stress(self):
         if self.key in Phonemes.IPA_KEYS:
             self.phoneme_list.append(Phonemes.PRIMARY_STRESS_IPA)
             self.phoneme_list.append(Phonemes.SECONDARY_STRESS_IPA)
-            self.phoneme_dict = self.make_phoneme_dict()
             self.list_of_chars.append(Phonemes.PRIMARY_STRESS_IPA)
             self.list_of_chars.append(Phonemes.SECONDARY_STRESS_IPA)
+            self.automaton = get_phoneme_automaton(self.phoneme_list, self.list_of_chars)
         elif self.key in Phonemes.SAMPA_KEYS:
             self.phoneme_list.append(Phonemes.PRIMARY_STRESS_SAMPA)
             self.phoneme_list.append(Phonemes.SECONDARY_STRESS_SAMPA)
-            self.phoneme_dict = self.make_phoneme_dict()
             self.list_of_chars.append(Phonemes.PRIMARY_STRESS_SAMPA)
             self.list_of_chars.append(Phonemes.SECONDARY_STRESS_SAMPA)
+            self.automaton = get_phoneme_automaton(self.phoneme_list, self.list_of_chars)
         elif self.key == Phonemes.CUSTOM_KEY and Phonemes.custom_primary_stress is not None:
             self.phoneme_list.append(Phonemes.custom_primary_stress)
-            self.phoneme_dict = self.make_phoneme_dict()
             self.list_of_chars.append(Phonemes.custom_primary_stress)
+            self.automaton = get_phoneme_automaton(self.phoneme_list, self.list_of_chars)
 
     def tokenise(self, string):
         if string == "":
             return ""
-
-        # filter unrecognised chars from list
-        filtered_string = ""
-        for char in string:
-            if char in self.list_of_chars:
-                filtered_string += char
-        try:
-            result = self.parse(filtered_string)
-        except TokeniseException:
-            raise TokeniseException(string)
-
-        if self.key == 1:
-            result = self.correct_triphthongs(result, "ɪə", "ʊ")
-            result = self.correct_triphthongs(result, "ʊə", "ʊ")
-        elif self.key == 7:
-            result = self.correct_triphthongs(result, "I@", "U")
-            result = self.correct_triphthongs(result, "U@", "U")
-        elif self.key == 5:
-            result = self.correct_rhotics(result, Phonemes.ipa_de_rhotics,
-                                          Phonemes.ipa_de_vowels, [])
-        elif self.key == 12:
-            result = self.correct_rhotics(result, Phonemes.klattese_rhotics,
-                                          Phonemes.klattese_vowels, [])
-
-        if self.key in Phonemes.SAMPA_KEYS:
-            result = [i for i in result if i != '.']
-
-        if result == []:
+        signature = self.get_signature()
+        result = token_cache.get(signature, string)
+        if result is None:
+            try:
+                result = self.correct(self.parse(self.automaton.filter(string)))
+            except TokeniseException:
+                result = []
+            token_cache.add(signature, string, result)
+        if len(result) == 0:
             raise TokeniseException(string)
-        return result
+        return list(result)
 
-    def make_phoneme_dict(self):
-        phoneme_dict = {}
-        for phoneme in self.phoneme_list:
-            if len(phoneme) not in phoneme_dict:
-                phoneme_dict[len(phoneme)] = []
-            phoneme_dict[len(phoneme)].append(phoneme)
-        return phoneme_dict
+    def get_signature(self):
+        '''
+        Returns a value identifying how this tokeniser splits strings: its key and its compiled phoneme inventory.
+        '''
+        return (self.key, self.automaton)
 
-    def parse(self, string):
-        output = []
-        max_phoneme_length = max(self.phoneme_dict.keys())
-        while len(string) > 0:
-            phoneme_length = max_phoneme_length
-            length_before = len(string)
-            while phoneme_length > 0:
-                if phoneme_length in self.phoneme_dict and \
-                        string[0:phoneme_length] in self.phoneme_dict[phoneme_length]:
-                    output.append(string[0:phoneme_length])
-                    string = string[phoneme_length:]
-                    break
-                phoneme_length -= 1
-            if len(string) == length_before:
-                raise TokeniseException("")
-        return output
+    def add_to_cache(self, tokens_dic):
+        '''
+        Adds strings already tokenised by a tokeniser of the same key and inventory to the token cache.
+        :param tokens_dic: dictionary mapping strings to tokenised strings.
+        '''
+        signature = self.get_signature()
+        for string in tokens_dic:
+            token_cache.add(signature, string, tokens_dic[string])
 
-    def correct_triphthongs(self, tokens, first, second):
+    def add_triphthong_correction(self, first, second):
         '''
-        Shifts the second phone of a diphthong to the following token
+        Makes correct shift the second phone of the diphthong first to the token second following it.
         For example, changes "ɪə" (first), "ʊ" (second) sequence to "ɪ", "əʊ" sequence
         '''
-        if not first in tokens:
-            return tokens
-        else:
-            for i in range(len(tokens) - 1):
-                if tokens[i] == first and tokens[i+1] == second:
-                    tokens[i] = tokens[i][0]
-                    tokens[i+1] = first[-1] + tokens[i+1]
-        return tokens
+        self.pair_corrections[(first, second)] = (first[0], first[-1] + second)
 
-    def correct_rhotics(self, tokens, rhotics, vowels, diphthongs):
-        new_output = []
+    def correct(self, tokens):
+        '''
+        Makes the triphthong corrections added for this key, splits rhotics followed by a vowel into their two
+        phones, and removes syllable boundaries from SAMPA transcriptions, in one pass over the tokens.
+        '''
+        if not self.pair_corrections and not self.rhotics and not self.remove_dots:
+            return tokens
+        result = []
+        last = len(tokens) - 1
         for i in range(len(tokens)):
-            if tokens[i] in rhotics:
-                if i < len(tokens) - 1 and tokens[i + 1] in vowels:
-                    if i == 0 or tokens[i - 1] not in diphthongs:
-                        new_output.append(tokens[i][0])
-                        new_output.append(tokens[i][1])
-                        continue
-            new_output.append(tokens[i])
-        return new_output
+            token = tokens[i]
+            if i < last:
+                pair = (token, tokens[i + 1])
+                if pair in self.pair_corrections:
+                    token, tokens[i + 1] = self.pair_corrections[pair]
+                elif token in self.rhotics and tokens[i + 1] in self.rhotic_vowels:
+                    result.append(token[0])
+                    result.append(token[1])
+                    continue
+            if token == '.' and self.remove_dots:
+                continue
+            result.append(token)
+        return result
+
+    def parse(self, string):
+        return self.automaton.parse(string)
 
     def get_num_syllables(self, word):
         tokenised_word = self.tokenise(word)
         num_vowels = 0
-        vowels = Phonemes().get_vowels_by_key(self.key)
+        vowels = self.inventory.vowels
         for token in tokenised_word:
             if token in vowels:
                 num_vowels += 1
@@ -145,6 +146,94 @@ class Tokeniser:
             new_word += Phonemes.UK_to_US_IPA_dic[token]
         return new_word
 
+class PhonemeAutomaton:
+    '''
+    Phoneme inventory compiled into regular expressions, which remove the characters not in any phoneme and split
+    a string into its longest matching phonemes from left to right in a single scan each.
+    '''
+    def __init__(self, phoneme_list, list_of_chars):
+        # longer phonemes come first, so the first alternative matched at each position is the longest phoneme
+        phonemes = sorted(set(phoneme_list), key=len, reverse=True)
+        self.phoneme_pattern = re.compile("|".join(map(re.escape, phonemes)))
+        chars = [char for char in list_of_chars if len(char) == 1]
+        if chars:
+            self.other_chars_pattern = re.compile("[^" + "".join(map(re.escape, chars)) + "]+")
+        else:
+            self.other_chars_pattern = re.compile(".+", re.DOTALL)
+
+    def filter(self, string):
+        '''
+        Returns string without the characters which are not in any phoneme.
+        '''
+        return self.other_chars_pattern.sub("", string)
+
+    def parse(self, string):
+        '''
+        Returns the list of phonemes of string. Raises TokeniseException if part of the string is not a phoneme.
+        '''
+        output = self.phoneme_pattern.findall(string)
+        # characters skipped by findall are not part of any phoneme
+        if sum(map(len, output)) != len(string):
+            raise TokeniseException("")
+        return output
+
+phoneme_automatons = {}
+
+def get_phoneme_automaton(phoneme_list, list_of_chars):
+    '''
+    Returns the PhonemeAutomaton of a phoneme inventory, compiling it the first time the inventory is seen.
+    '''
+    inventory = (tuple(phoneme_list), tuple(list_of_chars))
+    if inventory not in phoneme_automatons:
+        phoneme_automatons[inventory] = PhonemeAutomaton(phoneme_list, list_of_chars)
+    return phoneme_automatons[inventory]
+
+class TokenCache:
+    '''
+    Tokenised strings shared by every tokeniser of the process, so that each distinct string is parsed once per run.
+    Entries are keyed by tokeniser signature and string, and the least recently used entries are dropped once
+    maxsize strings are held. Strings which cannot be tokenised are held as empty lists.
+    The lookups which found the tokens of a string (hits) and those which did not (misses) are counted, to tell
+    whether the cache pays for itself.
+    '''
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature, string):
+        '''
+        Returns the cached tokens of string, or None if they are not cached. The tokens must not be modified.
+        '''
+        entry_key = (signature, string)
+        tokens = self.entries.get(entry_key)
+        if tokens is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(entry_key)
+        self.hits += 1
+        return tokens
+
+    def add(self, signature, string, tokens):
+        self.entries[(signature, string)] = tuple(tokens)
+        self.entries.move_to_end((signature, string))
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        '''
+        Returns (hits, misses, number of strings held).
+        '''
+        return self.hits, self.misses, len(self.entries)
+
+token_cache = TokenCache()
+
 def tokenise_tests():
     words = ["əˈbandənm(ə)nt", "əkʌltʃəˈreʃ(ə)n", "əˈkwʌɪə", "ɑːˌtɪkjʊˈleɪʃ(ə)n", "ɑːˈtɪkjuleɪtɪd", "ɪə"]
     for w in words:
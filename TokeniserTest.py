@@ -0,0 +1,180 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+import random
+import unittest
+from Phonemes import Phonemes
+from Tokeniser import Tokeniser, TokenCache, token_cache
+from Exceptions import TokeniseException
+
+'''
+Tests the compiled tokeniser of each transcription system against the tokeniser LexiCAL first used.
+'''
+
+class ReferenceTokeniser:
+    '''
+    Tokeniser which tries the phonemes of each length from the longest down at each position of a string, and then
+    makes the corrections of its transcription system one after another, as LexiCAL first tokenised strings.
+    '''
+    def __init__(self, key, recognise_stress=False):
+        self.key = key
+        self.phoneme_list = Phonemes().get_phonemes_by_key(key)
+        self.list_of_chars = Phonemes().get_list_of_phoneme_chars(key)
+        if recognise_stress and key in Phonemes.IPA_KEYS:
+            self.add_stress_marks(Phonemes.PRIMARY_STRESS_IPA, Phonemes.SECONDARY_STRESS_IPA)
+        elif recognise_stress and key in Phonemes.SAMPA_KEYS:
+            self.add_stress_marks(Phonemes.PRIMARY_STRESS_SAMPA, Phonemes.SECONDARY_STRESS_SAMPA)
+        self.phoneme_dict = {}
+        for phoneme in self.phoneme_list:
+            self.phoneme_dict.setdefault(len(phoneme), []).append(phoneme)
+
+    def add_stress_marks(self, primary_stress, secondary_stress):
+        self.phoneme_list += [primary_stress, secondary_stress]
+        self.list_of_chars += [primary_stress, secondary_stress]
+
+    def tokenise(self, string):
+        if string == "":
+            return ""
+        filtered_string = "".join(char for char in string if char in self.list_of_chars)
+        result = self.parse(filtered_string)
+        if result is None:
+            raise TokeniseException(string)
+        if self.key == 1:
+            result = self.correct_triphthongs(result, "ɪə", "ʊ")
+            result = self.correct_triphthongs(result, "ʊə", "ʊ")
+        elif self.key == 7:
+            result = self.correct_triphthongs(result, "I@", "U")
+            result = self.correct_triphthongs(result, "U@", "U")
+        elif self.key == 5:
+            result = self.correct_rhotics(result, Phonemes.ipa_de_rhotics, Phonemes.ipa_de_vowels)
+        elif self.key == 12:
+            result = self.correct_rhotics(result, Phonemes.klattese_rhotics, Phonemes.klattese_vowels)
+        if self.key in Phonemes.SAMPA_KEYS:
+            result = [token for token in result if token != '.']
+        if result == []:
+            raise TokeniseException(string)
+        return result
+
+    def parse(self, string):
+        '''
+        Returns the list of phonemes of string, or None if part of it is not a phoneme.
+        '''
+        output = []
+        while string:
+            for length in range(max(self.phoneme_dict), 0, -1):
+                if string[:length] in self.phoneme_dict.get(length, []):
+                    output.append(string[:length])
+                    string = string[length:]
+                    break
+            else:
+                return None
+        return output
+
+    def correct_triphthongs(self, tokens, first, second):
+        for idx in range(len(tokens) - 1):
+            if tokens[idx] == first and tokens[idx + 1] == second:
+                tokens[idx] = first[0]
+                tokens[idx + 1] = first[-1] + tokens[idx + 1]
+        return tokens
+
+    def correct_rhotics(self, tokens, rhotics, vowels):
+        result = []
+        for idx in range(len(tokens)):
+            if tokens[idx] in rhotics and idx < len(tokens) - 1 and tokens[idx + 1] in vowels:
+                result.append(tokens[idx][0])
+                result.append(tokens[idx][1])
+            else:
+                result.append(tokens[idx])
+        return result
+
+# strings whose tokens are corrected, or have syllable boundaries or stress marks, for the keys which correct them
+SPECIAL_STRINGS = {
+    1: ["əˈkwʌɪə", "ɪəʊ", "kʊəʊt", "ɪəʊɪəʊ", "ɑːˌtɪkjʊˈleɪʃ(ə)n"],
+    5: ["ɪra", "baːrə", "ɔrɔr", "ɪr"],
+    6: ['dr"O.INz', '%aUt.S"aIn', 'sOlt."Sek@`', "."],
+    7: ["I@U", "kU@Ut", "I@.U"],
+    12: ["Ira", "@r@", "WrI", "Ir"],
+}
+
+def get_result(tokeniser, string):
+    try:
+        return tokeniser.tokenise(string)
+    except TokeniseException as e:
+        return ("TokeniseException", e.word)
+
+def make_strings(seed, tokeniser):
+    '''
+    Returns random strings of the phonemes of a tokeniser with some syllable boundaries and brackets, and random
+    strings of its characters and others which may not be tokenised.
+    '''
+    rnd = random.Random(seed)
+    strings = []
+    for _ in range(1000):
+        phonemes = [rnd.choice(tokeniser.phoneme_list) + (rnd.choice(".()") if rnd.random() < 0.1 else "")
+                    for _ in range(rnd.randint(0, 8))]
+        strings.append("".join(phonemes))
+    chars = tokeniser.list_of_chars + [".", "(", ")", "Q", " "]
+    for _ in range(1000):
+        strings.append("".join(rnd.choice(chars) for _ in range(rnd.randint(0, 10))))
+    return strings
+
+class TokeniserTest(unittest.TestCase):
+    def check_key(self, key, recognise_stress):
+        reference = ReferenceTokeniser(key, recognise_stress)
+        tokeniser = Tokeniser(key)
+        if recognise_stress:
+            tokeniser.set_recognise_stress()
+        for string in SPECIAL_STRINGS.get(key, []) + make_strings(key, reference):
+            self.assertEqual(get_result(tokeniser, string), get_result(reference, string), (key, string))
+
+    def test_predefined_systems(self):
+        for key in range(Phonemes.CUSTOM_KEY):
+            self.check_key(key, False)
+
+    def test_predefined_systems_with_stress(self):
+        for key in Phonemes.IPA_KEYS + Phonemes.SAMPA_KEYS:
+            self.check_key(key, True)
+
+    def test_corrections(self):
+        self.assertEqual(Tokeniser(1).tokenise("ɪəʊ"), ["ɪ", "əʊ"])
+        self.assertEqual(Tokeniser(5).tokenise("ɪra"), ["ɪ", "r", "a"])
+        self.assertEqual(Tokeniser(6).tokenise("a.b"), ["a", "b"])
+
+    def test_token_cache(self):
+        cache = TokenCache(maxsize=2)
+        self.assertIsNone(cache.get(0, "a"))
+        cache.add(0, "a", ["a"])
+        self.assertEqual(cache.get(0, "a"), ("a",))
+        cache.add(0, "b", ["b"])
+        cache.add(0, "c", ["c"])
+        # the least recently used string is dropped
+        self.assertIsNone(cache.get(0, "a"))
+        self.assertEqual(cache.get(0, "b"), ("b",))
+        self.assertEqual(cache.stats(), (2, 2, 2))
+        cache.clear()
+        self.assertEqual(cache.stats(), (0, 0, 0))
+
+    def test_shared_token_cache(self):
+        token_cache.clear()
+        Tokeniser(0).tokenise("kæt")
+        Tokeniser(0).tokenise("kæt")
+        Tokeniser(1).tokenise("kæt")
+        self.assertEqual(token_cache.stats(), (1, 2, 2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,7 +21,16 @@ class WordEntry:
     Class which contains the data for each processed word.
     Boolean flags signal whether word entry already has different types of neighbours.
     self.output contains the output list of strings to be printed to output.
+    Attributes are held in slots as there is one entry per input word.
     '''
+    __slots__ = ("orth_word", "orth_tokenised", "phon_word", "phon_tokenised",
+                 "phon_neighbours_sub", "phon_neighbours_sub_spelling", "phon_neighbours_sad",
+                 "phon_neighbours_sad_spelling", "orth_neighbours_sub", "orth_neighbours_sub_ipa",
+                 "orth_neighbours_sad", "orth_neighbours_sad_ipa", "pg_orth_neighbours_sub", "pg_phon_neighbours_sub",
+                 "pg_orth_neighbours_sad", "pg_phon_neighbours_sad", "orth_position_neighbour_ids",
+                 "phon_position_neighbour_ids", "PLD20_neighbours", "OLD_neighbours", "output",
+                 "orth_is_printed", "phon_is_printed")
+
     def __init__(self):
         self.orth_word = None
         self.orth_tokenised = None
@@ -43,6 +52,10 @@ class WordEntry:
         self.pg_orth_neighbours_sad = None
         self.pg_phon_neighbours_sad = None
 
+        # ids of the substitution neighbours at each position, see Neighbours.find_position_neighbour_ids
+        self.orth_position_neighbour_ids = None
+        self.phon_position_neighbour_ids = None
+
         self.PLD20_neighbours = []
         self.OLD_neighbours = []
         self.output = []
@@ -0,0 +1,84 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+'''
+Command-line entry point which runs LexiCAL on an input file without the user interface, e.g.
+    python cli.py input.csv corpus.csv -o output.csv --metrics orth_n_dens phon_n_dens PLD20
+or on every input file of a batch manifest against one loaded corpus, e.g.
+    python cli.py corpus.csv --batch manifest.csv
+where each row of the manifest is an input file, an output file and the metrics to calculate separated by spaces
+(or "all"), with paths relative to the manifest. It does not import PyQt5, so it runs on machines without a display.
+Run with --help for all options.
+'''
+
+import argparse
+import codecs
+import multiprocessing
+import sys
+from BatchCalculator import BatchCalculator, BatchError, Job, METRICS, add_corpus_arguments, add_run_arguments
+
+def make_parser():
+    parser = argparse.ArgumentParser(description="Calculates psycholinguistic variables for the words of an input "
+                                                 "file, as LexiCAL does, without the user interface.")
+    parser.add_argument("input", nargs="?",
+                        help="input csv file of orthographic words and, optionally, phonological words")
+    parser.add_argument("corpus", help="corpus csv file of orthographic words, phonological words and frequencies, "
+                                       "or orthographic words and frequencies with --orth-only")
+    parser.add_argument("-o", "--output", help="output csv file, which is overwritten")
+    parser.add_argument("-m", "--metrics", nargs="+", choices=METRICS, default=[], metavar="METRIC",
+                        help="metrics to calculate, one or more of: " + ", ".join(METRICS) +
+                             ". A metric ending in _sub counts substitution neighbours only")
+    parser.add_argument("--all", action="store_true", help="calculate all metrics")
+    parser.add_argument("-b", "--batch", metavar="MANIFEST",
+                        help="csv file of jobs run against the corpus instead of input, --output and --metrics, "
+                             "one job per row: input file, output file, and metrics separated by spaces or all")
+    add_corpus_arguments(parser)
+    add_run_arguments(parser)
+    return parser
+
+def main(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.batch:
+        if args.input or args.output or args.metrics or args.all:
+            parser.error("input, --output and --metrics are given in the manifest with --batch")
+    elif not args.input or not args.output:
+        parser.error("the input file and --output are required")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    try:
+        codecs.lookup(args.encoding)
+    except LookupError:
+        parser.error("unknown encoding: " + args.encoding)
+    try:
+        calculator = BatchCalculator(args)
+        if args.batch:
+            jobs = calculator.read_manifest(args.batch)
+        else:
+            jobs = [Job(args.input, args.output, calculator.get_selected_buttons(["all"] if args.all else args.metrics))]
+        if calculator.run(jobs):
+            return 1
+    except BatchError as e:
+        sys.stderr.write("error: " + str(e) + "\n")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    # worker processes of a parallel run may start from this file
+    multiprocessing.freeze_support()
+    sys.exit(main())
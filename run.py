@@ -21,17 +21,22 @@ This is the starting point of the application.
 '''
 
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from Calculator import CalculatorWindow
 from filelock import FileLock
 
-lock_path = "tmp.lock"
-lock = FileLock(lock_path, timeout=1)
-lock.acquire()
+if __name__ == '__main__':
+    # worker processes of a parallel run start from this file and must not open the application
+    multiprocessing.freeze_support()
 
-try:
-    app = QApplication(sys.argv)
-    calculator = CalculatorWindow()
-    sys.exit(app.exec_())
-finally:
-    lock.release()
\ No newline at end of file
+    lock_path = "tmp.lock"
+    lock = FileLock(lock_path, timeout=1)
+    lock.acquire()
+
+    try:
+        app = QApplication(sys.argv)
+        calculator = CalculatorWindow()
+        sys.exit(app.exec_())
+    finally:
+        lock.release()
\ No newline at end of file
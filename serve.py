@@ -0,0 +1,123 @@
+'''
+LexiCAL is a calculator for psycholinguistic variables.
+Copyright (C) 2019 Chee, Q.W., Chow, K.J., Goh, W.D., & Yap, M.J.; National University of Singapore.
+
+LeixCAL is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+LexiCAL is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+'''
+Entry point of the metrics service (see MetricsService.py), which keeps one or more corpora prepared in memory and
+answers metric requests over localhost HTTP or a Unix socket, e.g.
+    python serve.py --corpus english=corpus.csv --port 8765
+    curl -d '{"metrics": ["orth_n_dens"], "words": ["cat"]}' http://127.0.0.1:8765/metrics
+With --ndjson, requests are instead read one per line from plain connections and batched (see
+AsyncMetricsService.py), which suits many concurrent small requests.
+'''
+
+import argparse
+import asyncio
+import contextlib
+import sys
+import time
+from argparse import Namespace
+from AsyncMetricsService import RequestBatcher, start_server, DEFAULT_MAX_DELAY, DEFAULT_MAX_BATCH_SIZE
+from BatchCalculator import BatchError, add_corpus_arguments
+from MetricsService import MetricsService, WarmCorpus, make_server, remove_socket
+
+def parse_corpus(value):
+    name, sep, corpus_file = value.partition("=")
+    if not sep or not name or not corpus_file:
+        raise argparse.ArgumentTypeError("expected NAME=FILE")
+    return name, corpus_file
+
+def make_parser():
+    parser = argparse.ArgumentParser(description="Serves LexiCAL metrics for corpora kept prepared in memory.")
+    parser.add_argument("--corpus", type=parse_corpus, action="append", required=True, metavar="NAME=FILE",
+                        help="corpus csv file to load under a name, may be given more than once")
+    add_corpus_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default 8765)")
+    parser.add_argument("--socket", metavar="PATH", help="Unix socket to listen on instead of --host and --port")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not log requests")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="read requests one per line instead of over HTTP, batching concurrent requests")
+    parser.add_argument("--max-delay", type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help="with --ndjson, milliseconds a request waits for others to join its batch "
+                             "(default %g)" % (DEFAULT_MAX_DELAY * 1000))
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="with --ndjson, number of words above which a batch is computed without waiting "
+                             "(default %d)" % DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="with --ndjson, number of worker processes for large batches (default 1)")
+    return parser
+
+def load_service(args):
+    service = MetricsService()
+    for name, corpus_file in args.corpus:
+        start = time.monotonic()
+        corpus_args = Namespace(**vars(args))
+        corpus_args.corpus = corpus_file
+        service.add_corpus(WarmCorpus(name, corpus_args))
+        sys.stderr.write("Prepared corpus %s in %.2f s\n" % (name, time.monotonic() - start))
+    return service
+
+async def serve_ndjson(batcher, args):
+    server = await start_server(batcher, args.host, args.port, args.socket)
+    sys.stderr.write("Listening on %s\n" % (args.socket or "%s:%d" % (args.host, args.port)))
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    if len({name for name, corpus_file in args.corpus}) != len(args.corpus):
+        sys.stderr.write("error: corpus names must be unique\n")
+        return 1
+    try:
+        service = load_service(args)
+    except BatchError as e:
+        sys.stderr.write("error: " + str(e) + "\n")
+        return 1
+    if args.ndjson:
+        batcher = RequestBatcher(service, args.max_delay / 1000, args.max_batch_size, args.processes)
+        try:
+            asyncio.run(serve_ndjson(batcher, args))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            sys.stderr.write("error: " + str(e) + "\n")
+            return 1
+        finally:
+            if args.socket:
+                # a file which is not a socket was there before the server and is kept
+                with contextlib.suppress(FileExistsError):
+                    remove_socket(args.socket)
+        return 0
+    try:
+        server = make_server(service, args.host, args.port, args.socket, args.quiet)
+    except OSError as e:
+        sys.stderr.write("error: " + str(e) + "\n")
+        return 1
+    sys.stderr.write("Listening on %s\n" % (args.socket or "http://%s:%d" % (args.host, args.port)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            remove_socket(args.socket)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())